@@ -0,0 +1,102 @@
+"""
+Benchmark of InputService routing against the number of registered endpoints.
+
+Registers N client routes (state 'has_ticket', answered from the dialogue registry)
+and N operator thread routes, then measures registration cost per endpoint and
+resolve + dispatch time per incoming message. Both should stay flat from 10 to 50k.
+
+Run from the repository root:
+    python -m benchmarks.dispatch_routes [--sizes 10 1000 50000] [--messages 20000]
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+from types import SimpleNamespace
+
+from aiogram import Dispatcher
+
+from core.input_service import InputService
+
+GROUP_ID = -1001000000000
+
+
+class _ClientRegistry:
+    """Stands in for ActiveDialogueRegistry: every registered client has an active dialogue."""
+
+    def __init__(self, clients):
+        self.clients = clients
+
+    def get_by_client(self, client_telegram_id):
+        return True if client_telegram_id in self.clients else None
+
+    def get_by_thread(self, group_id, thread_id):
+        return None
+
+
+def _client_message(user_id: int):
+    return SimpleNamespace(
+        from_user=SimpleNamespace(id=user_id, is_bot=False),
+        chat=SimpleNamespace(id=user_id),
+        message_thread_id=None,
+        text="hello"
+    )
+
+
+def _thread_message(thread_id: int):
+    return SimpleNamespace(
+        from_user=SimpleNamespace(id=1, is_bot=False),
+        chat=SimpleNamespace(id=GROUP_ID),
+        message_thread_id=thread_id,
+        text="hello"
+    )
+
+
+async def _noop(message):
+    pass
+
+
+async def run_size(size: int, messages: int) -> dict:
+    service = InputService(Dispatcher())
+    user_ids = range(1, size + 1)
+    service.set_dialogue_registry(_ClientRegistry(set(user_ids)))
+
+    started = time.perf_counter()
+    for user_id in user_ids:
+        await service.register_user_handler(user_id, _noop, state="has_ticket")
+        await service.register_thread_handler(GROUP_ID, user_id, _noop)
+    register_us = (time.perf_counter() - started) / (2 * size) * 1e6
+
+    rng = random.Random(size)
+    batch = [
+        _client_message(rng.randint(1, size)) if i % 2 else _thread_message(rng.randint(1, size))
+        for i in range(messages)
+    ]
+
+    started = time.perf_counter()
+    for message in batch:
+        route = await service._resolve_route(message)
+        # Resolve only - thread handlers would look up the dialogue and run the handler
+        assert route, "message did not resolve"
+    resolve_us = (time.perf_counter() - started) / messages * 1e6
+
+    assert service.total_routes == 2 * size
+    return {'size': size, 'register_us': register_us, 'resolve_us': resolve_us}
+
+
+async def main(sizes, messages):
+    logging.disable(logging.CRITICAL)
+    print(f"{'endpoints':>10} {'register us/endpoint':>22} {'resolve us/message':>20}")
+    for size in sizes:
+        result = await run_size(size, messages)
+        print(f"{result['size'] * 2:>10} {result['register_us']:>22.2f} {result['resolve_us']:>20.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 50, 500, 5000, 25000],
+                        help="Dialogues to register (each is one client and one thread endpoint)")
+    parser.add_argument('--messages', type=int, default=20000, help="Messages to resolve per size")
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.messages))
@@ -0,0 +1,146 @@
+"""
+Benchmark of SQLite write contention under different connection profiles.
+
+Writer threads commit small inserts while reader threads keep querying the same
+table, all through one engine with the pool from SQLITE_POOL and the PRAGMAs
+applied by core.db._apply_sqlite_profile. Compares the rollback journal (with
+and without busy timeout) against the default WAL profile and reports commits
+per second, 'database is locked' errors and reads completed.
+
+Run from the repository root:
+    python -m benchmarks.sqlite_contention [--writers 4] [--commits 200] [--readers 2]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from config import Config
+from core.db import _apply_sqlite_profile, _get_sqlite_poolclass
+
+# name -> SQLite profile settings; 'wal' is the core.db default profile
+PROFILES = {
+    'rollback': {
+        Config.SQLITE_JOURNAL_MODE: 'DELETE',
+        Config.SQLITE_SYNCHRONOUS: 'FULL',
+        Config.SQLITE_BUSY_TIMEOUT: '5000',
+    },
+    'rollback-no-timeout': {
+        Config.SQLITE_JOURNAL_MODE: 'DELETE',
+        Config.SQLITE_SYNCHRONOUS: 'FULL',
+        Config.SQLITE_BUSY_TIMEOUT: '0',
+    },
+    'wal': {
+        Config.SQLITE_JOURNAL_MODE: 'WAL',
+        Config.SQLITE_SYNCHRONOUS: 'NORMAL',
+        Config.SQLITE_BUSY_TIMEOUT: '5000',
+    },
+}
+
+
+def _make_engine(path: str, settings: dict):
+    for key, value in settings.items():
+        Config.set(key, value, source="benchmark")
+
+    engine_kwargs = {'connect_args': {'check_same_thread': False}}
+    poolclass = _get_sqlite_poolclass()
+    if poolclass:
+        engine_kwargs['poolclass'] = poolclass
+    engine = create_engine(f"sqlite:///{path}", **engine_kwargs)
+    _apply_sqlite_profile(engine)
+    return engine
+
+
+def run_profile(name: str, writers: int, commits: int, readers: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = _make_engine(os.path.join(directory, "contention.db"), PROFILES[name])
+        Session = sessionmaker(bind=engine)
+        with engine.begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE messages (id INTEGER PRIMARY KEY, writer INTEGER, body TEXT)"
+            ))
+
+        lock = threading.Lock()
+        stats = {'commits': 0, 'locked': 0, 'reads': 0}
+        writers_done = threading.Event()
+
+        def write(writer_id: int):
+            for i in range(commits):
+                session = Session()
+                try:
+                    session.execute(
+                        text("INSERT INTO messages (writer, body) VALUES (:writer, :body)"),
+                        {'writer': writer_id, 'body': f"message {i}"}
+                    )
+                    session.commit()
+                    with lock:
+                        stats['commits'] += 1
+                except OperationalError as e:
+                    session.rollback()
+                    if 'locked' not in str(e):
+                        raise
+                    with lock:
+                        stats['locked'] += 1
+                finally:
+                    session.close()
+
+        def read():
+            while not writers_done.is_set():
+                session = Session()
+                try:
+                    session.execute(text("SELECT COUNT(*), MAX(id) FROM messages WHERE writer = 0")).one()
+                    with lock:
+                        stats['reads'] += 1
+                except OperationalError as e:
+                    if 'locked' not in str(e):
+                        raise
+                    with lock:
+                        stats['locked'] += 1
+                finally:
+                    session.close()
+
+        reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+        writer_threads = [threading.Thread(target=write, args=(i,)) for i in range(writers)]
+        for thread in reader_threads:
+            thread.start()
+
+        started = time.perf_counter()
+        for thread in writer_threads:
+            thread.start()
+        for thread in writer_threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        writers_done.set()
+        for thread in reader_threads:
+            thread.join()
+        engine.dispose()
+
+    stats['commits_per_s'] = stats['commits'] / elapsed
+    return stats
+
+
+def main(writers: int, commits: int, readers: int, profiles):
+    logging.disable(logging.CRITICAL)
+    print(f"{writers} writers x {commits} commits, {readers} readers, pool {Config.get(Config.SQLITE_POOL, 'queue')}")
+    print(f"{'profile':>20} {'commits/s':>10} {'committed':>10} {'locked':>8} {'reads':>8}")
+    for name in profiles:
+        result = run_profile(name, writers, commits, readers)
+        print(f"{name:>20} {result['commits_per_s']:>10.0f} {result['commits']:>10} "
+              f"{result['locked']:>8} {result['reads']:>8}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--writers', type=int, default=4, help="Writer threads")
+    parser.add_argument('--commits', type=int, default=200, help="Commits per writer")
+    parser.add_argument('--readers', type=int, default=2, help="Reader threads")
+    parser.add_argument('--profiles', nargs='+', choices=list(PROFILES), default=list(PROFILES))
+    args = parser.parse_args()
+    main(args.writers, args.commits, args.readers, args.profiles)
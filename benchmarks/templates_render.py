@@ -0,0 +1,441 @@
+"""
+Benchmark of MessageTemplates rendering: compiled templates against the baseline.
+
+Builds synthetic rows shaped like the Templates sheet (static and placeholder text,
+|rgroup:| blocks, callback/url/webapp buttons, sequence variables, language
+fallback, merged screens), checks that generate_screen, create_keyboard and
+get_raw_template give the same result as the pre-compilation implementation
+(BaselineTemplates below), then measures screens rendered per second by both.
+
+Run from the repository root:
+    python -m benchmarks.templates_render [--rows 600] [--screens 20000]
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, WebAppInfo
+
+from core.templates import MessageTemplates
+from core.utils import SafeDict
+
+logger = logging.getLogger(__name__)
+
+LANGS = ('en', 'ru', 'de')
+
+
+class BaselineTemplates(MessageTemplates):
+    """
+    Rendering as it was before CompiledTemplate: every call re-parses raw template
+    rows from _cache. Kept verbatim as the reference for equivalence and timing.
+    """
+
+    @staticmethod
+    def create_keyboard(buttons_str: str, variables: dict = None) -> Optional[InlineKeyboardMarkup]:
+        if not buttons_str or not buttons_str.strip():
+            return None
+
+        try:
+            keyboard_buttons = []
+            rows = buttons_str.split('\n')
+            sequence_index = 0
+
+            for row in rows:
+                if not row.strip():
+                    continue
+
+                button_row = []
+                buttons = row.split(';')
+
+                for button in buttons:
+                    button = button.strip()
+                    if not button or ':' not in button:
+                        continue
+
+                    if '|webapp|' in button:
+                        webapp_parts = button.split(':', 1)
+                        webapp_url_part = webapp_parts[0].strip()
+                        button_text = webapp_parts[1].strip() if len(webapp_parts) > 1 else "Open WebApp"
+
+                        if webapp_url_part.startswith('|webapp|'):
+                            url = webapp_url_part[8:]
+
+                            if not url.startswith(('http://', 'https://')):
+                                url = 'https://' + url
+
+                            if variables:
+                                try:
+                                    button_text = button_text.format_map(SafeDict(variables))
+                                    if '{}' in url or '{' in url:
+                                        url = url.format_map(SafeDict(variables))
+                                except Exception as e:
+                                    logger.error(f"Error formatting webapp button: {e}")
+                                    continue
+
+                            try:
+                                button_row.append(
+                                    InlineKeyboardButton(
+                                        text=button_text,
+                                        web_app=WebAppInfo(url=url)
+                                    )
+                                )
+                                continue
+                            except Exception as e:
+                                logger.error(f"Error creating webapp button: {e}")
+
+                    elif '|url|' in button:
+                        url_parts = button.split(':', 1)
+                        url_part = url_parts[0].strip()
+                        button_text = url_parts[1].strip() if len(url_parts) > 1 else "Open URL"
+
+                        if url_part.startswith('|url|'):
+                            url = url_part[5:]
+
+                            if not url.startswith(('http://', 'https://')):
+                                url = 'http://' + url
+
+                            if variables:
+                                try:
+                                    button_text = button_text.format_map(SafeDict(variables))
+                                    if '{}' in url or '{' in url:
+                                        url = url.format_map(SafeDict(variables))
+                                except Exception as e:
+                                    logger.error(f"Error formatting url button: {e}")
+                                    continue
+
+                            try:
+                                button_row.append(
+                                    InlineKeyboardButton(
+                                        text=button_text,
+                                        url=url
+                                    )
+                                )
+                                continue
+                            except Exception as e:
+                                logger.error(f"Error creating url button: {e}")
+
+                    callback, text = button.split(':', 1)
+                    callback, text = callback.strip(), text.strip()
+
+                    if variables:
+                        try:
+                            text = MessageTemplates.enhanced_sequence_format(
+                                text, variables, sequence_index
+                            )
+                            callback = MessageTemplates.enhanced_sequence_format(
+                                callback, variables, sequence_index
+                            )
+                            sequence_index += 1
+                        except Exception as e:
+                            logger.error(f"Error formatting callback button: {e}")
+                            continue
+
+                    try:
+                        button_row.append(
+                            InlineKeyboardButton(
+                                text=text,
+                                callback_data=callback
+                            )
+                        )
+                    except Exception as e:
+                        logger.error(f"Error creating callback button: {e}")
+
+                if button_row:
+                    keyboard_buttons.append(button_row)
+
+            return InlineKeyboardMarkup(inline_keyboard=keyboard_buttons) if keyboard_buttons else None
+
+        except Exception as e:
+            logger.error(f"Error creating keyboard: {e}")
+            return None
+
+    @staticmethod
+    def process_repeating_group(template_text: str, rgroup_data: Dict[str, List[Any]]) -> str:
+        start = template_text.find('|rgroup:')
+        if start == -1:
+            return template_text
+
+        end = template_text.find('|', start + 8)
+        if end == -1:
+            return template_text
+
+        item_template = template_text[start + 8:end]
+        full_template = template_text[start:end + 1]
+
+        if not rgroup_data or not all(rgroup_data.values()):
+            return template_text.replace(full_template, '')
+
+        lengths = {len(arr) for arr in rgroup_data.values()}
+        if len(lengths) != 1:
+            logger.warning(f"Inconsistent lengths in rgroup data: {lengths}")
+            return template_text.replace(full_template, '')
+
+        result = []
+        for i in range(next(iter(lengths))):
+            item_data = {key: values[i] for key, values in rgroup_data.items()}
+            result.append(item_template.format_map(SafeDict(item_data)))
+
+        return template_text.replace(full_template, '\n'.join(result))
+
+    @staticmethod
+    async def get_raw_template(state_key: str, variables: dict, lang: str = 'en') -> tuple[str, Optional[str]]:
+        template = MessageTemplates._cache.get((state_key, lang))
+        if not template:
+            template = MessageTemplates._cache.get((state_key, 'en'))
+            if not template:
+                raise ValueError(f"Template not found: {state_key}")
+
+        text = template['text'].replace('\\n', '\n')
+        buttons = template['buttons']
+
+        if 'rgroup' in variables:
+            text = BaselineTemplates.process_repeating_group(text, variables['rgroup'])
+            if buttons:
+                buttons = BaselineTemplates.process_repeating_group(buttons, variables['rgroup'])
+
+        formatted_text = text.format_map(SafeDict(variables))
+        if buttons:
+            formatted_buttons = buttons.format_map(SafeDict(variables))
+        else:
+            formatted_buttons = None
+
+        return formatted_text, formatted_buttons
+
+    @classmethod
+    async def generate_screen(
+            cls,
+            user,
+            state_keys: Union[str, List[str]],
+            variables: Optional[dict] = None
+    ) -> Tuple[str, Optional[str], Optional[InlineKeyboardMarkup], str, bool, Optional[str], Optional[str]]:
+        if isinstance(state_keys, str):
+            state_keys = [state_keys]
+
+        templates = []
+        for key in state_keys:
+            template = cls._cache.get((key, user.lang)) or cls._cache.get((key, 'en'))
+            if not template:
+                continue
+            templates.append(template)
+
+        if not templates:
+            fallback = cls._cache.get(('fallback', user.lang)) or cls._cache.get(('fallback', 'en'))
+            if fallback:
+                templates = [fallback]
+            else:
+                return "Template not found", None, None, "HTML", True, None, None
+
+        try:
+            texts = []
+            buttons_list = []
+            format_vars = (variables or {}).copy()
+            format_vars['user'] = user
+
+            for template in templates:
+                text = template['text'].replace('\\n', '\n')
+
+                if 'rgroup' in format_vars:
+                    text = cls.process_repeating_group(text, format_vars['rgroup'])
+
+                text = text.format_map(SafeDict(format_vars))
+                texts.append(text)
+
+                if template['buttons']:
+                    buttons_list.append(template['buttons'])
+
+            final_text = '\n\n'.join(text for text in texts if text)
+            merged_buttons = cls.merge_buttons(buttons_list)
+            keyboard = cls.create_keyboard(merged_buttons, variables=format_vars)
+
+            first_template = templates[0]
+            media_id = first_template['mediaID'] if first_template.get('mediaType') != 'None' else None
+            parse_mode = first_template['parseMode']
+
+            disable_preview = first_template['disablePreview']
+
+            pre_action = first_template.get('preAction', '') if first_template.get('preAction') else None
+            post_action = first_template.get('postAction', '') if first_template.get('postAction') else None
+
+            return final_text, media_id, keyboard, parse_mode, disable_preview, pre_action, post_action
+
+        except Exception as e:
+            return f"Error generating screen: {str(e)}", None, None, "HTML", True, None, None
+
+
+_TEXTS = (
+    "Welcome to support!",
+    "Hello, {user.firstname}!\\nYour ticket #{ticket_id} is {status}.",
+    "<b>Open tickets</b>\\n|rgroup:• #{id} {subject}\\n|\\nTotal: {total}",
+    "Balance: {balance:.2f} USD\\nLast update: {updated}",
+    "Choose an option below.\\nMissing value stays as {unknown}.",
+)
+
+_BUTTONS = (
+    "",
+    "/menu:Menu; /help:Help",
+    "view_{ticket_id}:Open #{ticket_id}\n/close_{ticket_id}:Close",
+    "pick_{ids}:{names}; pick_{ids}:{names}\npick_{ids}:{names}",
+    "|url|example.com/t/{ticket_id}:Details; |webapp|app.example.com:Open app\n/back:Back",
+    "|url|https://example.com/faq:FAQ\n/menu:Menu",
+)
+
+
+def build_rows(count: int, seed: int = 0) -> List[dict]:
+    """Synthetic Templates sheet rows; non-English rows exist for roughly half of keys."""
+    rng = random.Random(seed)
+    rows = []
+    key_index = 0
+    while len(rows) < count:
+        state_key = f"/screen_{key_index}"
+        langs = LANGS if key_index % 2 else ('en',)
+        for lang in langs:
+            rows.append({
+                'stateKey': state_key,
+                'lang': lang,
+                'preAction': rng.choice(('', '', 'load_tickets')),
+                'text': f"[{lang}] " + rng.choice(_TEXTS),
+                'buttons': rng.choice(_BUTTONS),
+                'postAction': rng.choice(('', 'track_click')),
+                'parseMode': 'HTML',
+                'disablePreview': rng.choice(('TRUE', 'FALSE', 1)),
+                'mediaType': rng.choice(('None', 'None', 'photo')),
+                'mediaID': rng.choice(('', 'AgACAgIAAxkBAAI')),
+            })
+        key_index += 1
+    rows.append({
+        'stateKey': 'fallback', 'lang': 'en', 'preAction': '', 'text': "Something went wrong",
+        'buttons': "/menu:Menu", 'postAction': '', 'parseMode': 'HTML', 'disablePreview': 'TRUE',
+        'mediaType': 'None', 'mediaID': ''
+    })
+    return rows
+
+
+def install_rows(rows: List[dict]) -> None:
+    """Fill template caches the way load_templates does, without Google Sheets."""
+    cache = {
+        (row['stateKey'], row['lang']): {
+            'preAction': row.get('preAction', ''),
+            'text': row['text'],
+            'buttons': row['buttons'],
+            'postAction': row.get('postAction', ''),
+            'parseMode': row['parseMode'],
+            'disablePreview': MessageTemplates._parse_boolean(row['disablePreview']),
+            'mediaType': row['mediaType'],
+            'mediaID': row['mediaID']
+        } for row in rows
+    }
+    MessageTemplates._cache = cache
+    MessageTemplates._compiled = {
+        key: MessageTemplates._compile_template(key, template) for key, template in cache.items()
+    }
+    MessageTemplates._static_keyboards = {}
+
+
+def build_requests(rows: List[dict], count: int, seed: int = 1) -> List[tuple]:
+    """(user, state_keys, variables) triples covering single, merged and missing keys."""
+    rng = random.Random(seed)
+    keys = sorted({row['stateKey'] for row in rows if row['stateKey'] != 'fallback'})
+    requests = []
+    for i in range(count):
+        user = SimpleNamespace(lang=rng.choice(LANGS), firstname=f"User{i}", userID=i)
+        shape = i % 10
+        if shape < 6:
+            state_keys = rng.choice(keys)
+        elif shape < 9:
+            state_keys = rng.sample(keys, 2)
+        else:
+            state_keys = ['/missing']
+        size = rng.randint(0, 4)
+        variables = {
+            'ticket_id': rng.randint(1, 10000),
+            'status': rng.choice(('open', 'closed')),
+            'balance': rng.random() * 1000,
+            'updated': '2026-10-17',
+            'total': size,
+            'ids': [rng.randint(1, 99) for _ in range(3)],
+            'names': ['first', 'second', 'third'],
+        }
+        if i % 3 == 0:
+            variables['rgroup'] = {
+                'id': list(range(size)),
+                'subject': [f"Subject {n}" for n in range(size)]
+            }
+        requests.append((user, state_keys, variables))
+    return requests
+
+
+def _dump(keyboard: Optional[InlineKeyboardMarkup]):
+    return keyboard.model_dump() if keyboard is not None else None
+
+
+async def check_equivalence(rows: List[dict], requests: List[tuple]) -> int:
+    """
+    Render every request with both implementations, raise AssertionError on the first
+    difference. Returns the number of comparisons made.
+    """
+    install_rows(rows)
+    checked = 0
+
+    for user, state_keys, variables in requests:
+        baseline = await BaselineTemplates.generate_screen(user, state_keys, variables)
+        compiled = await MessageTemplates.generate_screen(user, state_keys, variables)
+        baseline = baseline[:2] + (_dump(baseline[2]),) + baseline[3:]
+        compiled = compiled[:2] + (_dump(compiled[2]),) + compiled[3:]
+        assert compiled == baseline, f"generate_screen differs for {state_keys}: {compiled} != {baseline}"
+        checked += 1
+
+    raw_variables = {k: v for k, v in requests[0][2].items() if k not in ('ids', 'names', 'rgroup')}
+    raw_variables['user'] = requests[0][0]
+    for row in rows:
+        for variables in (raw_variables, {**raw_variables, 'rgroup': {'id': [1, 2], 'subject': ['a', 'b']}}):
+            baseline = await BaselineTemplates.get_raw_template(row['stateKey'], variables, row['lang'])
+            compiled = await MessageTemplates.get_raw_template(row['stateKey'], variables, row['lang'])
+            assert compiled == baseline, f"get_raw_template differs for {row['stateKey']}"
+            checked += 1
+
+    for buttons in _BUTTONS:
+        for user, _, variables in requests[:50]:
+            format_vars = {**variables, 'user': user}
+            for keyboard_vars in (None, format_vars):
+                baseline = BaselineTemplates.create_keyboard(buttons, keyboard_vars)
+                compiled = MessageTemplates.create_keyboard(buttons, keyboard_vars)
+                assert _dump(compiled) == _dump(baseline), f"create_keyboard differs for {buttons!r}"
+                checked += 1
+
+    return checked
+
+
+async def _screens_per_second(templates, requests: List[tuple]) -> float:
+    started = time.perf_counter()
+    for user, state_keys, variables in requests:
+        await templates.generate_screen(user, state_keys, variables)
+    return len(requests) / (time.perf_counter() - started)
+
+
+async def main(row_count: int, screens: int):
+    logging.disable(logging.CRITICAL)
+    rows = build_rows(row_count)
+    requests = build_requests(rows, screens)
+
+    checked = await check_equivalence(rows, requests[:2000])
+    print(f"Equivalence: {checked} renders identical ({len(rows)} rows)")
+
+    install_rows(rows)
+    baseline = await _screens_per_second(BaselineTemplates, requests)
+    compiled = await _screens_per_second(MessageTemplates, requests)
+    print(f"{'implementation':>15} {'screens/s':>12}")
+    print(f"{'baseline':>15} {baseline:>12.0f}")
+    print(f"{'compiled':>15} {compiled:>12.0f}")
+    print(f"{'speedup':>15} {compiled / baseline:>11.2f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=600, help="Synthetic template rows")
+    parser.add_argument('--screens', type=int, default=20000, help="Screens to render per implementation")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.screens))
@@ -52,11 +52,23 @@ class Config:
     GOOGLE_SHEET_ID = "google_sheet_id"
     GOOGLE_CREDENTIALS_JSON = "google_credentials_json"
     GOOGLE_SCOPES = "google_scopes"
+    GOOGLE_SHEETS_QUOTA = "google_sheets_quota"  # Sheets API requests per minute shared by all writers
+    EXPORT_FULL_SYNC_INTERVAL = "export_full_sync_interval"  # Seconds between full sheet reconciliations
 
     # Database configuration
     DATABASE_URL = "database_url"
     MAINBOT_DATABASE_URL = "mainbot_database_url"  # Read-only connection to mainbot
     MAINBOT_URL = "mainbot_url"
+    DB_ASYNC_MODE = "db_async_mode"  # Use async engines (aiosqlite/asyncpg) on hot paths
+    DB_EXECUTOR_WORKERS = "db_executor_workers"  # Threads per database for legacy sync DB work
+
+    # SQLite profile for helpbot database
+    SQLITE_JOURNAL_MODE = "sqlite_journal_mode"  # WAL lets readers work while one writer commits
+    SQLITE_SYNCHRONOUS = "sqlite_synchronous"  # NORMAL is safe with WAL and avoids fsync per commit
+    SQLITE_BUSY_TIMEOUT = "sqlite_busy_timeout"  # Milliseconds to wait for a lock instead of failing
+    SQLITE_CACHE_SIZE = "sqlite_cache_size"  # Page cache size (negative value = KiB)
+    SQLITE_MMAP_SIZE = "sqlite_mmap_size"  # Bytes of database file mapped into memory
+    SQLITE_POOL = "sqlite_pool"  # Connection pool: queue, singleton, static or null
 
     # System configuration
     SYSTEM_VERSION = "system_version"
@@ -73,8 +85,41 @@ class Config:
     CLAUDE_MODEL = 'CLAUDE_MODEL'
     CLAUDE_MAX_TOKENS = 'CLAUDE_MAX_TOKENS'
     CLAUDE_TIMEOUT = 'CLAUDE_TIMEOUT'
-    CLAUDE_RATE_LIMIT = 'CLAUDE_RATE_LIMIT'
+    CLAUDE_RATE_LIMIT = 'CLAUDE_RATE_LIMIT'  # Max concurrent Claude calls
+    CLAUDE_REQUESTS_PER_MINUTE = 'CLAUDE_REQUESTS_PER_MINUTE'
+    CLAUDE_TOKENS_PER_MINUTE = 'CLAUDE_TOKENS_PER_MINUTE'  # Input + output tokens
+    CLAUDE_QUEUE_TIMEOUT = 'CLAUDE_QUEUE_TIMEOUT'  # Seconds a call may wait for a slot before it's dropped
+    CLAUDE_BREAKER_FAILURES = 'CLAUDE_BREAKER_FAILURES'  # Consecutive failed/slow calls that open the circuit
+    CLAUDE_BREAKER_COOLDOWN = 'CLAUDE_BREAKER_COOLDOWN'  # Seconds the circuit stays open
+    CLAUDE_SLOW_CALL = 'CLAUDE_SLOW_CALL'  # Call slower than this (seconds) counts as failure
+    CLAUDE_DELIVERY_TIMEOUT = 'CLAUDE_DELIVERY_TIMEOUT'  # Max seconds a message waits for its translation
+    CLAUDE_RETRY_WINDOW = 'CLAUDE_RETRY_WINDOW'  # Seconds to keep retrying deferred translations
+    DIALOGUE_DELIVER_FIRST = 'DIALOGUE_DELIVER_FIRST'  # Send client original to operator first, edit translation in
+    CLAUDE_BASE_URL = 'CLAUDE_BASE_URL'  # Optional API base URL (proxy, local stub)
+    CLAUDE_STREAMING = 'CLAUDE_STREAMING'  # Stream translations of long client messages into operator thread
+    CLAUDE_STREAM_MIN_CHARS = 'CLAUDE_STREAM_MIN_CHARS'  # Shorter messages are translated in one piece
+    CLAUDE_STREAM_EDIT_INTERVAL = 'CLAUDE_STREAM_EDIT_INTERVAL'  # Min seconds between progressive edits
     TRANSLATION_PROMPT = 'TRANSLATION_PROMPT'
+    TRANSLATION_CACHE_SIZE = "translation_cache_size"  # Translations kept in memory (LRU)
+    TRANSLATION_CACHE_PERSIST = "translation_cache_persist"  # Also keep translations in helpbot DB
+
+    # Dialogue activity
+    DIALOGUE_ACTIVITY_FLUSH_MS = "dialogue_activity_flush_ms"  # Interval of batched activity writes
+    DIALOGUE_RESTORE_VERIFY = "dialogue_restore_verify"  # Check topics of restored dialogues in background
+    DIALOGUE_RESTORE_CONCURRENCY = "dialogue_restore_concurrency"  # Parallel topic checks on restore
+    DIALOGUE_TOPIC_POOL_SIZE = "dialogue_topic_pool_size"  # Free forum topics created ahead of time (0 - off, default)
+    DIALOGUE_TOPIC_POOL_RATE = "dialogue_topic_pool_rate"  # Pool topics created per minute
+    DIALOGUE_TOPIC_LAZY_RENAME = "dialogue_topic_lazy_rename"  # Rename pool topic in background on ticket take
+    DIALOGUE_TOPIC_RECYCLE = "dialogue_topic_recycle"  # Return closed topics to pool (they keep old history)
+
+    # Outgoing message queue (Telegram rate limits)
+    TELEGRAM_GLOBAL_RATE = "telegram_global_rate"  # Messages per second for the whole bot
+    TELEGRAM_CHAT_RATE = "telegram_chat_rate"  # Messages per second in one private chat
+    TELEGRAM_GROUP_RATE = "telegram_group_rate"  # Messages per minute in one group (all its threads)
+
+    # Cache configuration
+    USER_CACHE_TTL = "user_cache_ttl"  # Seconds to keep resolved users in memory
+    USER_CACHE_SIZE = "user_cache_size"  # Maximum number of cached users
 
     # Helpbot specific configuration
     TICKET_CATEGORIES = "ticket_categories"  # Available ticket categories
@@ -264,15 +309,52 @@ class Config:
                 "https://www.googleapis.com/auth/drive",
                 "https://www.googleapis.com/auth/spreadsheets"
             ] if os.getenv("GOOGLE_CREDENTIALS_JSON") else None,
+            cls.GOOGLE_SHEETS_QUOTA: os.getenv("GOOGLE_SHEETS_QUOTA", "60"),
+            cls.EXPORT_FULL_SYNC_INTERVAL: os.getenv("EXPORT_FULL_SYNC_INTERVAL", "3600"),
             cls.DATABASE_URL: os.getenv("HELPBOT_DATABASE_URL"),
             cls.MAINBOT_DATABASE_URL: os.getenv("MAINBOT_DATABASE_URL"),
             cls.MAINBOT_URL: os.getenv("MAINBOT_URL"),
+            cls.DB_ASYNC_MODE: os.getenv("DB_ASYNC_MODE", "").lower() == "true" if os.getenv("DB_ASYNC_MODE") else None,
+            cls.DB_EXECUTOR_WORKERS: os.getenv("DB_EXECUTOR_WORKERS", "4"),
+            cls.SQLITE_JOURNAL_MODE: os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+            cls.SQLITE_SYNCHRONOUS: os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+            cls.SQLITE_BUSY_TIMEOUT: os.getenv("SQLITE_BUSY_TIMEOUT", "5000"),
+            cls.SQLITE_CACHE_SIZE: os.getenv("SQLITE_CACHE_SIZE", "-16000"),
+            cls.SQLITE_MMAP_SIZE: os.getenv("SQLITE_MMAP_SIZE", "134217728"),
+            cls.SQLITE_POOL: os.getenv("SQLITE_POOL", "queue"),
             cls.GROUP_ID: os.getenv("HELPBOT_GROUP_ID"),
             cls.CLAUDE_API_KEY: os.getenv("CLAUDE_API_KEY"),
             cls.CLAUDE_MODEL: os.getenv("CLAUDE_MODEL", "claude-3-5-sonnet-20241022"),
             cls.CLAUDE_MAX_TOKENS: os.getenv("CLAUDE_MAX_TOKENS", "1000"),
             cls.CLAUDE_TIMEOUT: os.getenv("CLAUDE_TIMEOUT", "30"),
             cls.CLAUDE_RATE_LIMIT: os.getenv("CLAUDE_RATE_LIMIT", "10"),
+            cls.CLAUDE_REQUESTS_PER_MINUTE: os.getenv("CLAUDE_REQUESTS_PER_MINUTE", "50"),
+            cls.CLAUDE_TOKENS_PER_MINUTE: os.getenv("CLAUDE_TOKENS_PER_MINUTE", "40000"),
+            cls.CLAUDE_QUEUE_TIMEOUT: os.getenv("CLAUDE_QUEUE_TIMEOUT", "10"),
+            cls.CLAUDE_BREAKER_FAILURES: os.getenv("CLAUDE_BREAKER_FAILURES", "3"),
+            cls.CLAUDE_BREAKER_COOLDOWN: os.getenv("CLAUDE_BREAKER_COOLDOWN", "30"),
+            cls.CLAUDE_SLOW_CALL: os.getenv("CLAUDE_SLOW_CALL", "10"),
+            cls.CLAUDE_DELIVERY_TIMEOUT: os.getenv("CLAUDE_DELIVERY_TIMEOUT", "5"),
+            cls.CLAUDE_RETRY_WINDOW: os.getenv("CLAUDE_RETRY_WINDOW", "300"),
+            cls.DIALOGUE_DELIVER_FIRST: os.getenv("DIALOGUE_DELIVER_FIRST", "").lower() == "true" if os.getenv("DIALOGUE_DELIVER_FIRST") else None,
+            cls.CLAUDE_BASE_URL: os.getenv("CLAUDE_BASE_URL"),
+            cls.CLAUDE_STREAMING: os.getenv("CLAUDE_STREAMING", "").lower() == "true" if os.getenv("CLAUDE_STREAMING") else None,
+            cls.CLAUDE_STREAM_MIN_CHARS: os.getenv("CLAUDE_STREAM_MIN_CHARS", "300"),
+            cls.CLAUDE_STREAM_EDIT_INTERVAL: os.getenv("CLAUDE_STREAM_EDIT_INTERVAL", "3"),
+            cls.TRANSLATION_CACHE_SIZE: os.getenv("TRANSLATION_CACHE_SIZE", "2000"),
+            cls.TRANSLATION_CACHE_PERSIST: os.getenv("TRANSLATION_CACHE_PERSIST", "").lower() == "true" if os.getenv("TRANSLATION_CACHE_PERSIST") else None,
+            cls.DIALOGUE_ACTIVITY_FLUSH_MS: os.getenv("DIALOGUE_ACTIVITY_FLUSH_MS", "2000"),
+            cls.DIALOGUE_RESTORE_VERIFY: os.getenv("DIALOGUE_RESTORE_VERIFY", "").lower() == "true" if os.getenv("DIALOGUE_RESTORE_VERIFY") else None,
+            cls.DIALOGUE_RESTORE_CONCURRENCY: os.getenv("DIALOGUE_RESTORE_CONCURRENCY", "10"),
+            cls.DIALOGUE_TOPIC_POOL_SIZE: os.getenv("DIALOGUE_TOPIC_POOL_SIZE", "0"),
+            cls.DIALOGUE_TOPIC_POOL_RATE: os.getenv("DIALOGUE_TOPIC_POOL_RATE", "10"),
+            cls.DIALOGUE_TOPIC_LAZY_RENAME: os.getenv("DIALOGUE_TOPIC_LAZY_RENAME", "").lower() == "true" if os.getenv("DIALOGUE_TOPIC_LAZY_RENAME") else None,
+            cls.DIALOGUE_TOPIC_RECYCLE: os.getenv("DIALOGUE_TOPIC_RECYCLE", "").lower() == "true" if os.getenv("DIALOGUE_TOPIC_RECYCLE") else None,
+            cls.TELEGRAM_GLOBAL_RATE: os.getenv("TELEGRAM_GLOBAL_RATE", "30"),
+            cls.TELEGRAM_CHAT_RATE: os.getenv("TELEGRAM_CHAT_RATE", "1"),
+            cls.TELEGRAM_GROUP_RATE: os.getenv("TELEGRAM_GROUP_RATE", "20"),
+            cls.USER_CACHE_TTL: os.getenv("USER_CACHE_TTL", "60"),
+            cls.USER_CACHE_SIZE: os.getenv("USER_CACHE_SIZE", "5000"),
         }
 
         for key, value in env_vars.items():
@@ -2,13 +2,19 @@
 Database connection and session management module.
 Support for multiple database connections.
 """
+import asyncio
 import logging
 import threading
-from contextlib import contextmanager
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, asynccontextmanager
 from enum import Enum
+from typing import Any, Callable
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool, SingletonThreadPool, StaticPool, NullPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from models.base import Base
 from config import Config, ConfigurationError
 
@@ -25,6 +31,88 @@ _lock = threading.Lock()
 _ENGINES = {}
 _SESSION_FACTORIES = {}
 
+# Async database engines and session factories (DB_ASYNC_MODE)
+_ASYNC_ENGINES = {}
+_ASYNC_SESSION_FACTORIES = {}
+
+
+def _get_db_url(db_type: DatabaseType) -> str:
+    """
+    Get configured database URL for database type.
+
+    Raises:
+        ConfigurationError: If database URL is not configured
+    """
+    if db_type == DatabaseType.HELPBOT:
+        db_url = Config.get(Config.DATABASE_URL)
+        config_key = "DATABASE_URL"
+    elif db_type == DatabaseType.MAINBOT:
+        db_url = Config.get(Config.MAINBOT_DATABASE_URL)
+        config_key = "MAINBOT_DATABASE_URL"
+    else:
+        raise ValueError(f"Unknown database type: {db_type}")
+
+    if not db_url:
+        raise ConfigurationError(f"{config_key} is not set or empty")
+
+    return db_url
+
+
+# Pool classes available via SQLITE_POOL
+_SQLITE_POOLS = {
+    'queue': QueuePool,  # Default: connections shared between threads through a queue
+    'singleton': SingletonThreadPool,  # One connection per thread
+    'static': StaticPool,  # Single connection for the whole process
+    'null': NullPool,  # New connection for every checkout
+}
+
+
+def _get_sqlite_pragmas() -> list:
+    """Build list of PRAGMA statements from SQLite profile settings."""
+    return [
+        f"PRAGMA journal_mode={Config.get(Config.SQLITE_JOURNAL_MODE, 'WAL')}",
+        f"PRAGMA synchronous={Config.get(Config.SQLITE_SYNCHRONOUS, 'NORMAL')}",
+        f"PRAGMA busy_timeout={int(Config.get(Config.SQLITE_BUSY_TIMEOUT, '5000'))}",
+        f"PRAGMA cache_size={int(Config.get(Config.SQLITE_CACHE_SIZE, '-16000'))}",
+        f"PRAGMA mmap_size={int(Config.get(Config.SQLITE_MMAP_SIZE, '134217728'))}",
+    ]
+
+
+def _apply_sqlite_profile(engine) -> None:
+    """
+    Apply SQLite profile pragmas to every new connection of the engine.
+
+    Args:
+        engine: Sync engine (use AsyncEngine.sync_engine for async engines)
+    """
+    pragmas = _get_sqlite_pragmas()
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    logger.info(f"SQLite profile applied: {'; '.join(pragmas)}")
+
+
+def _get_sqlite_poolclass(async_engine: bool = False):
+    """Get pool class configured by SQLITE_POOL (None - engine default)."""
+    pool_name = str(Config.get(Config.SQLITE_POOL, 'queue')).lower()
+    if pool_name not in _SQLITE_POOLS:
+        logger.warning(f"Unknown SQLITE_POOL '{pool_name}', using default pool")
+        return None
+
+    # Async engines run on a single thread and need async-adapted queue pool
+    if async_engine and pool_name in ('queue', 'singleton'):
+        return None
+
+    return _SQLITE_POOLS[pool_name]
+
+
 def get_db_session(db_type: DatabaseType = DatabaseType.HELPBOT):
     """
     Create and return SQLAlchemy session factory and engine.
@@ -46,17 +134,7 @@ def get_db_session(db_type: DatabaseType = DatabaseType.HELPBOT):
         if db_type not in _ENGINES:
             try:
                 # Get appropriate database URL
-                if db_type == DatabaseType.HELPBOT:
-                    db_url = Config.get(Config.DATABASE_URL)
-                    config_key = "DATABASE_URL"
-                elif db_type == DatabaseType.MAINBOT:
-                    db_url = Config.get(Config.MAINBOT_DATABASE_URL)
-                    config_key = "MAINBOT_DATABASE_URL"
-                else:
-                    raise ValueError(f"Unknown database type: {db_type}")
-
-                if not db_url:
-                    raise ConfigurationError(f"{config_key} is not set or empty")
+                db_url = _get_db_url(db_type)
 
                 # SQLite compatibility for aiosqlite
                 if db_url.startswith('sqlite+aiosqlite'):
@@ -66,11 +144,21 @@ def get_db_session(db_type: DatabaseType = DatabaseType.HELPBOT):
                 if db_url.startswith('sqlite'):
                     # SQLite configuration (for HELPBOT)
                     connect_args = {"check_same_thread": False}
+                    engine_kwargs = {}
+                    poolclass = _get_sqlite_poolclass()
+                    if poolclass:
+                        engine_kwargs['poolclass'] = poolclass
+
                     _ENGINES[db_type] = create_engine(
                         db_url,
-                        connect_args=connect_args
+                        connect_args=connect_args,
+                        **engine_kwargs
+                    )
+                    _apply_sqlite_profile(_ENGINES[db_type])
+                    logger.info(
+                        f"SQLite engine initialized for {db_type.value} "
+                        f"with {type(_ENGINES[db_type].pool).__name__}"
                     )
-                    logger.info(f"SQLite engine initialized for {db_type.value}")
 
                 elif db_url.startswith('postgresql'):
                     # PostgreSQL configuration (for MAINBOT)
@@ -143,6 +231,278 @@ def get_mainbot_session():
         yield session
 
 
+def is_async_db_enabled() -> bool:
+    """Check if hot paths should use async engines (DB_ASYNC_MODE)."""
+    return bool(Config.get(Config.DB_ASYNC_MODE, False))
+
+
+def _to_async_url(db_url: str) -> str:
+    """Convert sync database URL to its async driver counterpart."""
+    scheme, sep, rest = db_url.partition('://')
+    base = scheme.split('+')[0]
+
+    if base == 'sqlite':
+        return f"sqlite+aiosqlite{sep}{rest}"
+    if base in ('postgresql', 'postgres'):
+        return f"postgresql+asyncpg{sep}{rest}"
+
+    return db_url
+
+
+def get_async_db_session(db_type: DatabaseType = DatabaseType.HELPBOT):
+    """
+    Create and return async session factory and engine.
+    Uses aiosqlite for SQLite and asyncpg for PostgreSQL.
+
+    Args:
+        db_type: Which database to connect to
+
+    Returns:
+        Tuple of async session factory and async engine
+
+    Raises:
+        ConfigurationError: If database URL is not configured
+    """
+    global _ASYNC_ENGINES, _ASYNC_SESSION_FACTORIES
+
+    with _lock:
+        if db_type not in _ASYNC_ENGINES:
+            try:
+                db_url = _to_async_url(_get_db_url(db_type))
+
+                if db_url.startswith('sqlite'):
+                    engine_kwargs = {}
+                    poolclass = _get_sqlite_poolclass(async_engine=True)
+                    if poolclass:
+                        engine_kwargs['poolclass'] = poolclass
+
+                    _ASYNC_ENGINES[db_type] = create_async_engine(db_url, **engine_kwargs)
+                    _apply_sqlite_profile(_ASYNC_ENGINES[db_type].sync_engine)
+                    logger.info(f"Async SQLite engine initialized for {db_type.value}")
+
+                elif db_url.startswith('postgresql'):
+                    _ASYNC_ENGINES[db_type] = create_async_engine(
+                        db_url,
+                        pool_size=5,
+                        max_overflow=10,
+                        pool_pre_ping=True,
+                        pool_recycle=3600
+                    )
+                    logger.info(f"Async PostgreSQL engine initialized for {db_type.value}")
+
+                else:
+                    _ASYNC_ENGINES[db_type] = create_async_engine(db_url)
+                    logger.warning(f"Generic async engine initialized for {db_type.value} - no specific optimizations")
+
+                # Objects are used after commit outside of the session - don't expire them
+                _ASYNC_SESSION_FACTORIES[db_type] = async_sessionmaker(
+                    bind=_ASYNC_ENGINES[db_type],
+                    expire_on_commit=False
+                )
+                logger.info(f"Async database session factory created for {db_type.value}")
+
+            except ConfigurationError as e:
+                logger.critical(f"Async database configuration error for {db_type.value}: {e}")
+                raise
+
+    return _ASYNC_SESSION_FACTORIES[db_type], _ASYNC_ENGINES[db_type]
+
+
+@asynccontextmanager
+async def get_async_db_session_ctx(db_type: DatabaseType = DatabaseType.HELPBOT):
+    """
+    Async context manager for database sessions with automatic commit/rollback.
+
+    Args:
+        db_type: Which database to connect to
+
+    Yields:
+        SQLAlchemy AsyncSession object
+    """
+    session_factory, _ = get_async_db_session(db_type)
+    session = session_factory()
+
+    try:
+        yield session
+        # Only commit for helpbot database (read-write)
+        if db_type == DatabaseType.HELPBOT:
+            await session.commit()
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Async database session error in {db_type.value}: {e}")
+        raise
+    finally:
+        await session.close()
+
+
+@asynccontextmanager
+async def get_async_helpbot_session():
+    """Get async helpbot database session (read-write)"""
+    async with get_async_db_session_ctx(DatabaseType.HELPBOT) as session:
+        yield session
+
+
+@asynccontextmanager
+async def get_async_mainbot_session():
+    """Get async mainbot database session (read-only)"""
+    async with get_async_db_session_ctx(DatabaseType.MAINBOT) as session:
+        yield session
+
+
+async def run_db_session(work: Callable[[Session], Any], db_type: DatabaseType = DatabaseType.HELPBOT) -> Any:
+    """
+    Run unit of session work on the engine selected by DB_ASYNC_MODE.
+
+    In async mode the work runs via AsyncSession.run_sync, so the same ORM code
+    is executed over aiosqlite/asyncpg without blocking the event loop.
+    Otherwise it runs in a regular sync session as before.
+
+    Args:
+        work: Function taking a sync Session and returning result
+        db_type: Which database to connect to
+
+    Returns:
+        Result of work
+    """
+    if is_async_db_enabled():
+        async with get_async_db_session_ctx(db_type) as session:
+            return await session.run_sync(work)
+
+    with get_db_session_ctx(db_type) as session:
+        return work(session)
+
+
+class DBExecutor:
+    """
+    Bounded thread pool for legacy synchronous session work of one database.
+    Tracks queue depth and wait time so the pool can be sized.
+    """
+
+    def __init__(self, db_type: DatabaseType, max_workers: int):
+        self.db_type = db_type
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=f"db-{db_type.value}"
+        )
+        self._stats_lock = threading.Lock()
+
+        # Metrics
+        self.queued = 0  # Submitted, waiting for a free worker
+        self.active = 0  # Running right now
+        self.completed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+
+    def _run(self, work: Callable[[Session], Any], submitted_at: float) -> Any:
+        started_at = time.monotonic()
+        wait = started_at - submitted_at
+
+        with self._stats_lock:
+            self.queued -= 1
+            self.active += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+        if wait > 1.0:
+            logger.warning(
+                f"[DB_EXECUTOR] {self.db_type.value} work waited {wait:.2f}s for a worker "
+                f"(active={self.active}, queued={self.queued})"
+            )
+
+        failed = False
+        try:
+            with get_db_session_ctx(self.db_type) as session:
+                return work(session)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            with self._stats_lock:
+                self.active -= 1
+                self.completed += 1
+                if failed:
+                    self.failed += 1
+                self.total_run += time.monotonic() - started_at
+
+    async def run(self, work: Callable[[Session], Any]) -> Any:
+        with self._stats_lock:
+            self.queued += 1
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._run, work, time.monotonic())
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                'max_workers': self.max_workers,
+                'active': self.active,
+                'queued': self.queued,
+                'saturation': self.active / self.max_workers,
+                'completed': self.completed,
+                'failed': self.failed,
+                'avg_wait_ms': self.total_wait / self.completed * 1000 if self.completed else 0.0,
+                'max_wait_ms': self.max_wait * 1000,
+                'avg_run_ms': self.total_run / self.completed * 1000 if self.completed else 0.0
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_DB_EXECUTORS = {}
+
+
+def _get_db_executor(db_type: DatabaseType) -> DBExecutor:
+    with _lock:
+        if db_type not in _DB_EXECUTORS:
+            max_workers = int(Config.get(Config.DB_EXECUTOR_WORKERS, "4"))
+            _DB_EXECUTORS[db_type] = DBExecutor(db_type, max_workers)
+            logger.info(f"DB executor created for {db_type.value} with {max_workers} workers")
+    return _DB_EXECUTORS[db_type]
+
+
+async def run_in_db_executor(work: Callable[[Session], Any],
+                             db_type: DatabaseType = DatabaseType.HELPBOT) -> Any:
+    """
+    Run synchronous session work in the dedicated thread pool of the database.
+
+    The work gets its own session (committed for helpbot) and runs off the event loop,
+    so heavy reads don't freeze message routing.
+
+    Args:
+        work: Function taking a Session and returning result
+        db_type: Which database to connect to
+
+    Returns:
+        Result of work
+    """
+    return await _get_db_executor(db_type).run(work)
+
+
+def get_db_executor_stats() -> dict:
+    """Get pool saturation metrics of DB executors, keyed by database type."""
+    return {db_type.value: executor.get_stats() for db_type, executor in _DB_EXECUTORS.items()}
+
+
+def shutdown_db_executors():
+    """Stop DB executor threads."""
+    for executor in _DB_EXECUTORS.values():
+        executor.shutdown()
+    _DB_EXECUTORS.clear()
+
+
+async def dispose_async_engines():
+    """Close all async engine connection pools."""
+    for db_type, engine in list(_ASYNC_ENGINES.items()):
+        await engine.dispose()
+        logger.info(f"Async engine disposed for {db_type.value}")
+    _ASYNC_ENGINES.clear()
+    _ASYNC_SESSION_FACTORIES.clear()
+
+
 def init_tables(engine=None):
     """
     Initialize database tables.
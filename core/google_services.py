@@ -4,17 +4,26 @@ Provides asynchronous interface for Google Sheets.
 """
 import logging
 import asyncio
-from typing import Tuple, List, Dict, Any
+from typing import Tuple, List, Dict, Any, Optional
 
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 import gspread
 from config import Config
+from core.utils import TokenBucket
 
 logger = logging.getLogger(__name__)
 
 THREAD_SEMAPHORE = asyncio.Semaphore(10)
 
+# Process-wide client, created lazily on first use
+_shared_client: Optional['AsyncGspreadClient'] = None
+_shared_client_lock = asyncio.Lock()
+
+# Sheets API quota shared by all callers in the process, created lazily from config
+_sheets_quota: Optional[TokenBucket] = None
+SHEETS_QUOTA_BURST = 10
+
 
 class AsyncGspreadClient:
     """Asynchronous wrapper around gspread."""
@@ -77,7 +86,7 @@ class AsyncGspreadClient:
             return self._spreadsheet_cache[key]
 
         try:
-            spreadsheet = await to_thread_with_limit(self.client.open_by_key, key)
+            spreadsheet = await sheets_api_call(self.client.open_by_key, key)
             async_spreadsheet = AsyncSpreadsheet(spreadsheet)
             # Save to cache
             self._spreadsheet_cache[key] = async_spreadsheet
@@ -115,7 +124,7 @@ class AsyncSpreadsheet:
             return self._worksheet_cache[title]
 
         try:
-            worksheet = await to_thread_with_limit(self.spreadsheet.worksheet, title)
+            worksheet = await sheets_api_call(self.spreadsheet.worksheet, title)
             async_worksheet = AsyncWorksheet(worksheet)
             # Save to cache
             self._worksheet_cache[title] = async_worksheet
@@ -132,7 +141,7 @@ class AsyncSpreadsheet:
             List[AsyncWorksheet]: List of asynchronous wrappers for worksheets
         """
         try:
-            worksheets = await to_thread_with_limit(self.spreadsheet.worksheets)
+            worksheets = await sheets_api_call(self.spreadsheet.worksheets)
             async_worksheets = []
 
             for worksheet in worksheets:
@@ -168,7 +177,7 @@ class AsyncWorksheet:
             List[Dict[str, Any]]: List of dictionaries with data
         """
         try:
-            return await to_thread_with_limit(self.worksheet.get_all_records)
+            return await sheets_api_call(self.worksheet.get_all_records)
         except Exception as e:
             logger.error(f"Error getting records from worksheet {self.title}: {e}")
             raise
@@ -184,7 +193,7 @@ class AsyncWorksheet:
             List[str]: List of values
         """
         try:
-            return await to_thread_with_limit(self.worksheet.row_values, row)
+            return await sheets_api_call(self.worksheet.row_values, row)
         except Exception as e:
             logger.error(f"Error getting row values from worksheet {self.title}: {e}")
             raise
@@ -199,7 +208,7 @@ class AsyncWorksheet:
             value: New value
         """
         try:
-            await to_thread_with_limit(self.worksheet.update_cell, row, col, value)
+            await sheets_api_call(self.worksheet.update_cell, row, col, value)
         except Exception as e:
             logger.error(f"Error updating cell ({row}, {col}) in worksheet {self.title}: {e}")
             raise
@@ -213,34 +222,95 @@ class AsyncWorksheet:
             values: Values to update
         """
         try:
-            await to_thread_with_limit(self.worksheet.update, range_name, values)
+            await sheets_api_call(self.worksheet.update, range_name, values)
         except Exception as e:
             logger.error(f"Error updating range {range_name} in worksheet {self.title}: {e}")
             raise
 
-    async def append_rows(self, values: List[List[Any]]) -> None:
+    async def append_rows(self, values: List[List[Any]]) -> Dict[str, Any]:
         """
         Append rows to worksheet.
 
         Args:
             values: Values to append
+
+        Returns:
+            Dict[str, Any]: API response, 'updates.updatedRange' holds the written range
         """
         try:
-            await to_thread_with_limit(self.worksheet.append_rows, values)
+            return await sheets_api_call(self.worksheet.append_rows, values)
         except Exception as e:
             logger.error(f"Error appending rows to worksheet {self.title}: {e}")
             raise
 
+    async def batch_update(self, data: List[Dict[str, Any]]) -> None:
+        """
+        Update several ranges in one API request.
+
+        Args:
+            data: List of {'range': A1 notation, 'values': values} dicts
+        """
+        if not data:
+            return
+
+        try:
+            await sheets_api_call(self.worksheet.batch_update, data)
+        except Exception as e:
+            logger.error(f"Error batch updating {len(data)} ranges in worksheet {self.title}: {e}")
+            raise
+
 
 async def get_google_services() -> Tuple[AsyncGspreadClient, Any]:
     """
     Get asynchronous clients for Google services.
+    Client is created once per process and shared, together with its HTTP session
+    and spreadsheet cache. Access token is refreshed by the authorized session
+    when it expires, so there is no need to re-authenticate.
 
     Returns:
         Tuple[AsyncGspreadClient, Any]: Asynchronous gspread client and Drive service
     """
-    client = await AsyncGspreadClient.create()
-    return client, client.drive_service
+    global _shared_client
+
+    if _shared_client is None:
+        async with _shared_client_lock:
+            if _shared_client is None:
+                _shared_client = await AsyncGspreadClient.create()
+                logger.info("Google services client created")
+
+    return _shared_client, _shared_client.drive_service
+
+
+def reset_google_services() -> None:
+    """Drop shared client - next get_google_services() call will authenticate again."""
+    global _shared_client
+    _shared_client = None
+    logger.info("Google services client reset")
+
+
+def get_sheets_quota() -> TokenBucket:
+    """
+    Get process-wide Sheets API quota limiter.
+
+    Bucket allows a burst of SHEETS_QUOTA_BURST requests and refills so that
+    burst plus refill never exceed GOOGLE_SHEETS_QUOTA requests in any minute.
+    """
+    global _sheets_quota
+
+    if _sheets_quota is None:
+        per_minute = max(2, int(Config.get(Config.GOOGLE_SHEETS_QUOTA, "60")))
+        burst = max(1, min(SHEETS_QUOTA_BURST, per_minute // 2))
+        _sheets_quota = TokenBucket(rate=(per_minute - burst) / 60, capacity=burst)
+
+    return _sheets_quota
+
+
+async def sheets_api_call(func, *args, **kwargs):
+    """Run Sheets API call in a thread once the per-minute quota allows it."""
+    waited = await get_sheets_quota().acquire()
+    if waited > 1:
+        logger.debug(f"[SHEETS_QUOTA] Waited {waited:.1f}s for {getattr(func, '__name__', func)}")
+    return await to_thread_with_limit(func, *args, **kwargs)
 
 
 async def to_thread_with_limit(func, *args, **kwargs):
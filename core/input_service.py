@@ -3,14 +3,14 @@ Simplified input service for message routing.
 """
 import logging
 import asyncio
-from typing import Dict, Any, Optional, List, Callable
+from typing import Dict, Any, Optional, List, Callable, Tuple, Union
 
 from aiogram import Dispatcher, Router
 from aiogram.types import Message
 from aiogram.filters import Filter
 
 from models.user import User
-from core.db import get_db_session_ctx
+from core.db import run_db_session
 
 logger = logging.getLogger(__name__)
 
@@ -43,7 +43,14 @@ class SimpleFilter(Filter):
 
 
 class InputService:
-    """Simplified input service for message routing."""
+    """
+    Simplified input service for message routing.
+
+    Instead of registering one aiogram handler per dialogue endpoint, a single
+    dispatcher handler is registered in the router. Incoming messages are resolved
+    through hash maps keyed by user_id and (group_id, thread_id), so routing cost
+    does not depend on the number of open dialogues.
+    """
 
     def __init__(self, dp: Dispatcher):
         """
@@ -58,133 +65,162 @@ class InputService:
         self.handlers = {}  # handler_id -> handler info
         self._handler_counter = 0  # For unique handler IDs
 
-        logger.info(f"[INPUT_SERVICE] Initialized with router: {self.router.name}")
+        # Dispatch tables
+        self._user_routes: Dict[int, Dict[str, Dict[str, Any]]] = {}  # user_id -> handler_id -> handler info
+        self._thread_routes: Dict[Tuple[int, int], Dict[str, Any]] = {}  # (group_id, thread_id) -> handler info
+        self._route_count = 0  # Endpoints in both tables, kept current on every change
 
-    async def register_user_handler(self, user_id: int, handler: Callable,
-                                    state: str = None, message_types: List[str] = None):
-        """
-        Register handler for specific user.
+        # Registry of active dialogues (set by DialogueService) - answers routing checks without DB
+        self.dialogue_registry = None
 
-        Args:
-            user_id: User Telegram ID
-            handler: Async function to handle messages
-            state: Optional FSM state filter
-            message_types: List of message types to handle ['text', 'photo', 'video', 'document', 'voice', 'audio']
-                          If None - handle all types
-        """
-        handler_id = f"user_{user_id}_{state or 'any'}"
-        self._handler_counter += 1
-        handler_unique_id = f"{handler_id}_{self._handler_counter}"
+        # Single dispatcher handler for all registered endpoints
+        self.router.message.register(self._dispatch_message, SimpleFilter(self._resolve_route))
 
-        # Count current handlers in router
-        current_handler_count = len(self.router.message.handlers)
+        logger.info(f"[INPUT_SERVICE] Initialized with router: {self.router.name}")
 
-        logger.info(
-            f"[REGISTER_USER] Starting registration: "
-            f"handler_id='{handler_id}', unique_id='{handler_unique_id}', "
-            f"user_id={user_id}, state='{state}', types={message_types}. "
-            f"Router currently has {current_handler_count} handlers"
-        )
+    def set_dialogue_registry(self, registry):
+        """Set registry of active dialogues used for routing checks."""
+        self.dialogue_registry = registry
 
-        # Check and remove old handler if exists
-        if handler_id in self.handlers:
-            logger.warning(
-                f"[REGISTER_USER] ⚠️ Handler '{handler_id}' already exists! "
-                f"Removing old handler before registering new one."
-            )
-            await self.unregister_user_handler(user_id, state)
+    # === Dispatching ===
+
+    async def _resolve_route(self, message: Message) -> Union[Dict[str, Any], bool]:
+        """
+        Find handler registered for the message endpoint.
 
-        def user_filter(message: Message) -> bool:
+        Args:
+            message: Incoming message
 
-            if message.from_user and message.from_user.is_bot:
-                logger.debug(
-                    f"[USER_FILTER] Filter for {handler_id}: "
-                    f"Ignoring bot message from {message.from_user.id}"
-                )
-                return False
+        Returns:
+            Dict with 'input_route' handler info if a handler matches, False otherwise
+        """
+        if message.from_user and message.from_user.is_bot:
+            return False
 
-            # Check if message is from the right user
-            if not message.from_user or message.from_user.id != user_id:
+        # Thread endpoints have priority - operator messages in dialogue topics
+        thread_id = getattr(message, 'message_thread_id', None)
+        if thread_id is not None:
+            handler_info = self._thread_routes.get((message.chat.id, thread_id))
+            if handler_info and self._matches_message_types(message, handler_info['message_types']):
                 logger.debug(
-                    f"[USER_FILTER] Filter for {handler_id}: "
-                    f"Wrong user (expected {user_id}, got {message.from_user.id if message.from_user else None})"
+                    f"[DISPATCH] Message in thread {message.chat.id}/{thread_id} "
+                    f"matched handler '{handler_info['handler_id']}'"
                 )
-                return False
+                return {'input_route': handler_info}
 
-            # SKIP ADMIN COMMANDS - они имеют приоритет!
-            if message.text and message.text.startswith('&'):
-                logger.debug(f"[USER_FILTER] Filter for {handler_id}: Skipping admin command")
-                return False
+        if not message.from_user:
+            return False
 
-            # Check message type if specified
-            if message_types:
-                has_type = any(getattr(message, msg_type, None) is not None for msg_type in message_types)
-                if not has_type:
-                    logger.debug(f"[USER_FILTER] Filter for {handler_id}: Message type not in {message_types}")
-                    return False
+        user_id = message.from_user.id
+        user_routes = self._user_routes.get(user_id)
+        if not user_routes:
+            return False
+
+        # SKIP ADMIN COMMANDS - они имеют приоритет!
+        if message.text and message.text.startswith('&'):
+            logger.debug(f"[DISPATCH] Skipping admin command from user {user_id}")
+            return False
+
+        user_fsm_state = None
+        state_loaded = False
 
-            # Check state if needed
+        for handler_info in user_routes.values():
+            if not self._matches_message_types(message, handler_info['message_types']):
+                continue
+
+            state = handler_info['state']
             if state:
-                with get_db_session_ctx() as session:
-                    user = session.query(User).filter_by(telegramID=user_id).first()
-                    if not user:
-                        logger.debug(f"[USER_FILTER] Filter for {handler_id}: User not found in DB")
-                        return False
-
-                    user_fsm_state = user.get_fsm_state()
-                    if user_fsm_state != state:
-                        logger.debug(
-                            f"[USER_FILTER] Filter for {handler_id}: "
-                            f"State mismatch (expected '{state}', got '{user_fsm_state}')"
-                        )
-                        return False
+                if not state_loaded:
+                    user_fsm_state = await self._get_user_fsm_state(user_id)
+                    state_loaded = True
+
+                if user_fsm_state != state:
+                    logger.debug(
+                        f"[DISPATCH] Handler '{handler_info['handler_id']}': "
+                        f"State mismatch (expected '{state}', got '{user_fsm_state}')"
+                    )
+                    continue
 
-            logger.info(
-                f"[USER_FILTER] Filter for {handler_id} PASSED: "
-                f"message from user {user_id} accepted"
+            logger.debug(
+                f"[DISPATCH] Message from user {user_id} matched handler '{handler_info['handler_id']}'"
             )
+            return {'input_route': handler_info}
+
+        return False
+
+    async def _dispatch_message(self, message: Message, input_route: Dict[str, Any]):
+        """
+        Pass message to the handler resolved by _resolve_route.
+
+        Args:
+            message: Incoming message
+            input_route: Handler info from dispatch table
+        """
+        await input_route['handler_func'](message)
+
+    @staticmethod
+    def _matches_message_types(message: Message, message_types: Optional[List[str]]) -> bool:
+        """Check message type if specified."""
+        if not message_types:
             return True
+        return any(getattr(message, msg_type, None) is not None for msg_type in message_types)
+
+    async def _get_user_fsm_state(self, user_id: int) -> Optional[str]:
+        """
+        Get current FSM state of user.
+
+        Client of an active dialogue is in 'has_ticket' - answered from the dialogue
+        registry; other users are looked up in DB.
+        """
+        if self.dialogue_registry is not None and self.dialogue_registry.get_by_client(user_id):
+            return "has_ticket"
+
+        def load_state(session):
+            user = session.query(User).filter_by(telegramID=user_id).first()
+            if not user:
+                logger.debug(f"[DISPATCH] User {user_id} not found in DB")
+                return None
+            return user.get_fsm_state()
+
+        return await run_db_session(load_state)
+
+    def _remove_user_route(self, user_id: int, handler_id: str) -> bool:
+        """Remove handler from user dispatch table."""
+        user_routes = self._user_routes.get(user_id)
+        if not user_routes or handler_id not in user_routes:
+            return False
+
+        del user_routes[handler_id]
+        self._route_count -= 1
+        if not user_routes:
+            del self._user_routes[user_id]
+        return True
 
+    @property
+    def total_routes(self) -> int:
+        """Total number of endpoints in dispatch tables."""
+        return self._route_count
+
+    # === Route construction ===
+
+    def _make_user_route(self, handler_id: str, handler_unique_id: str, user_id: int,
+                         handler: Callable, state: Optional[str],
+                         message_types: Optional[List[str]]) -> Dict[str, Any]:
+        """Build dispatch table entry for a user endpoint."""
         async def user_message_handler(message: Message):
             logger.info(
                 f"[USER_HANDLER] Handler {handler_unique_id} triggered for user {user_id}: "
                 f"{message.text[:50] if message.text else '[Media]'}"
             )
 
-            # Log handler closure details
-            logger.debug(
-                f"[USER_HANDLER] Handler details: "
-                f"handler_func={handler}, "
-                f"handler_id_in_closure='{handler_id}'"
-            )
-
             try:
                 await handler(message)
                 logger.debug(f"[USER_HANDLER] Handler {handler_unique_id} completed successfully")
             except Exception as e:
                 logger.error(f"[USER_HANDLER] Error in handler {handler_unique_id} for user {user_id}: {e}", exc_info=True)
 
-        # Create filter object
-        filter_obj = SimpleFilter(user_filter)
-
-        # Register handler using router's register method
-        # This returns the HandlerObject that was created
-        self.router.message.register(user_message_handler, filter_obj)
-
-        # Get the handler that was just added (it's the last one)
-        new_handler_count = len(self.router.message.handlers)
-        if new_handler_count > current_handler_count:
-            # Handler was added, it's the last one in the list
-            handler_obj = self.router.message.handlers[-1]
-        else:
-            # Something went wrong
-            logger.error(f"[REGISTER_USER] Failed to register handler!")
-            handler_obj = None
-
-        # Store handler info for later removal
-        self.handlers[handler_id] = {
-            'handler_object': handler_obj,  # The actual handler in the router
-            'filter_object': filter_obj,
+        return {
+            'handler_id': handler_id,
             'handler_func': user_message_handler,
             'original_handler': handler,
             'unique_id': handler_unique_id,
@@ -194,16 +230,116 @@ class InputService:
             'registered_at': asyncio.get_event_loop().time()
         }
 
+    def _make_thread_route(self, handler_id: str, handler_unique_id: str, group_id: int,
+                           thread_id: int, handler: Callable,
+                           message_types: Optional[List[str]]) -> Dict[str, Any]:
+        """Build dispatch table entry for a forum thread endpoint."""
+        async def thread_message_handler(message: Message):
+            logger.info(
+                f"[THREAD_HANDLER] Handler {handler_unique_id} triggered in thread {group_id}/{thread_id}"
+            )
+            logger.info(
+                f"[THREAD_HANDLER] From user {message.from_user.id if message.from_user else 'None'}: "
+                f"{message.text[:50] if message.text else '[Media]'}"
+            )
+            logger.debug(
+                f"[THREAD_HANDLER] Has photo: {bool(message.photo)}, "
+                f"video: {bool(message.video)}, document: {bool(message.document)}"
+            )
+
+            # Additional check for active dialogue - registry first, DB if it doesn't know the thread
+            dialogue_id = None
+            if self.dialogue_registry is not None:
+                record = self.dialogue_registry.get_by_thread(group_id, thread_id)
+                dialogue_id = record.dialogue_id if record else None
+
+            if not dialogue_id:
+                from models.dialogue import Dialogue
+
+                def find_active_dialogue_id(session):
+                    dialogue = session.query(Dialogue).filter_by(
+                        groupID=group_id,
+                        threadID=thread_id,
+                        status='active'
+                    ).first()
+                    return dialogue.dialogueID if dialogue else None
+
+                dialogue_id = await run_db_session(find_active_dialogue_id)
+
+            if not dialogue_id:
+                logger.warning(
+                    f"[THREAD_HANDLER] Handler called for closed/missing dialogue in {group_id}/{thread_id}"
+                )
+                return
+
+            logger.debug(
+                f"[THREAD_HANDLER] Found active dialogue: {dialogue_id}"
+            )
+
+            try:
+                await handler(message)
+                logger.debug(f"[THREAD_HANDLER] Handler {handler_unique_id} completed successfully")
+            except Exception as e:
+                logger.error(f"[THREAD_HANDLER] Error in handler {handler_unique_id} for {group_id}/{thread_id}: {e}", exc_info=True)
+
+        return {
+            'handler_id': handler_id,
+            'handler_func': thread_message_handler,
+            'original_handler': handler,
+            'unique_id': handler_unique_id,
+            'group_id': group_id,
+            'thread_id': thread_id,
+            'message_types': message_types,
+            'registered_at': asyncio.get_event_loop().time()
+        }
+
+    # === Registration ===
+
+    async def register_user_handler(self, user_id: int, handler: Callable,
+                                    state: str = None, message_types: List[str] = None):
+        """
+        Register handler for specific user.
+
+        Args:
+            user_id: User Telegram ID
+            handler: Async function to handle messages
+            state: Optional FSM state filter
+            message_types: List of message types to handle ['text', 'photo', 'video', 'document', 'voice', 'audio']
+                          If None - handle all types
+        """
+        handler_id = f"user_{user_id}_{state or 'any'}"
+        self._handler_counter += 1
+        handler_unique_id = f"{handler_id}_{self._handler_counter}"
+
         logger.info(
-            f"[REGISTER_USER] ✅ Registered handler '{handler_id}' (unique: {handler_unique_id}). "
-            f"Total handlers in dict: {len(self.handlers)}. "
-            f"Total handlers in Router: {len(self.router.message.handlers)}"
+            f"[REGISTER_USER] Starting registration: "
+            f"handler_id='{handler_id}', unique_id='{handler_unique_id}', "
+            f"user_id={user_id}, state='{state}', types={message_types}. "
+            f"Dispatch table currently has {self.total_routes} routes"
         )
 
-        # Log all current handlers
-        logger.debug(
-            f"[REGISTER_USER] Current handlers in dict: "
-            f"{list(self.handlers.keys())}"
+        # Check and remove old handler if exists
+        if handler_id in self.handlers:
+            logger.warning(
+                f"[REGISTER_USER] ⚠️ Handler '{handler_id}' already exists! "
+                f"Removing old handler before registering new one."
+            )
+            await self.unregister_user_handler(user_id, state)
+
+        handler_info = self._make_user_route(handler_id, handler_unique_id, user_id, handler,
+                                             state, message_types)
+
+        # Store handler info and add to dispatch table
+        self.handlers[handler_id] = handler_info
+        user_routes = self._user_routes.setdefault(user_id, {})
+        if handler_id not in user_routes:
+            self._route_count += 1
+        user_routes[handler_id] = handler_info
+
+        logger.info(
+            f"[REGISTER_USER] ✅ Registered handler '{handler_id}' (unique: {handler_unique_id}). "
+            f"Total handlers in dict: {len(self.handlers)}. "
+            f"Total routes in dispatch table: {self.total_routes}"
         )
 
     async def register_thread_handler(self, group_id: int, thread_id: int, handler: Callable,
@@ -221,14 +357,11 @@ class InputService:
         self._handler_counter += 1
         handler_unique_id = f"{handler_id}_{self._handler_counter}"
 
-        # Count current handlers in router
-        current_handler_count = len(self.router.message.handlers)
-
         logger.info(
             f"[REGISTER_THREAD] Starting registration: "
             f"handler_id='{handler_id}', unique_id='{handler_unique_id}', "
             f"group={group_id}, thread={thread_id}, types={message_types}. "
-            f"Router currently has {current_handler_count} handlers"
+            f"Dispatch table currently has {self.total_routes} routes"
         )
 
         # Check and remove old handler if exists
@@ -239,121 +372,70 @@ class InputService:
             )
             await self.unregister_thread_handler(group_id, thread_id)
 
-        def thread_filter(message: Message) -> bool:
-            # Ignore bot's own messages
-            if message.from_user and message.from_user.is_bot:
-                logger.debug(
-                    f"[THREAD_FILTER] Filter for {handler_id}: "
-                    f"Ignoring bot message from {message.from_user.id}"
-                )
-                return False
-
-            # Check if message is in the right group
-            if message.chat.id != group_id:
-                logger.debug(
-                    f"[THREAD_FILTER] Filter for {handler_id}: "
-                    f"Wrong group (expected {group_id}, got {message.chat.id})"
-                )
-                return False
-
-            # Check if message has thread_id
-            if not hasattr(message, 'message_thread_id'):
-                logger.debug(f"[THREAD_FILTER] Filter for {handler_id}: No message_thread_id attribute")
-                return False
-
-            # Check if it's the right thread
-            if message.message_thread_id != thread_id:
-                logger.debug(
-                    f"[THREAD_FILTER] Filter for {handler_id}: "
-                    f"Wrong thread (expected {thread_id}, got {message.message_thread_id})"
-                )
-                return False
+        handler_info = self._make_thread_route(handler_id, handler_unique_id, group_id, thread_id,
+                                               handler, message_types)
 
-            # Check message type if specified
-            if message_types:
-                has_type = any(getattr(message, msg_type, None) is not None for msg_type in message_types)
-                if not has_type:
-                    logger.debug(f"[THREAD_FILTER] Filter for {handler_id}: Message type not in {message_types}")
-                    return False
+        # Store handler info and add to dispatch table
+        self.handlers[handler_id] = handler_info
+        if (group_id, thread_id) not in self._thread_routes:
+            self._route_count += 1
+        self._thread_routes[(group_id, thread_id)] = handler_info
 
-            logger.info(
-                f"[THREAD_FILTER] Filter for {handler_id} PASSED: "
-                f"message in thread {group_id}/{thread_id} accepted"
-            )
-            return True
-
-        async def thread_message_handler(message: Message):
-            logger.info(
-                f"[THREAD_HANDLER] Handler {handler_unique_id} triggered in thread {group_id}/{thread_id}"
-            )
-            logger.info(
-                f"[THREAD_HANDLER] From user {message.from_user.id if message.from_user else 'None'}: "
-                f"{message.text[:50] if message.text else '[Media]'}"
-            )
-            logger.debug(
-                f"[THREAD_HANDLER] Has photo: {bool(message.photo)}, "
-                f"video: {bool(message.video)}, document: {bool(message.document)}"
-            )
+        logger.info(
+            f"[REGISTER_THREAD] ✅ Registered handler '{handler_id}' (unique: {handler_unique_id}). "
+            f"Total handlers in dict: {len(self.handlers)}. "
+            f"Total routes in dispatch table: {self.total_routes}"
+        )
 
-            # Additional check for active dialogue
-            from models.dialogue import Dialogue
-            with get_db_session_ctx() as session:
-                dialogue = session.query(Dialogue).filter_by(
-                    groupID=group_id,
-                    threadID=thread_id,
-                    status='active'
-                ).first()
-
-                if not dialogue:
-                    logger.warning(
-                        f"[THREAD_HANDLER] Handler called for closed/missing dialogue in {group_id}/{thread_id}"
-                    )
-                    return
+    def register_dialogue_routes(self, routes: List[Tuple[int, Callable, int, int, Callable]],
+                                 client_state: str = None) -> int:
+        """
+        Register client and operator endpoints of many dialogues in one pass.
 
-                logger.debug(
-                    f"[THREAD_HANDLER] Found active dialogue: {dialogue.dialogueID}"
-                )
+        Used at startup for restored dialogues: dispatch tables are filled directly
+        and the result is logged once. Previous handlers of the clients are replaced,
+        as with cleanup_user_handlers before register_user_handler.
 
-            try:
-                await handler(message)
-                logger.debug(f"[THREAD_HANDLER] Handler {handler_unique_id} completed successfully")
-            except Exception as e:
-                logger.error(f"[THREAD_HANDLER] Error in handler {handler_unique_id} for {group_id}/{thread_id}: {e}", exc_info=True)
-
-        # Create filter object
-        filter_obj = SimpleFilter(thread_filter)
+        Args:
+            routes: Tuples of (client telegram ID, client handler, group ID, thread ID, operator handler)
+            client_state: FSM state filter of client endpoints
 
-        # Register handler using router's register method
-        self.router.message.register(thread_message_handler, filter_obj)
+        Returns:
+            Number of dialogues registered
+        """
+        for client_id, client_handler, group_id, thread_id, operator_handler in routes:
+            old_routes = self._user_routes.pop(client_id, None)
+            if old_routes:
+                self._route_count -= len(old_routes)
+                for old_handler_id in old_routes:
+                    self.handlers.pop(old_handler_id, None)
+
+            handler_id = f"user_{client_id}_{client_state or 'any'}"
+            self._handler_counter += 1
+            handler_info = self._make_user_route(handler_id, f"{handler_id}_{self._handler_counter}",
+                                                 client_id, client_handler, client_state, None)
+            self.handlers[handler_id] = handler_info
+            self._user_routes[client_id] = {handler_id: handler_info}
+            self._route_count += 1
+
+            if group_id is None or thread_id is None:
+                continue
 
-        # Get the handler that was just added (it's the last one)
-        new_handler_count = len(self.router.message.handlers)
-        if new_handler_count > current_handler_count:
-            # Handler was added, it's the last one in the list
-            handler_obj = self.router.message.handlers[-1]
-        else:
-            # Something went wrong
-            logger.error(f"[REGISTER_THREAD] Failed to register handler!")
-            handler_obj = None
-
-        # Store handler info for later removal
-        self.handlers[handler_id] = {
-            'handler_object': handler_obj,  # The actual handler in the router
-            'filter_object': filter_obj,
-            'handler_func': thread_message_handler,
-            'original_handler': handler,
-            'unique_id': handler_unique_id,
-            'group_id': group_id,
-            'thread_id': thread_id,
-            'message_types': message_types,
-            'registered_at': asyncio.get_event_loop().time()
-        }
+            handler_id = f"thread_{group_id}_{thread_id}"
+            self._handler_counter += 1
+            handler_info = self._make_thread_route(handler_id, f"{handler_id}_{self._handler_counter}",
+                                                   group_id, thread_id, operator_handler, None)
+            self.handlers[handler_id] = handler_info
+            if (group_id, thread_id) not in self._thread_routes:
+                self._route_count += 1
+            self._thread_routes[(group_id, thread_id)] = handler_info
 
         logger.info(
-            f"[REGISTER_THREAD] ✅ Registered handler '{handler_id}' (unique: {handler_unique_id}). "
+            f"[REGISTER_BULK] ✅ Registered {len(routes)} dialogues. "
             f"Total handlers in dict: {len(self.handlers)}. "
-            f"Total handlers in Router: {len(self.router.message.handlers)}"
+            f"Total routes in dispatch table: {self.total_routes}"
         )
+        return len(routes)
 
     async def register_endpoint_handler(self, endpoint, handler: Callable,
                                         state: str = None, message_types: List[str] = None):
@@ -390,7 +472,7 @@ class InputService:
 
     async def unregister_user_handler(self, user_id: int, state: str = None):
         """
-        Remove user handler - NOW PROPERLY!
+        Remove user handler.
 
         Args:
             user_id: User Telegram ID
@@ -400,53 +482,28 @@ class InputService:
 
         logger.info(
             f"[UNREGISTER_USER] Attempting to unregister handler '{handler_id}' "
-            f"for user {user_id}, state='{state}'. "
-            f"Router currently has {len(self.router.message.handlers)} handlers"
+            f"for user {user_id}, state='{state}'"
         )
 
         if handler_id in self.handlers:
-            handler_info = self.handlers[handler_id]
-            logger.info(
-                f"[UNREGISTER_USER] Found handler '{handler_id}' in dict: "
-                f"unique_id={handler_info['unique_id']}, "
-                f"registered_at={handler_info['registered_at']}"
-            )
+            handler_info = self.handlers.pop(handler_id)
 
-            # УДАЛЯЕМ ИЗ ROUTER!
-            if 'handler_object' in handler_info and handler_info['handler_object']:
-                try:
-                    self.router.message.handlers.remove(handler_info['handler_object'])
-                    logger.info(
-                        f"[UNREGISTER_USER] ✅ Successfully removed handler '{handler_id}' from Router! "
-                        f"Router now has {len(self.router.message.handlers)} handlers"
-                    )
-                except ValueError as e:
-                    logger.error(
-                        f"[UNREGISTER_USER] ❌ Handler object not found in Router! "
-                        f"This shouldn't happen. Error: {e}"
-                    )
+            if self._remove_user_route(user_id, handler_id):
+                logger.info(
+                    f"[UNREGISTER_USER] ✅ Handler '{handler_id}' (unique: {handler_info['unique_id']}) "
+                    f"removed. Remaining handlers in dict: {len(self.handlers)}"
+                )
             else:
-                logger.warning(
-                    f"[UNREGISTER_USER] ⚠️ No handler_object stored for '{handler_id}', "
-                    f"cannot remove from Router!"
+                logger.error(
+                    f"[UNREGISTER_USER] ❌ Handler '{handler_id}' not found in dispatch table! "
+                    f"This shouldn't happen."
                 )
-
-            # Удаляем из нашего словаря
-            del self.handlers[handler_id]
-
-            logger.info(
-                f"[UNREGISTER_USER] Handler '{handler_id}' fully removed. "
-                f"Remaining handlers in dict: {len(self.handlers)}"
-            )
         else:
-            logger.warning(
-                f"[UNREGISTER_USER] Handler '{handler_id}' not found in dict. "
-                f"Available handlers: {list(self.handlers.keys())}"
-            )
+            logger.warning(f"[UNREGISTER_USER] Handler '{handler_id}' not found in dict")
 
     async def unregister_thread_handler(self, group_id: int, thread_id: int):
         """
-        Remove thread handler - NOW PROPERLY!
+        Remove thread handler.
 
         Args:
             group_id: Group chat ID
@@ -456,49 +513,25 @@ class InputService:
 
         logger.info(
             f"[UNREGISTER_THREAD] Attempting to unregister handler '{handler_id}' "
-            f"for thread {group_id}/{thread_id}. "
-            f"Router currently has {len(self.router.message.handlers)} handlers"
+            f"for thread {group_id}/{thread_id}"
         )
 
         if handler_id in self.handlers:
-            handler_info = self.handlers[handler_id]
-            logger.info(
-                f"[UNREGISTER_THREAD] Found handler '{handler_id}' in dict: "
-                f"unique_id={handler_info['unique_id']}, "
-                f"registered_at={handler_info['registered_at']}"
-            )
+            handler_info = self.handlers.pop(handler_id)
 
-            # УДАЛЯЕМ ИЗ ROUTER!
-            if 'handler_object' in handler_info and handler_info['handler_object']:
-                try:
-                    self.router.message.handlers.remove(handler_info['handler_object'])
-                    logger.info(
-                        f"[UNREGISTER_THREAD] ✅ Successfully removed handler '{handler_id}' from Router! "
-                        f"Router now has {len(self.router.message.handlers)} handlers"
-                    )
-                except ValueError as e:
-                    logger.error(
-                        f"[UNREGISTER_THREAD] ❌ Handler object not found in Router! "
-                        f"This shouldn't happen. Error: {e}"
-                    )
+            if self._thread_routes.pop((group_id, thread_id), None):
+                self._route_count -= 1
+                logger.info(
+                    f"[UNREGISTER_THREAD] ✅ Handler '{handler_id}' (unique: {handler_info['unique_id']}) "
+                    f"removed. Remaining handlers in dict: {len(self.handlers)}"
+                )
             else:
-                logger.warning(
-                    f"[UNREGISTER_THREAD] ⚠️ No handler_object stored for '{handler_id}', "
-                    f"cannot remove from Router!"
+                logger.error(
+                    f"[UNREGISTER_THREAD] ❌ Handler '{handler_id}' not found in dispatch table! "
+                    f"This shouldn't happen."
                 )
-
-            # Удаляем из нашего словаря
-            del self.handlers[handler_id]
-
-            logger.info(
-                f"[UNREGISTER_THREAD] Handler '{handler_id}' fully removed. "
-                f"Remaining handlers in dict: {len(self.handlers)}"
-            )
         else:
-            logger.warning(
-                f"[UNREGISTER_THREAD] Handler '{handler_id}' not found in dict. "
-                f"Available handlers: {list(self.handlers.keys())}"
-            )
+            logger.warning(f"[UNREGISTER_THREAD] Handler '{handler_id}' not found in dict")
 
     async def unregister_endpoint_handler(self, endpoint):
         """
@@ -521,59 +554,20 @@ class InputService:
         Args:
             user_id: User Telegram ID
         """
-        logger.info(
-            f"[CLEANUP_USER] Starting cleanup for user {user_id}. "
-            f"Router has {len(self.router.message.handlers)} handlers, "
-            f"dict has {len(self.handlers)} handlers"
-        )
+        user_routes = self._user_routes.pop(user_id, None)
 
-        # Find all handler IDs for this user
-        user_handler_ids = [
-            handler_id for handler_id in self.handlers.keys()
-            if handler_id.startswith(f"user_{user_id}_")
-        ]
-
-        if not user_handler_ids:
+        if not user_routes:
             logger.info(f"[CLEANUP_USER] No handlers found for user {user_id}")
             return
 
-        logger.info(
-            f"[CLEANUP_USER] Found {len(user_handler_ids)} handlers for user {user_id}: "
-            f"{user_handler_ids}"
-        )
-
-        removed_count = 0
-        failed_count = 0
-
-        for handler_id in user_handler_ids:
-            handler_info = self.handlers.get(handler_id)
-            if not handler_info:
-                continue
-
-            logger.debug(
-                f"[CLEANUP_USER] Removing handler '{handler_id}': "
-                f"state='{handler_info.get('state')}', "
-                f"unique_id={handler_info.get('unique_id')}"
-            )
-
-            # Remove from Router
-            if 'handler_object' in handler_info and handler_info['handler_object']:
-                try:
-                    self.router.message.handlers.remove(handler_info['handler_object'])
-                    removed_count += 1
-                    logger.debug(f"[CLEANUP_USER] Removed '{handler_id}' from Router")
-                except ValueError as e:
-                    failed_count += 1
-                    logger.error(f"[CLEANUP_USER] Failed to remove '{handler_id}' from Router: {e}")
-
-            # Remove from dict
-            del self.handlers[handler_id]
+        self._route_count -= len(user_routes)
+        for handler_id in user_routes:
+            self.handlers.pop(handler_id, None)
 
         logger.info(
             f"[CLEANUP_USER] ✅ Cleanup complete for user {user_id}: "
-            f"removed {removed_count} handlers, failed {failed_count}. "
-            f"Router now has {len(self.router.message.handlers)} handlers, "
-            f"dict has {len(self.handlers)} handlers"
+            f"removed {len(user_routes)} handlers {list(user_routes.keys())}. "
+            f"Dict has {len(self.handlers)} handlers"
         )
 
     def get_user_handlers(self, user_id: int) -> List[Dict[str, Any]]:
@@ -586,6 +580,7 @@ class InputService:
         Returns:
             List of handler info dictionaries
         """
+        user_routes = self._user_routes.get(user_id, {})
         user_handlers = []
         for handler_id, handler_info in self.handlers.items():
             if handler_id.startswith(f"user_{user_id}_"):
@@ -594,7 +589,7 @@ class InputService:
                     'state': handler_info.get('state'),
                     'unique_id': handler_info.get('unique_id'),
                     'registered_at': handler_info.get('registered_at'),
-                    'has_router_object': bool(handler_info.get('handler_object'))
+                    'has_router_object': handler_id in user_routes
                 })
         return user_handlers
 
@@ -609,19 +604,17 @@ class InputService:
         thread_handlers = sum(1 for h in self.handlers if h.startswith('thread_'))
 
         # Group by user
-        users_with_handlers = {}
-        for handler_id in self.handlers:
-            if handler_id.startswith('user_'):
-                parts = handler_id.split('_')
-                if len(parts) >= 2:
-                    user_id = parts[1]
-                    users_with_handlers[user_id] = users_with_handlers.get(user_id, 0) + 1
+        users_with_handlers = {
+            str(user_id): len(routes) for user_id, routes in self._user_routes.items()
+        }
+
+        total_routes = self.total_routes
 
         return {
-            'total_in_router': len(self.router.message.handlers),
+            'total_in_router': total_routes,
             'total_in_dict': len(self.handlers),
             'user_handlers': user_handlers,
             'thread_handlers': thread_handlers,
             'users_with_handlers': users_with_handlers,
-            'potential_zombies': len(self.router.message.handlers) - len(self.handlers)
-        }
\ No newline at end of file
+            'potential_zombies': total_routes - len(self.handlers)
+        }
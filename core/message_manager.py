@@ -9,7 +9,7 @@ from aiogram import Bot
 from aiogram.types import Message, CallbackQuery
 from aiogram.types import InputMediaPhoto, InputMediaVideo
 from aiogram.enums import ParseMode
-from aiogram.exceptions import TelegramAPIError
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
 
 from core.templates import MessageTemplates
 
@@ -41,7 +41,8 @@ class MessageManager:
             delete_original: bool = False,
             override_media_id: Optional[str] = None,
             media_type: Optional[str] = None,
-            execute_preaction: bool = True
+            execute_preaction: bool = True,
+            raise_retry_after: bool = False
     ) -> Optional[Message]:
         """
         Send a message based on template.
@@ -56,6 +57,7 @@ class MessageManager:
             override_media_id: Override media ID from template
             media_type: Override media type from template
             execute_preaction: Whether to execute preAction
+            raise_retry_after: Re-raise Telegram flood control errors (caller schedules the retry)
 
         Returns:
             Optional[Message]: The sent or edited message, or None on error
@@ -103,6 +105,14 @@ class MessageManager:
                 message_id=message_id if edit and not delete_original else None
             )
 
+        except TelegramRetryAfter as e:
+            if raise_retry_after:
+                # Flood control - message queue backs off and retries
+                raise
+            logger.warning(f"Flood control while sending template {template_key}: retry after {e.retry_after}s")
+            if isinstance(update, CallbackQuery):
+                await update.answer("Error processing message")
+            return None
         except Exception as e:
             logger.error(f"Error sending template message: {e}", exc_info=True)
             if isinstance(update, CallbackQuery):
@@ -342,6 +352,8 @@ class MessageManager:
                     edit=edit,
                     message_id=message_id
                 )
+        except TelegramRetryAfter:
+            raise
         except Exception as e:
             logger.error(f"Error sending message: {e}")
             return None
@@ -386,6 +398,9 @@ class MessageManager:
             else:
                 return await self.bot.send_message(**kwargs)
 
+        except TelegramRetryAfter:
+            # Sending anything else now would only extend the flood wait
+            raise
         except TelegramAPIError as e:
             logger.error(f"Error sending text message: {e}")
 
@@ -393,6 +408,8 @@ class MessageManager:
                 try:
                     kwargs.pop('message_id', None)
                     return await self.bot.send_message(**kwargs)
+                except TelegramRetryAfter:
+                    raise
                 except TelegramAPIError as e2:
                     logger.error(f"Error sending fallback message: {e2}")
 
@@ -459,6 +476,9 @@ class MessageManager:
                     photo=media_id
                 )
 
+        except TelegramRetryAfter:
+            # Sending anything else now would only extend the flood wait
+            raise
         except TelegramAPIError as e:
             logger.error(f"Error sending media message: {e}")
 
@@ -470,6 +490,8 @@ class MessageManager:
                     parse_mode=parse_mode,
                     edit=False  # Always send new message on fallback
                 )
+            except TelegramRetryAfter:
+                raise
             except TelegramAPIError as e2:
                 logger.error(f"Error sending fallback text message: {e2}")
 
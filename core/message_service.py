@@ -3,121 +3,421 @@ Service for sending messages to different recipients with improved queueing.
 """
 import logging
 import asyncio
-from typing import Dict, Any, Optional, List, Deque, Set
+import time
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Dict, Any, Optional, List, Deque, Set, Tuple, Union
 from collections import deque
 from datetime import datetime
 
 from aiogram import Bot
 from aiogram.types import Message
-from aiogram.exceptions import TelegramAPIError
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest, TelegramRetryAfter
 
 from core.templates import MessageTemplates
 from models.user import User
 from core.db import get_db_session_ctx
+from core.utils import TokenBucket
+from config import Config
 
 logger = logging.getLogger(__name__)
 
 
+def is_message_gone(error: Exception) -> bool:
+    """Check if Telegram error means the message no longer exists or can't be edited."""
+    message = str(error).lower()
+    return ("message to edit not found" in message or "message can't be edited" in message
+            or "message_id_invalid" in message)
+
+
+class MessagePriority(IntEnum):
+    """Priority classes of queued messages (higher is sent first)."""
+    BULK = 0
+    EDIT = 1
+    NOTIFICATION = 2
+    CLIENT_MESSAGE = 3
+    OPERATOR_REPLY = 4
+
+
+@dataclass
+class QueuedMessage:
+    """Message waiting in MessageQueue."""
+    seq: int
+    priority: int
+    chat_id: int
+    data: Dict[str, Any]
+    enqueued_at: float
+    future: asyncio.Future  # Resolved with callback result (sent Message) or its error
+    attempts: int = 0  # Sends rejected by Telegram flood control so far
+    drop_on_flood: bool = False  # Give up on first RetryAfter instead of retrying (expendable updates)
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """
+    Immutable copy of the User fields needed to render a template.
+
+    Queued messages carry it instead of the ORM object, so the queue neither
+    touches a detached instance nor re-queries the user before every send.
+    """
+    telegramID: int
+    userID: Optional[int] = None
+    lang: str = 'en'
+    nickname: Optional[str] = None
+    firstname: Optional[str] = None
+    lastname: Optional[str] = None
+    displayName: Optional[str] = None
+    user_type: Any = None
+
+    @classmethod
+    def from_user(cls, user) -> 'UserSnapshot':
+        """Take snapshot of User (snapshots are returned as is)."""
+        if isinstance(user, cls):
+            return user
+        return cls(
+            telegramID=user.telegramID,
+            userID=user.userID,
+            lang=user.lang or 'en',
+            nickname=user.nickname,
+            firstname=user.firstname,
+            lastname=user.lastname,
+            displayName=user.displayName,
+            user_type=user.user_type
+        )
+
+
 class MessageQueue:
-    """Queue for handling message sending with rate limiting."""
+    """
+    Scheduler for outgoing messages respecting Telegram rate limits.
+
+    - global token bucket (TELEGRAM_GLOBAL_RATE messages per second for the whole bot)
+    - token bucket per chat: TELEGRAM_CHAT_RATE per second in private chats,
+      TELEGRAM_GROUP_RATE per minute in groups (all forum threads share their group's limit)
+    - messages of one chat keep their order and are sent one at a time,
+      different chats are sent concurrently
+    - among chats allowed to send now, the highest priority head message goes first,
+      ties go to the chat served longest ago, so one busy group thread can't starve private chats
+    - Telegram RetryAfter pauses the chat's limiter (the global one if several chats
+      are throttled at once) and puts the message back at the head of its chat
+      (messages queued with drop_on_flood are dropped instead)
+    """
+
+    CHAT_BURST = 2  # Messages a private chat may get back to back
+    GROUP_BURST = 3  # Messages a group may get back to back
+    MAX_IDLE_CHATS = 1000  # Idle per-chat limiters kept before pruning
+    MAX_FLOOD_RETRIES = 5  # RetryAfter responses tolerated per message
+    GLOBAL_FLOOD_CHATS = 3  # Chats throttled within GLOBAL_FLOOD_WINDOW that mean a global limit
+    GLOBAL_FLOOD_WINDOW = 2.0  # Seconds
 
-    def __init__(self, max_per_minute: int = 30, burst_limit: int = 5):
+    def __init__(self, global_per_second: float = None, chat_per_second: float = None,
+                 group_per_minute: float = None):
         """
         Initialize message queue with rate limiting.
 
         Args:
-            max_per_minute: Maximum messages per minute
-            burst_limit: Maximum messages to send in burst
+            global_per_second: Messages per second for the bot (default: TELEGRAM_GLOBAL_RATE)
+            chat_per_second: Messages per second in a private chat (default: TELEGRAM_CHAT_RATE)
+            group_per_minute: Messages per minute in a group (default: TELEGRAM_GROUP_RATE)
         """
-        self.queue: Deque[Dict[str, Any]] = deque()
-        self.max_per_minute = max_per_minute
-        self.burst_limit = burst_limit
+        self.global_per_second = float(global_per_second or Config.get(Config.TELEGRAM_GLOBAL_RATE, "30"))
+        self.chat_per_second = float(chat_per_second or Config.get(Config.TELEGRAM_CHAT_RATE, "1"))
+        self.group_per_minute = float(group_per_minute or Config.get(Config.TELEGRAM_GROUP_RATE, "20"))
+
+        self._global_bucket = TokenBucket(rate=self.global_per_second, capacity=self.global_per_second)
+        self._chats: Dict[int, Deque[QueuedMessage]] = {}
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._last_served: Dict[int, float] = {}
+        self._sending: Set[int] = set()  # Chats with a send in flight
+        self._size = 0
+        self._seq = 0
+        self._wakeup = asyncio.Event()
+        self._recent_floods: Deque[Tuple[float, int]] = deque()  # (time, chat ID) of RetryAfter responses
+
         self.processing = False
-        self.sent_in_last_minute: List[float] = []
+        self.sent_in_last_minute: Deque[float] = deque()
         self.pending_tasks: Set[asyncio.Task] = set()
+        self.stats = {
+            'sent': 0,
+            'failed': 0,
+            'max_wait': 0.0,
+            'flood_waits': 0,
+            'global_pauses': 0,
+            'dropped': 0
+        }
+
+    def __len__(self) -> int:
+        return self._size
 
-    async def add_message(self, message_data: Dict[str, Any]) -> None:
+    async def add_message(self, message_data: Dict[str, Any],
+                          priority: int = MessagePriority.NOTIFICATION,
+                          chat_id: Optional[int] = None,
+                          drop_on_flood: bool = False) -> asyncio.Future:
         """
         Add message to the queue and start processing if not already running.
 
         Args:
             message_data: Dictionary with message data and callback
+            priority: MessagePriority class
+            chat_id: Destination chat (default: taken from message_data 'chat_id' or 'user')
+            drop_on_flood: Drop the message if Telegram answers RetryAfter (future gets the error)
+
+        Returns:
+            Future resolved with the callback result (sent Message) or its exception.
+            Awaiting it is optional, errors are logged by the queue either way.
         """
-        self.queue.append(message_data)
-        logger.debug(f"Added message to queue. Queue size: {len(self.queue)}")
+        if chat_id is None:
+            chat_id = self._get_chat_id(message_data)
+
+        future = asyncio.get_running_loop().create_future()
+        # Fire-and-forget callers never look at the future - don't warn about unretrieved errors
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+        self._seq += 1
+        item = QueuedMessage(
+            seq=self._seq,
+            priority=int(priority),
+            chat_id=chat_id,
+            data=message_data,
+            enqueued_at=time.monotonic(),
+            future=future,
+            drop_on_flood=drop_on_flood
+        )
+        self._chats.setdefault(chat_id, deque()).append(item)
+        self._size += 1
+        self._wakeup.set()
+        logger.debug(f"Added message to queue for chat {chat_id} (priority {priority}). Queue size: {self._size}")
 
         if not self.processing:
-            self.processing = True
-            task = asyncio.create_task(self._process_queue())
-            self.pending_tasks.add(task)
-            task.add_done_callback(self.pending_tasks.discard)
+            self._start_processing()
+
+        return future
+
+    @staticmethod
+    def _get_chat_id(message_data: Dict[str, Any]) -> int:
+        if message_data.get('chat_id') is not None:
+            return message_data['chat_id']
+        if message_data.get('user') is not None:
+            return message_data['user'].telegramID
+        return 0
+
+    def _start_processing(self) -> None:
+        self.processing = True
+        task = asyncio.create_task(self._process_queue())
+        self.pending_tasks.add(task)
+        task.add_done_callback(self.pending_tasks.discard)
+
+    def _get_chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if chat_id < 0:
+                # Groups and supergroups have negative IDs
+                bucket = TokenBucket(rate=self.group_per_minute / 60, capacity=self.GROUP_BURST)
+            else:
+                bucket = TokenBucket(rate=self.chat_per_second, capacity=self.CHAT_BURST)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    def _next_ready_chat(self) -> Tuple[Optional[int], Optional[float]]:
+        """
+        Pick chat to send next.
+
+        Returns:
+            Tuple of (chat ID or None, seconds until some chat is allowed to send or None
+            if every waiting chat has a send in flight)
+        """
+        best_chat = None
+        best_key = None
+        min_wait = None
+
+        for chat_id, items in self._chats.items():
+            if chat_id in self._sending:
+                continue
+
+            wait = self._get_chat_bucket(chat_id).wait_time()
+            if wait > 0:
+                min_wait = wait if min_wait is None else min(min_wait, wait)
+                continue
+
+            head = items[0]
+            key = (head.priority, -self._last_served.get(chat_id, 0.0), -head.seq)
+            if best_key is None or key > best_key:
+                best_chat, best_key = chat_id, key
+
+        return best_chat, min_wait
 
     async def _process_queue(self) -> None:
-        """Process message queue with rate limiting."""
+        """Dispatch queued messages as rate limits allow."""
         try:
-            while self.queue:
-                # Apply rate limiting
-                now = datetime.now().timestamp()
-                # Remove timestamps older than 1 minute
-                self.sent_in_last_minute = [t for t in self.sent_in_last_minute if now - t < 60]
-
-                # Check if we've reached the rate limit
-                if len(self.sent_in_last_minute) >= self.max_per_minute:
-                    wait_time = 60 - (now - self.sent_in_last_minute[0])
-                    logger.warning(f"Rate limit reached. Waiting {wait_time:.2f} seconds")
-                    await asyncio.sleep(wait_time)
+            while self._size:
+                chat_id, wait = self._next_ready_chat()
+
+                if chat_id is None:
+                    # Sleep until a chat limiter refills, a send finishes or a message arrives
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
                     continue
 
-                # Send messages in bursts up to burst_limit
-                burst_count = min(len(self.queue), self.burst_limit)
-
-                for _ in range(burst_count):
-                    if not self.queue:
-                        break
-
-                    message_data = self.queue.popleft()
-                    send_callback = message_data.pop('callback')
-                    message_id = message_data.pop('message_id', None)
-
-                    # ИЗМЕНЕНИЕ: Проверяем, содержит ли сообщение объект user
-                    if 'user' in message_data:
-                        try:
-                            user_obj = message_data['user']
-                            telegram_id = user_obj.telegramID
-
-                            # Получаем свежий объект User из базы данных
-                            with get_db_session_ctx() as session:
-                                fresh_user = session.query(User).filter_by(telegramID=telegram_id).first()
-                                if fresh_user:
-                                    message_data['user'] = fresh_user
-                                else:
-                                    logger.warning(f"User with telegram ID {telegram_id} not found")
-                                    continue
-                        except Exception as e:
-                            logger.error(f"Error refreshing user object: {e}")
-                            continue
+                await self._global_bucket.acquire()
 
-                    try:
-                        await send_callback(**message_data)
-                        self.sent_in_last_minute.append(datetime.now().timestamp())
-                        if message_id:
-                            logger.info(f"Sent queued message {message_id}. Queue size: {len(self.queue)}")
-                    except TelegramAPIError as e:
-                        logger.error(f"Failed to send queued message: {e}")
+                items = self._chats[chat_id]
+                item = items.popleft()
+                if not items:
+                    del self._chats[chat_id]
+                self._size -= 1
+
+                self._get_chat_bucket(chat_id).consume(1)
+                self._last_served[chat_id] = time.monotonic()
+                self._sending.add(chat_id)
+
+                task = asyncio.create_task(self._send(item))
+                self.pending_tasks.add(task)
+                task.add_done_callback(self.pending_tasks.discard)
 
-                # Small delay between bursts
-                await asyncio.sleep(0.1)
+                if len(self._chat_buckets) > self.MAX_IDLE_CHATS:
+                    self._prune_idle_chats()
 
         except Exception as e:
             logger.error(f"Error in message queue processor: {e}", exc_info=True)
         finally:
             self.processing = False
             # If new messages were added during exception handling, restart processing
-            if self.queue and not self.processing:
-                self.processing = True
-                task = asyncio.create_task(self._process_queue())
-                self.pending_tasks.add(task)
-                task.add_done_callback(self.pending_tasks.discard)
+            if self._size and not self.processing:
+                self._start_processing()
+
+    async def _send(self, item: QueuedMessage) -> None:
+        """Send one message; chat becomes eligible again when it's done."""
+        message_data = dict(item.data)
+        send_callback = message_data.pop('callback')
+        message_id = message_data.pop('message_id', None)
+
+        try:
+            waited = time.monotonic() - item.enqueued_at
+            self.stats['max_wait'] = max(self.stats['max_wait'], waited)
+
+            result = await send_callback(**message_data)
+            if not item.future.done():
+                item.future.set_result(result)
+
+            self.stats['sent'] += 1
+            now = time.monotonic()
+            self.sent_in_last_minute.append(now)
+            while self.sent_in_last_minute and now - self.sent_in_last_minute[0] > 60:
+                self.sent_in_last_minute.popleft()
+
+            if message_id:
+                logger.info(f"Sent queued message {message_id} after {waited:.2f}s. Queue size: {self._size}")
+
+        except TelegramRetryAfter as e:
+            self._handle_flood(item, e)
+        except TelegramAPIError as e:
+            self.stats['failed'] += 1
+            logger.error(f"Failed to send queued message: {e}")
+            if not item.future.done():
+                item.future.set_exception(e)
+        except Exception as e:
+            self.stats['failed'] += 1
+            logger.error(f"Error sending queued message: {e}", exc_info=True)
+            if not item.future.done():
+                item.future.set_exception(e)
+        except asyncio.CancelledError:
+            item.future.cancel()
+            raise
+        finally:
+            self._sending.discard(item.chat_id)
+            self._wakeup.set()
+
+    def _handle_flood(self, item: QueuedMessage, error: TelegramRetryAfter) -> None:
+        """
+        Back off after Telegram flood control and schedule the message again.
+
+        The chat's limiter is paused for retry_after seconds. When several chats are
+        throttled within a short window the limit is the bot-wide one, so the global
+        limiter is paused too. The message goes back to the head of its chat to keep order;
+        the scheduler sends it once the pause is over.
+        """
+        self.stats['flood_waits'] += 1
+        item.attempts += 1
+        retry_after = float(error.retry_after)
+        now = time.monotonic()
+
+        self._get_chat_bucket(item.chat_id).pause(retry_after)
+
+        self._recent_floods.append((now, item.chat_id))
+        while self._recent_floods and now - self._recent_floods[0][0] > self.GLOBAL_FLOOD_WINDOW:
+            self._recent_floods.popleft()
+        throttled_chats = {chat_id for _, chat_id in self._recent_floods}
+        if len(throttled_chats) >= self.GLOBAL_FLOOD_CHATS:
+            self.stats['global_pauses'] += 1
+            self._global_bucket.pause(retry_after)
+            logger.warning(
+                f"[TELEGRAM_FLOOD] {len(throttled_chats)} chats throttled, "
+                f"pausing all sending for {retry_after:.0f}s"
+            )
+
+        if item.drop_on_flood:
+            self.stats['dropped'] += 1
+            logger.debug(f"[TELEGRAM_FLOOD] Chat {item.chat_id} throttled, dropped expendable message")
+            if not item.future.done():
+                item.future.set_exception(error)
+            return
+
+        if item.attempts > self.MAX_FLOOD_RETRIES:
+            self.stats['failed'] += 1
+            logger.error(
+                f"[TELEGRAM_FLOOD] Giving up message to chat {item.chat_id} "
+                f"after {item.attempts} flood waits"
+            )
+            if not item.future.done():
+                item.future.set_exception(error)
+            return
+
+        logger.warning(
+            f"[TELEGRAM_FLOOD] Chat {item.chat_id} throttled, retrying in {retry_after:.0f}s "
+            f"(attempt {item.attempts})"
+        )
+        self._chats.setdefault(item.chat_id, deque()).appendleft(item)
+        self._size += 1
+        if not self.processing:
+            self._start_processing()
+
+    def _prune_idle_chats(self) -> None:
+        """Forget limiters of chats with nothing queued whose bucket is full again."""
+        for chat_id in list(self._chat_buckets):
+            if chat_id in self._chats or chat_id in self._sending:
+                continue
+            bucket = self._chat_buckets[chat_id]
+            if bucket.available >= bucket.capacity:
+                del self._chat_buckets[chat_id]
+                self._last_served.pop(chat_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue statistics."""
+        now = time.monotonic()
+        by_priority = {priority.name.lower(): 0 for priority in MessagePriority}
+        for items in self._chats.values():
+            for item in items:
+                try:
+                    name = MessagePriority(item.priority).name.lower()
+                except ValueError:
+                    name = str(item.priority)
+                by_priority[name] = by_priority.get(name, 0) + 1
+
+        return {
+            'queue_size': self._size,
+            'waiting_chats': len(self._chats),
+            'sending_chats': len(self._sending),
+            'queued_by_priority': by_priority,
+            'sent': self.stats['sent'],
+            'failed': self.stats['failed'],
+            'max_wait': self.stats['max_wait'],
+            'flood_waits': self.stats['flood_waits'],
+            'global_pauses': self.stats['global_pauses'],
+            'dropped': self.stats['dropped'],
+            'messages_sent_last_minute': sum(1 for t in self.sent_in_last_minute if now - t <= 60)
+        }
 
 
 class DialogueEndpoint:
@@ -180,29 +480,57 @@ class MessageService:
         """Create an endpoint for telegram ID."""
         return DialogueEndpoint('user', telegram_id)
 
+    async def _await_delivery(self, future: asyncio.Future, description: str) -> Optional[Message]:
+        """
+        Wait for queued message to be sent.
+
+        Args:
+            future: Future returned by MessageQueue.add_message
+            description: What is being sent, for logging
+
+        Returns:
+            Message: Sent message or None if sending failed
+        """
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if future.cancelled():
+                return None
+            raise
+        except Exception as e:
+            self.stats['total_failed'] += 1
+            logger.error(f"Failed to deliver {description}: {e}")
+            return None
+
     async def send_template_to_user(self, user: User, template_key: str,
                                     variables: Dict = None, media_id: str = None,
                                     edit_message_id: int = None,
-                                    priority: int = 0) -> Optional[Message]:
+                                    priority: int = MessagePriority.NOTIFICATION,
+                                    wait: bool = True) -> Union[Message, asyncio.Future, None]:
         """
         Send a template-based message to a user with queueing support.
 
         Args:
-            user: User object
+            user: User object or UserSnapshot
             template_key: Template key
             variables: Template variables
             media_id: Optional media ID
             edit_message_id: Optional message ID to edit
-            priority: Message priority (higher = more important)
+            priority: MessagePriority class (higher is sent first)
+            wait: Wait until the message is sent (False - return delivery future right away)
 
         Returns:
-            Message: Sent message or None on error
+            Message: Sent message or None on error.
+            With wait=False - future resolved with the sent Message (None if not even queued).
         """
         from core.message_manager import MessageManager
 
         try:
             start_time = datetime.now()
 
+            # Queue carries a snapshot, not the session-bound User
+            user = UserSnapshot.from_user(user)
+
             # Create an instance of MessageManager for this operation
             message_manager = MessageManager(self.bot)
 
@@ -234,7 +562,7 @@ class MessageService:
             )
 
             # Queue the message sending
-            await self.message_queue.add_message({
+            delivery = await self.message_queue.add_message({
                 'callback': message_manager.send_template,
                 'message_id': unique_message_id,
                 'user': user,
@@ -242,12 +570,10 @@ class MessageService:
                 'update': update,
                 'variables': variables,
                 'override_media_id': media_id,
-                'edit': bool(edit_message_id)
-            })
+                'edit': bool(edit_message_id),
+                'raise_retry_after': True
+            }, priority=priority)
 
-            # For now, we can't return the actual message since it's queued
-            # We could improve this in the future with a callback system
-            # For now, return None with the understanding it's being processed
             preparation_time = (datetime.now() - start_time).total_seconds()
             logger.info(
                 f"Queued template {template_key} to user {user.telegramID} "
@@ -257,7 +583,9 @@ class MessageService:
             self.stats['total_sent'] += 1
             self.stats['last_send_time'] = datetime.now()
 
-            return None
+            if not wait:
+                return delivery
+            return await self._await_delivery(delivery, f"template {template_key} to user {user.telegramID}")
 
         except Exception as e:
             self.stats['total_failed'] += 1
@@ -267,7 +595,8 @@ class MessageService:
     async def send_template_to_endpoint(self, endpoint: DialogueEndpoint,
                                         template_key: str, variables: Dict = None,
                                         media_id: str = None,
-                                        priority: int = 0) -> Optional[Message]:
+                                        priority: int = MessagePriority.NOTIFICATION,
+                                        wait: bool = True) -> Union[Message, asyncio.Future, None]:
         """
         Send a template-based message to an endpoint with queueing.
 
@@ -276,71 +605,27 @@ class MessageService:
             template_key: Template key
             variables: Template variables
             media_id: Optional media ID
-            priority: Message priority (higher = more important)
+            priority: MessagePriority class (higher is sent first)
+            wait: Wait until the message is sent (False - return delivery future right away)
 
         Returns:
-            Message: Sent message or None on error
+            Message: Sent message or None on error.
+            With wait=False - future resolved with the sent Message (None if not even queued).
         """
         try:
             start_time = datetime.now()
 
-            # For user endpoints, get User object and use send_template_to_user
-            if endpoint.type == 'user':
-                # Получаем raw_template напрямую, чтобы избежать проблем с User
-                raw_template = await self.templates_manager.get_raw_template(
-                    template_key, variables=variables or {})
-
-                if not raw_template:
-                    logger.error(f"Failed to get template {template_key}")
-                    return None
-
-                text, buttons_str = raw_template
-
-                # Create keyboard if buttons defined
-                keyboard = None
-                if buttons_str:
-                    keyboard = self.templates_manager.create_keyboard(buttons_str, variables=variables)
-
-                # ОТПРАВЛЯЕМ СООБЩЕНИЕ НАПРЯМУЮ вместо постановки в очередь
-                params = {'chat_id': endpoint.id}
-
-                if media_id:
-                    # С медиа
-                    result = await self.bot.send_photo(
-                        **params,
-                        photo=media_id,
-                        caption=text,
-                        reply_markup=keyboard,
-                        parse_mode='HTML'
-                    )
-                else:
-                    # Только текст
-                    result = await self.bot.send_message(
-                        **params,
-                        text=text,
-                        reply_markup=keyboard,
-                        parse_mode='HTML'
-                    )
-
-                preparation_time = (datetime.now() - start_time).total_seconds()
-                logger.info(
-                    f"Sent template {template_key} to {endpoint.type}/{endpoint.id} "
-                    f"in {preparation_time:.3f}s"
-                )
-
-                self.stats['total_sent'] += 1
-                self.stats['last_send_time'] = datetime.now()
-
-                return result
-
-            # Для других типов (группы, треды) - тот же код
             # Generate a unique message ID for tracking
             unique_message_id = f"{endpoint.type}_{endpoint.id}_{datetime.now().timestamp()}"
 
-            # Get raw template (text and buttons)
+            # Получаем raw_template напрямую, чтобы избежать проблем с User
             raw_template = await self.templates_manager.get_raw_template(
                 template_key, variables=variables or {})
 
+            if not raw_template:
+                logger.error(f"Failed to get template {template_key}")
+                return None
+
             text, buttons_str = raw_template
 
             # Create keyboard if buttons defined
@@ -351,49 +636,209 @@ class MessageService:
             # Prepare send parameters
             params = endpoint.get_send_params()
 
-            # Log the request
-            logger.debug(
-                f"Preparing to send template {template_key} to {endpoint.type}/{endpoint.id}"
-            )
-
-            # ОТПРАВЛЯЕМ СООБЩЕНИЕ НАПРЯМУЮ
             if media_id:
                 # С медиа
-                result = await self.bot.send_photo(
-                    **params,
-                    photo=media_id,
-                    caption=text,
-                    reply_markup=keyboard,
-                    parse_mode='HTML'
-                )
+                message_data = {
+                    'callback': self.bot.send_photo,
+                    'photo': media_id,
+                    'caption': text
+                }
             else:
                 # Только текст
-                result = await self.bot.send_message(
-                    **params,
-                    text=text,
-                    reply_markup=keyboard,
-                    parse_mode='HTML'
-                )
+                message_data = {
+                    'callback': self.bot.send_message,
+                    'text': text
+                }
+
+            delivery = await self.message_queue.add_message({
+                **message_data,
+                'message_id': unique_message_id,  # для трекинга
+                **params,
+                'reply_markup': keyboard,
+                'parse_mode': 'HTML'
+            }, priority=priority)
 
             preparation_time = (datetime.now() - start_time).total_seconds()
             logger.info(
-                f"Sent template {template_key} to {endpoint.type}/{endpoint.id} "
+                f"Queued template {template_key} to {endpoint.type}/{endpoint.id} "
                 f"in {preparation_time:.3f}s"
             )
 
             self.stats['total_sent'] += 1
             self.stats['last_send_time'] = datetime.now()
 
-            return result
+            if not wait:
+                return delivery
+            return await self._await_delivery(
+                delivery, f"template {template_key} to {endpoint.type}/{endpoint.id}")
 
         except Exception as e:
             self.stats['total_failed'] += 1
             logger.error(f"Error sending template to endpoint {endpoint.type}/{endpoint.id}: {e}")
             return None
 
+    async def send_text_to_endpoint(self, endpoint: DialogueEndpoint, text: str,
+                                    priority: int = MessagePriority.NOTIFICATION,
+                                    wait: bool = True) -> Union[Message, asyncio.Future, None]:
+        """
+        Send plain text (no template) to an endpoint with queueing.
+
+        Args:
+            endpoint: Dialogue endpoint
+            text: Message text
+            priority: MessagePriority class (higher is sent first)
+            wait: Wait until the message is sent (False - return delivery future right away)
+
+        Returns:
+            Message: Sent message or None on error.
+            With wait=False - future resolved with the sent Message (None if not even queued).
+        """
+        try:
+            unique_message_id = f"{endpoint.type}_{endpoint.id}_{datetime.now().timestamp()}"
+
+            delivery = await self.message_queue.add_message({
+                'callback': self.bot.send_message,
+                'message_id': unique_message_id,  # для трекинга
+                **endpoint.get_send_params(),
+                'text': text
+            }, priority=priority)
+
+            self.stats['total_sent'] += 1
+            self.stats['last_send_time'] = datetime.now()
+
+            if not wait:
+                return delivery
+            return await self._await_delivery(delivery, f"text to {endpoint.type}/{endpoint.id}")
+
+        except Exception as e:
+            self.stats['total_failed'] += 1
+            logger.error(f"Error sending text to endpoint {endpoint.type}/{endpoint.id}: {e}")
+            return None
+
+    async def send_media_to_endpoint(self, endpoint: DialogueEndpoint, media_type: str, file_id: str,
+                                     caption: str = None, priority: int = MessagePriority.NOTIFICATION,
+                                     wait: bool = True) -> Union[Message, asyncio.Future, None]:
+        """
+        Send media by file ID to an endpoint with queueing.
+
+        Args:
+            endpoint: Dialogue endpoint
+            media_type: 'photo', 'video', 'document', 'voice' or 'audio'
+            file_id: Telegram file ID
+            caption: Optional caption (HTML)
+            priority: MessagePriority class (higher is sent first)
+            wait: Wait until the message is sent (False - return delivery future right away)
+
+        Returns:
+            Message: Sent message or None on error.
+            With wait=False - future resolved with the sent Message (None if not even queued).
+        """
+        senders = {
+            'photo': self.bot.send_photo,
+            'video': self.bot.send_video,
+            'document': self.bot.send_document,
+            'voice': self.bot.send_voice,
+            'audio': self.bot.send_audio
+        }
+
+        try:
+            if media_type not in senders:
+                logger.error(f"Unsupported media type {media_type}")
+                return None
+
+            unique_message_id = f"{endpoint.type}_{endpoint.id}_{datetime.now().timestamp()}"
+
+            delivery = await self.message_queue.add_message({
+                'callback': senders[media_type],
+                'message_id': unique_message_id,  # для трекинга
+                **endpoint.get_send_params(),
+                media_type: file_id,
+                'caption': caption,
+                'parse_mode': 'HTML'
+            }, priority=priority)
+
+            self.stats['total_sent'] += 1
+            self.stats['last_send_time'] = datetime.now()
+
+            if not wait:
+                return delivery
+            return await self._await_delivery(delivery, f"{media_type} to {endpoint.type}/{endpoint.id}")
+
+        except Exception as e:
+            self.stats['total_failed'] += 1
+            logger.error(f"Error sending {media_type} to endpoint {endpoint.type}/{endpoint.id}: {e}")
+            return None
+
+    async def edit_template_message(self, message: Message, template_key: str,
+                                    variables: Dict = None,
+                                    priority: int = MessagePriority.EDIT,
+                                    drop_on_flood: bool = False,
+                                    wait: bool = True) -> Union[bool, asyncio.Future, None]:
+        """
+        Replace text of an already sent message with a rendered template.
+
+        The edit goes through the message queue - edits count against the chat's
+        rate limit like new messages.
+
+        Args:
+            message: Previously sent message
+            template_key: Template key
+            variables: Template variables
+            priority: MessagePriority class (higher is sent first)
+            drop_on_flood: Drop the edit instead of retrying if Telegram answers RetryAfter
+                (for progress updates superseded by the next one anyway)
+            wait: Wait until the message is edited (False - return delivery future right away)
+
+        Returns:
+            bool: Success status.
+            With wait=False - future resolved when the edit is done or failed with its
+            Telegram error (None if not even queued).
+        """
+        try:
+            raw_template = await self.templates_manager.get_raw_template(
+                template_key, variables=variables or {})
+
+            if not raw_template:
+                logger.error(f"Failed to get template {template_key}")
+                return False if wait else None
+
+            text, buttons_str = raw_template
+
+            keyboard = None
+            if buttons_str:
+                keyboard = self.templates_manager.create_keyboard(buttons_str, variables=variables)
+
+            # Queue takes 'message_id' for its own tracking, target goes as edit_message_id
+            async def edit_text(edit_message_id: int, **kwargs):
+                try:
+                    return await self.bot.edit_message_text(message_id=edit_message_id, **kwargs)
+                except TelegramBadRequest as e:
+                    if "message is not modified" in str(e):
+                        return True
+                    raise
+
+            delivery = await self.message_queue.add_message({
+                'callback': edit_text,
+                'chat_id': message.chat.id,
+                'edit_message_id': message.message_id,
+                'text': text,
+                'reply_markup': keyboard,
+                'parse_mode': 'HTML'
+            }, priority=priority, drop_on_flood=drop_on_flood)
+
+            if not wait:
+                return delivery
+            return await self._await_delivery(
+                delivery, f"edit of message {message.message_id} with template {template_key}") is not None
+
+        except Exception as e:
+            logger.error(f"Unexpected error editing message {message.message_id}: {e}")
+            return False if wait else None
+
     async def forward_message(self, message: Message, to_endpoint: DialogueEndpoint,
                               with_comment: Optional[str] = None,
-                              priority: int = 0) -> Optional[Message]:
+                              priority: int = MessagePriority.NOTIFICATION,
+                              wait: bool = True) -> Union[Message, asyncio.Future, None]:
         """
         Forward a message to an endpoint with queueing.
 
@@ -401,10 +846,12 @@ class MessageService:
             message: Message to forward
             to_endpoint: Destination endpoint
             with_comment: Optional comment to prepend
-            priority: Message priority (higher = more important)
+            priority: MessagePriority class (higher is sent first)
+            wait: Wait until the message is forwarded (False - return delivery future right away)
 
         Returns:
-            Message: Forwarded message or None on error
+            Message: Forwarded message or None on error.
+            With wait=False - future resolved with the forwarded Message (None if not even queued).
         """
         try:
             params = to_endpoint.get_send_params()
@@ -418,7 +865,7 @@ class MessageService:
                     **params,
                     'text': with_comment
                 }
-                await self.message_queue.add_message(comment_params)
+                await self.message_queue.add_message(comment_params, priority=priority)
 
             # Queue the forward - используем строго те параметры, которые нужны bot.forward_message
             forward_data = {
@@ -440,14 +887,14 @@ class MessageService:
                 )
 
             # Теперь используем обертку
-            await self.message_queue.add_message({
+            delivery = await self.message_queue.add_message({
                 'callback': forward_wrapper,
                 'message_id': unique_message_id,  # для трекинга
                 'chat_id': params['chat_id'],
                 'from_chat_id': message.chat.id,
                 'forward_message_id': message.message_id,  # используем другое имя!
                 'message_thread_id': params.get('message_thread_id')
-            })
+            }, priority=priority)
 
             logger.info(
                 f"Queued message forward from {message.chat.id}/{message.message_id} "
@@ -456,7 +903,10 @@ class MessageService:
 
             self.stats['total_forwarded'] += 1
 
-            return None
+            if not wait:
+                return delivery
+            return await self._await_delivery(
+                delivery, f"forward of {message.chat.id}/{message.message_id} to {to_endpoint.type}/{to_endpoint.id}")
 
         except Exception as e:
             self.stats['total_failed'] += 1
@@ -512,15 +962,15 @@ class MessageService:
         """
         return {
             **self.stats,
-            'queue_size': len(self.message_queue.queue),
-            'queue_active': self.message_queue.processing,
-            'messages_sent_last_minute': len(self.message_queue.sent_in_last_minute)
+            **self.message_queue.get_stats(),
+            'queue_active': self.message_queue.processing
         }
 
     async def send_template_to_telegram_id(self, telegram_id: int,
                                          template_key: str, variables: Dict = None,
                                          media_id: str = None, edit_message_id: int = None,
-                                         priority: int = 0) -> Optional[Message]:
+                                         priority: int = MessagePriority.NOTIFICATION,
+                                         wait: bool = True) -> Union[Message, asyncio.Future, None]:
         """
         Send template to user by telegram ID without requiring a User object.
 
@@ -530,10 +980,12 @@ class MessageService:
             variables: Template variables
             media_id: Optional media ID
             edit_message_id: Optional message ID to edit
-            priority: Message priority (higher = more important)
+            priority: MessagePriority class (higher is sent first)
+            wait: Wait until the message is sent (False - return delivery future right away)
 
         Returns:
-            Message: Sent message or None on error
+            Message: Sent message or None on error.
+            With wait=False - future resolved with the sent Message (None if user not found).
         """
         with get_db_session_ctx() as session:
             user = session.query(User).filter_by(telegramID=telegram_id).first()
@@ -541,12 +993,15 @@ class MessageService:
                 logger.error(f"User with telegram ID {telegram_id} not found")
                 return None
 
-            # Теперь у нас есть активный объект User в рамках этой сессии
-            return await self.send_template_to_user(
-                user=user,
-                template_key=template_key,
-                variables=variables,
-                media_id=media_id,
-                edit_message_id=edit_message_id,
-                priority=priority
-            )
\ No newline at end of file
+            # Snapshot is all the queue needs, session can be closed before sending
+            snapshot = UserSnapshot.from_user(user)
+
+        return await self.send_template_to_user(
+            user=snapshot,
+            template_key=template_key,
+            variables=variables,
+            media_id=media_id,
+            edit_message_id=edit_message_id,
+            priority=priority,
+            wait=wait
+        )
\ No newline at end of file
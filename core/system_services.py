@@ -12,6 +12,8 @@ from typing import Dict, Any
 from config import Config
 from core.message_manager import MessageManager
 from core.templates import MessageTemplates
+from core.db import dispose_async_engines, shutdown_db_executors
+from core.di import get_service
 
 logger = logging.getLogger(__name__)
 
@@ -148,10 +150,25 @@ async def shutdown(signal_type, bot: Bot, dp: Dispatcher):
     logger.info("Stopping bot polling...")
     await dp.stop_polling()
 
+    logger.info("Flushing dialogue activity...")
+    try:
+        from services.dialogue_service import DialogueService
+        dialogue_service = get_service(DialogueService)
+        if dialogue_service:
+            await dialogue_service.stale_scheduler.stop()
+            await dialogue_service.topic_pool.stop()
+            await dialogue_service.activity_tracker.stop()
+    except Exception as e:
+        logger.error(f"Error flushing dialogue activity: {e}")
+
     logger.info("Closing bot session...")
     if bot.session:
         await bot.session.close()
 
+    logger.info("Closing async database engines...")
+    await dispose_async_engines()
+    shutdown_db_executors()
+
     logger.info("Bot shutdown complete")
 
 
@@ -1,4 +1,6 @@
 from typing import Optional, Dict, Tuple, List, Union, Any, Callable
+from dataclasses import dataclass
+from functools import lru_cache
 import logging
 from core.google_services import get_google_services
 from config import Config
@@ -9,12 +11,61 @@ from actions.loader import execute_preaction, execute_postaction
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class CompiledButton:
+    """Parsed button definition from template buttons string."""
+    kind: str  # 'callback', 'url' or 'webapp'
+    text: str
+    callback: Optional[str] = None
+    url: Optional[str] = None
+
+    @property
+    def is_static(self) -> bool:
+        """Button has no placeholders - formatting would not change it."""
+        return not any(
+            value and ('{' in value or '}' in value)
+            for value in (self.text, self.callback, self.url)
+        )
+
+
+@dataclass(frozen=True)
+class RepeatingGroup:
+    """Location of |rgroup:...| block in template text."""
+    full_template: str  # Whole block including |rgroup: and closing |
+    item_template: str  # Template repeated for every item
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """
+    Template row prepared once at load time.
+    Per-send work is limited to rgroup expansion and variable substitution.
+    """
+    state_key: str
+    lang: str
+    text: str  # Text with \\n already converted to newlines
+    text_rgroup: Optional[RepeatingGroup]
+    text_has_placeholders: bool
+    buttons: str
+    buttons_rgroup: Optional[RepeatingGroup]
+    button_rows: Tuple[Tuple[CompiledButton, ...], ...]
+    static_buttons: bool  # No placeholders in any button - keyboard can be reused
+    parse_mode: str
+    disable_preview: bool
+    media_type: str
+    media_id: str
+    pre_action: str
+    post_action: str
+
+
 class MessageTemplates:
     """
     Manager for message templates stored in Google Sheets.
     Handles loading, caching, and formatting templates.
     """
     _cache: Dict[Tuple[str, str], Dict] = {}
+    _compiled: Dict[Tuple[str, str], CompiledTemplate] = {}
+    _static_keyboards: Dict[Tuple[Tuple[str, str], ...], Optional[InlineKeyboardMarkup]] = {}
     _sheet_client = None
 
     @classmethod
@@ -47,7 +98,14 @@ class MessageTemplates:
                 } for row in rows
             }
 
+            new_compiled = {
+                key: MessageTemplates._compile_template(key, template)
+                for key, template in new_cache.items()
+            }
+
             MessageTemplates._cache = new_cache
+            MessageTemplates._compiled = new_compiled
+            MessageTemplates._static_keyboards = {}
             logger.info(f"Loaded {len(rows)} templates from Google Sheets")
         except Exception as e:
             logger.error(f"Error loading templates: {e}")
@@ -73,6 +131,67 @@ class MessageTemplates:
             return value.upper() in ("TRUE", "1", "YES")
         return False
 
+    @staticmethod
+    def _find_repeating_group(template_text: str) -> Optional[RepeatingGroup]:
+        """Find |rgroup:...| block in text."""
+        if not template_text:
+            return None
+
+        start = template_text.find('|rgroup:')
+        if start == -1:
+            return None
+
+        end = template_text.find('|', start + 8)
+        if end == -1:
+            return None
+
+        return RepeatingGroup(
+            full_template=template_text[start:end + 1],
+            item_template=template_text[start + 8:end]
+        )
+
+    @staticmethod
+    def _compile_template(key: Tuple[str, str], template: Dict) -> CompiledTemplate:
+        """Prepare template row for fast rendering."""
+        text = str(template['text']).replace('\\n', '\n')
+        buttons = template['buttons'] or ''
+        button_rows = MessageTemplates.compile_buttons(buttons)
+
+        return CompiledTemplate(
+            state_key=key[0],
+            lang=key[1],
+            text=text,
+            text_rgroup=MessageTemplates._find_repeating_group(text),
+            text_has_placeholders='{' in text or '}' in text,
+            buttons=buttons,
+            buttons_rgroup=MessageTemplates._find_repeating_group(buttons),
+            button_rows=button_rows,
+            static_buttons=all(button.is_static for row in button_rows for button in row),
+            parse_mode=template['parseMode'],
+            disable_preview=template['disablePreview'],
+            media_type=template['mediaType'],
+            media_id=template['mediaID'],
+            pre_action=template.get('preAction', ''),
+            post_action=template.get('postAction', '')
+        )
+
+    @classmethod
+    async def get_compiled_template(cls, state_key: str, lang: str = 'en') -> Optional[CompiledTemplate]:
+        """
+        Get compiled template by state key and language with fallback to English.
+
+        Args:
+            state_key: Template identifier
+            lang: Language code (default: 'en')
+
+        Returns:
+            CompiledTemplate or None if not found
+        """
+        if not cls._compiled:
+            await cls.load_templates()
+
+        return cls._compiled.get((state_key, lang)) or cls._compiled.get((state_key, 'en'))
+
     @staticmethod
     async def get_template(state_key: str, lang: str = 'en') -> Optional[Dict]:
         """
@@ -110,24 +229,22 @@ class MessageTemplates:
         Returns:
             tuple[str, Optional[str]]: (formatted text, formatted buttons in JSON)
         """
-        if not MessageTemplates._cache:
-            await MessageTemplates.load_templates()
-
-        template = MessageTemplates._cache.get((state_key, lang))
+        template = await MessageTemplates.get_compiled_template(state_key, lang)
         if not template:
-            template = MessageTemplates._cache.get((state_key, 'en'))
-            if not template:
-                logger.error(
-                    f"Template not found in cache: {state_key}. Cache keys: {list(MessageTemplates._cache.keys())}")  # Добавить эту строку
-                raise ValueError(f"Template not found: {state_key}")
+            logger.error(
+                f"Template not found in cache: {state_key}. Cache keys: {list(MessageTemplates._compiled.keys())}")
+            raise ValueError(f"Template not found: {state_key}")
 
-        text = template['text'].replace('\\n', '\n')
-        buttons = template['buttons']
+        text = template.text
+        buttons = template.buttons
 
         if 'rgroup' in variables:
-            text = MessageTemplates.process_repeating_group(text, variables['rgroup'])
-            if buttons:
-                buttons = MessageTemplates.process_repeating_group(buttons, variables['rgroup'])
+            if template.text_rgroup:
+                text = MessageTemplates._expand_repeating_group(text, template.text_rgroup, variables['rgroup'])
+            if template.buttons_rgroup:
+                buttons = MessageTemplates._expand_repeating_group(
+                    buttons, template.buttons_rgroup, variables['rgroup']
+                )
 
         formatted_text = text.format_map(SafeDict(variables))
         if buttons:
@@ -193,133 +310,156 @@ class MessageTemplates:
         return template.format_map(SafeDict(formatted_vars))
 
     @staticmethod
-    def create_keyboard(buttons_str: str, variables: dict = None) -> Optional[InlineKeyboardMarkup]:
+    @lru_cache(maxsize=1024)
+    def compile_buttons(buttons_str: str) -> Tuple[Tuple[CompiledButton, ...], ...]:
         """
-        Creates keyboard object from configuration string with variable support.
-        Supports both scalar and sequence variables, applying sequence values in order.
-        Now uses enhanced_sequence_format for maximum flexibility.
+        Parses buttons configuration string into rows of button definitions.
+        Result is cached, so repeated strings are parsed only once.
 
         Args:
             buttons_str: String defining buttons structure
+
+        Returns:
+            Tuple of button rows
+        """
+        if not buttons_str or not buttons_str.strip():
+            return ()
+
+        compiled_rows = []
+
+        for row in buttons_str.split('\n'):
+            if not row.strip():
+                continue
+
+            button_row = []
+
+            for button in row.split(';'):
+                button = button.strip()
+                if not button or ':' not in button:
+                    continue
+
+                # Special handling for webapp and url buttons
+                if '|webapp|' in button:
+                    # Format: |webapp|http://example.com:Button text
+                    webapp_parts = button.split(':', 1)
+                    webapp_url_part = webapp_parts[0].strip()
+
+                    if webapp_url_part.startswith('|webapp|'):
+                        url = webapp_url_part[8:]
+                        if not url.startswith(('http://', 'https://')):
+                            url = 'https://' + url
+
+                        button_text = webapp_parts[1].strip() if len(webapp_parts) > 1 else "Open WebApp"
+                        button_row.append(CompiledButton(kind='webapp', text=button_text, url=url))
+                        continue
+
+                elif '|url|' in button:
+                    # Format: |url|example.com:Button text
+                    url_parts = button.split(':', 1)
+                    url_part = url_parts[0].strip()
+
+                    if url_part.startswith('|url|'):
+                        url = url_part[5:]
+                        if not url.startswith(('http://', 'https://')):
+                            url = 'http://' + url
+
+                        button_text = url_parts[1].strip() if len(url_parts) > 1 else "Open URL"
+                        button_row.append(CompiledButton(kind='url', text=button_text, url=url))
+                        continue
+
+                # Standard callback buttons
+                callback, text = button.split(':', 1)
+                button_row.append(CompiledButton(kind='callback', text=text.strip(), callback=callback.strip()))
+
+            if button_row:
+                compiled_rows.append(tuple(button_row))
+
+        return tuple(compiled_rows)
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _build_static_button(button: CompiledButton) -> Optional[InlineKeyboardButton]:
+        """Creates button object for button without placeholders once and reuses it."""
+        return MessageTemplates._render_button(button, None, 0)
+
+    @staticmethod
+    def _render_button(button: CompiledButton, variables: Optional[dict],
+                       sequence_index: int) -> Optional[InlineKeyboardButton]:
+        """Creates button object from compiled definition, substituting variables."""
+        if variables and button.is_static:
+            return MessageTemplates._build_static_button(button)
+
+        if button.kind in ('webapp', 'url'):
+            button_text, url = button.text, button.url
+
+            if variables:
+                try:
+                    button_text = button_text.format_map(SafeDict(variables))
+                    if '{' in url:
+                        url = url.format_map(SafeDict(variables))
+                except Exception as e:
+                    logger.error(f"Error formatting {button.kind} button: {e}")
+                    return None
+
+            try:
+                if button.kind == 'webapp':
+                    return InlineKeyboardButton(text=button_text, web_app=WebAppInfo(url=url))
+                # Create URL button (aiogram 3.x style)
+                return InlineKeyboardButton(text=button_text, url=url)
+            except Exception as e:
+                logger.error(f"Error creating {button.kind} button: {e}")
+                return None
+
+        text, callback = button.text, button.callback
+
+        # Format both callback and text with variables if provided
+        if variables:
+            try:
+                # Используем enhanced_sequence_format для максимальной гибкости
+                text = MessageTemplates.enhanced_sequence_format(text, variables, sequence_index)
+                callback = MessageTemplates.enhanced_sequence_format(callback, variables, sequence_index)
+            except Exception as e:
+                logger.error(f"Error formatting callback button: {e}")
+                return None
+
+        try:
+            return InlineKeyboardButton(text=text, callback_data=callback)
+        except Exception as e:
+            logger.error(f"Error creating callback button: {e}")
+            return None
+
+    @staticmethod
+    def render_keyboard(button_rows: Tuple[Tuple[CompiledButton, ...], ...],
+                        variables: dict = None) -> Optional[InlineKeyboardMarkup]:
+        """
+        Creates keyboard object from compiled button rows.
+
+        Args:
+            button_rows: Rows from compile_buttons
             variables: Optional dictionary with variables for substitution
 
         Returns:
             InlineKeyboardMarkup or None if no valid buttons
         """
-        if not buttons_str or not buttons_str.strip():
+        if not button_rows:
             return None
 
         try:
             keyboard_buttons = []
-            rows = buttons_str.split('\n')
             sequence_index = 0
 
-            for row in rows:
-                if not row.strip():
-                    continue
-
+            for row in button_rows:
                 button_row = []
-                buttons = row.split(';')
 
-                for button in buttons:
-                    button = button.strip()
-                    if not button or ':' not in button:
-                        continue
+                for button in row:
+                    keyboard_button = MessageTemplates._render_button(button, variables, sequence_index)
 
-                    # Special handling for webapp and url buttons
-                    if '|webapp|' in button:
-                        # Format: |webapp|http://example.com:Button text
-                        webapp_parts = button.split(':', 1)
-                        webapp_url_part = webapp_parts[0].strip()
-                        button_text = webapp_parts[1].strip() if len(webapp_parts) > 1 else "Open WebApp"
+                    # Sequence variables are consumed by callback buttons in order
+                    if button.kind == 'callback' and variables:
+                        sequence_index += 1
 
-                        if webapp_url_part.startswith('|webapp|'):
-                            url = webapp_url_part[8:]
-
-                            if not url.startswith(('http://', 'https://')):
-                                url = 'https://' + url
-
-                            if variables:
-                                try:
-                                    button_text = button_text.format_map(SafeDict(variables))
-                                    if '{}' in url or '{' in url:
-                                        url = url.format_map(SafeDict(variables))
-                                except Exception as e:
-                                    logger.error(f"Error formatting webapp button: {e}")
-                                    continue
-
-                            try:
-                                button_row.append(
-                                    InlineKeyboardButton(
-                                        text=button_text,
-                                        web_app=WebAppInfo(url=url)
-                                    )
-                                )
-                                continue
-                            except Exception as e:
-                                logger.error(f"Error creating webapp button: {e}")
-
-                    elif '|url|' in button:
-                        # Format: |url|example.com:Button text
-                        url_parts = button.split(':', 1)
-                        url_part = url_parts[0].strip()
-                        button_text = url_parts[1].strip() if len(url_parts) > 1 else "Open URL"
-
-                        if url_part.startswith('|url|'):
-                            url = url_part[5:]
-
-                            if not url.startswith(('http://', 'https://')):
-                                url = 'http://' + url
-
-                            if variables:
-                                try:
-                                    button_text = button_text.format_map(SafeDict(variables))
-                                    if '{}' in url or '{' in url:
-                                        url = url.format_map(SafeDict(variables))
-                                except Exception as e:
-                                    logger.error(f"Error formatting url button: {e}")
-                                    continue
-
-                            try:
-                                # Create URL button (aiogram 3.x style)
-                                button_row.append(
-                                    InlineKeyboardButton(
-                                        text=button_text,
-                                        url=url
-                                    )
-                                )
-                                continue  # Skip to next button
-                            except Exception as e:
-                                logger.error(f"Error creating url button: {e}")
-
-                    # Standard callback buttons
-                    callback, text = button.split(':', 1)
-                    callback, text = callback.strip(), text.strip()
-
-                    # Format both callback and text with variables if provided
-                    if variables:
-                        try:
-                            # Используем enhanced_sequence_format для максимальной гибкости
-                            text = MessageTemplates.enhanced_sequence_format(
-                                text, variables, sequence_index
-                            )
-                            callback = MessageTemplates.enhanced_sequence_format(
-                                callback, variables, sequence_index
-                            )
-                            sequence_index += 1
-                        except Exception as e:
-                            logger.error(f"Error formatting callback button: {e}")
-                            continue
-
-                    try:
-                        button_row.append(
-                            InlineKeyboardButton(
-                                text=text,
-                                callback_data=callback
-                            )
-                        )
-                    except Exception as e:
-                        logger.error(f"Error creating callback button: {e}")
+                    if keyboard_button:
+                        button_row.append(keyboard_button)
 
                 if button_row:
                     keyboard_buttons.append(button_row)
@@ -331,6 +471,25 @@ class MessageTemplates:
             logger.error(f"Error creating keyboard: {e}")
             return None
 
+    @staticmethod
+    def create_keyboard(buttons_str: str, variables: dict = None) -> Optional[InlineKeyboardMarkup]:
+        """
+        Creates keyboard object from configuration string with variable support.
+        Supports both scalar and sequence variables, applying sequence values in order.
+        Now uses enhanced_sequence_format for maximum flexibility.
+
+        Args:
+            buttons_str: String defining buttons structure
+            variables: Optional dictionary with variables for substitution
+
+        Returns:
+            InlineKeyboardMarkup or None if no valid buttons
+        """
+        if not buttons_str or not buttons_str.strip():
+            return None
+
+        return MessageTemplates.render_keyboard(MessageTemplates.compile_buttons(buttons_str), variables)
+
     @staticmethod
     async def execute_preaction(preaction_name: str, user, context: dict) -> dict:
         """
@@ -409,33 +568,32 @@ class MessageTemplates:
         Returns:
             Processed text with repeating groups expanded
         """
-        start = template_text.find('|rgroup:')
-        if start == -1:
+        rgroup = MessageTemplates._find_repeating_group(template_text)
+        if not rgroup:
             return template_text
 
-        end = template_text.find('|', start + 8)
-        if end == -1:
-            return template_text
-
-        item_template = template_text[start + 8:end]
-        full_template = template_text[start:end + 1]
+        return MessageTemplates._expand_repeating_group(template_text, rgroup, rgroup_data)
 
+    @staticmethod
+    def _expand_repeating_group(template_text: str, rgroup: RepeatingGroup,
+                                rgroup_data: Dict[str, List[Any]]) -> str:
+        """Expands already located repeating group with data."""
         if not rgroup_data or not all(rgroup_data.values()):
-            return template_text.replace(full_template, '')
+            return template_text.replace(rgroup.full_template, '')
 
         # Check that all arrays in rgroup_data have the same length
         lengths = {len(arr) for arr in rgroup_data.values()}
         if len(lengths) != 1:
             logger.warning(f"Inconsistent lengths in rgroup data: {lengths}")
-            return template_text.replace(full_template, '')
+            return template_text.replace(rgroup.full_template, '')
 
         result = []
         for i in range(next(iter(lengths))):
             item_data = {key: values[i] for key, values in rgroup_data.items()}
             # Используем SafeDict для обратной совместимости с rgroup
-            result.append(item_template.format_map(SafeDict(item_data)))
+            result.append(rgroup.item_template.format_map(SafeDict(item_data)))
 
-        return template_text.replace(full_template, '\n'.join(result))
+        return template_text.replace(rgroup.full_template, '\n'.join(result))
 
     @classmethod
     async def generate_screen(
@@ -467,11 +625,11 @@ class MessageTemplates:
 
         templates = []
         # Load cache if needed
-        if not cls._cache:
+        if not cls._compiled:
             await cls.load_templates()
 
         for key in state_keys:
-            template = cls._cache.get((key, user.lang)) or cls._cache.get((key, 'en'))
+            template = cls._compiled.get((key, user.lang)) or cls._compiled.get((key, 'en'))
             if not template:
                 logger.warning(f"Template not found for state {key}")
                 continue
@@ -479,7 +637,7 @@ class MessageTemplates:
 
         if not templates:
             # Try to get fallback template
-            fallback = cls._cache.get(('fallback', user.lang)) or cls._cache.get(('fallback', 'en'))
+            fallback = cls._compiled.get(('fallback', user.lang)) or cls._compiled.get(('fallback', 'en'))
             if fallback:
                 templates = [fallback]
             else:
@@ -488,37 +646,44 @@ class MessageTemplates:
 
         try:
             texts = []
-            buttons_list = []
+            button_rows = []
             format_vars = (variables or {}).copy()
 
             # Добавляем user в контекст для прямого доступа к его атрибутам
             format_vars['user'] = user
 
             for template in templates:
-                text = template['text'].replace('\\n', '\n')
+                text = template.text
 
-                if 'rgroup' in format_vars:
-                    text = cls.process_repeating_group(text, format_vars['rgroup'])
+                if 'rgroup' in format_vars and template.text_rgroup:
+                    text = cls._expand_repeating_group(text, template.text_rgroup, format_vars['rgroup'])
+                    text = text.format_map(SafeDict(format_vars))
+                elif template.text_has_placeholders:
+                    # Используем SafeDict вместо AdvancedSafeDict
+                    text = text.format_map(SafeDict(format_vars))
 
-                # Используем SafeDict вместо AdvancedSafeDict
-                text = text.format_map(SafeDict(format_vars))
                 texts.append(text)
-
-                if template['buttons']:
-                    buttons_list.append(template['buttons'])
+                button_rows.extend(template.button_rows)
 
             final_text = '\n\n'.join(text for text in texts if text)
-            merged_buttons = cls.merge_buttons(buttons_list)
-            keyboard = cls.create_keyboard(merged_buttons, variables=format_vars)
+
+            if all(template.static_buttons for template in templates):
+                # Keyboard doesn't depend on variables - build once per template set
+                keyboard_key = tuple((template.state_key, template.lang) for template in templates)
+                if keyboard_key not in cls._static_keyboards:
+                    cls._static_keyboards[keyboard_key] = cls.render_keyboard(tuple(button_rows))
+                keyboard = cls._static_keyboards[keyboard_key]
+            else:
+                keyboard = cls.render_keyboard(tuple(button_rows), variables=format_vars)
 
             first_template = templates[0]
-            media_id = first_template['mediaID'] if first_template.get('mediaType') != 'None' else None
-            parse_mode = first_template['parseMode']
+            media_id = first_template.media_id if first_template.media_type != 'None' else None
+            parse_mode = first_template.parse_mode
 
-            disable_preview = first_template['disablePreview']
+            disable_preview = first_template.disable_preview
 
-            pre_action = first_template.get('preAction', '') if first_template.get('preAction') else None
-            post_action = first_template.get('postAction', '') if first_template.get('postAction') else None
+            pre_action = first_template.pre_action or None
+            post_action = first_template.post_action or None
 
             return final_text, media_id, keyboard, parse_mode, disable_preview, pre_action, post_action
 
@@ -9,12 +9,16 @@ Usage examples:
 """
 import logging
 import functools
-from typing import Callable, Any, Union
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Callable, Any, Union, Optional, Tuple
 from aiogram import BaseMiddleware, Router
 from aiogram.types import Message, CallbackQuery, TelegramObject
 from sqlalchemy.orm import Session
 
-from core.db import get_helpbot_session, get_mainbot_session
+from core.db import get_helpbot_session, get_mainbot_session, run_db_session, DatabaseType
 from models.user import User, UserType
 from models.mainbot.user import User as MainbotUser
 from core.message_manager import MessageManager
@@ -22,6 +26,87 @@ from config import Config
 
 logger = logging.getLogger(__name__)
 
+# Request-scoped slot: user resolved by UserMiddleware for the current update,
+# reused by @with_user instead of resolving the same user again
+_current_resolution: ContextVar[Optional[tuple]] = ContextVar("current_user_resolution", default=None)
+
+
+class UserResolutionCache:
+    """
+    Bounded TTL cache of resolved users keyed by telegram_id.
+
+    Keeps the mainbot identity (detached mainbot User) and the helpbot user primary key,
+    so a cache hit skips the mainbot query and loads the helpbot user by primary key.
+    Only successful resolutions are cached - rejected users are re-checked every time.
+    """
+
+    _entries: "OrderedDict[int, Tuple[float, int, MainbotUser]]" = OrderedDict()
+    _hits = 0
+    _misses = 0
+
+    @classmethod
+    def _ttl(cls) -> float:
+        return float(Config.get(Config.USER_CACHE_TTL, "60"))
+
+    @classmethod
+    def _max_size(cls) -> int:
+        return int(Config.get(Config.USER_CACHE_SIZE, "5000"))
+
+    @classmethod
+    def get(cls, telegram_id: int) -> Optional[Tuple[int, MainbotUser]]:
+        """
+        Get cached (helpbot user ID, mainbot user) for telegram_id.
+
+        Returns:
+            Tuple or None if not cached or expired
+        """
+        entry = cls._entries.get(telegram_id)
+        if entry is None:
+            cls._misses += 1
+            return None
+
+        stored_at, helpbot_user_id, mainbot_user = entry
+        if time.monotonic() - stored_at > cls._ttl():
+            del cls._entries[telegram_id]
+            cls._misses += 1
+            return None
+
+        cls._entries.move_to_end(telegram_id)
+        cls._hits += 1
+        return helpbot_user_id, mainbot_user
+
+    @classmethod
+    def put(cls, telegram_id: int, helpbot_user_id: int, mainbot_user: MainbotUser) -> None:
+        """Store resolved user, evicting least recently used entries over the size limit."""
+        cls._entries[telegram_id] = (time.monotonic(), helpbot_user_id, mainbot_user)
+        cls._entries.move_to_end(telegram_id)
+
+        max_size = cls._max_size()
+        while len(cls._entries) > max_size:
+            cls._entries.popitem(last=False)
+
+    @classmethod
+    def invalidate(cls, telegram_id: int) -> None:
+        """Drop cached user - call after changing user type, operator status or language."""
+        if cls._entries.pop(telegram_id, None) is not None:
+            logger.debug(f"[USER_CACHE] Invalidated user {telegram_id}")
+
+    @classmethod
+    def clear(cls) -> None:
+        """Drop all cached users."""
+        cls._entries.clear()
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        """Get cache statistics."""
+        total = cls._hits + cls._misses
+        return {
+            'size': len(cls._entries),
+            'hits': cls._hits,
+            'misses': cls._misses,
+            'hit_ratio': cls._hits / total if total else 0.0
+        }
+
 
 class UserMiddleware(BaseMiddleware):
     """
@@ -42,7 +127,7 @@ class UserMiddleware(BaseMiddleware):
         with get_helpbot_session() as session:
             try:
                 if isinstance(event, (Message, CallbackQuery)):
-                    user, user_type, mainbot_user = get_or_create_user(event, session)
+                    user, user_type, mainbot_user = await get_or_create_user_async(event, session)
 
                     if not user:
                         # User not found and not authorized
@@ -65,7 +150,13 @@ class UserMiddleware(BaseMiddleware):
                     data["message_manager"] = MessageManager(self.bot)
                     data["bot"] = self.bot
 
-                    return await handler(event, data)
+                    token = _current_resolution.set(
+                        (user.telegramID, user, user_type, mainbot_user, session)
+                    )
+                    try:
+                        return await handler(event, data)
+                    finally:
+                        _current_resolution.reset(token)
                 else:
                     return await handler(event, data)
 
@@ -87,14 +178,23 @@ class UserMiddleware(BaseMiddleware):
                 raise
 
 
-def get_or_create_user(update: Union[Message, CallbackQuery], session: Session):
-    telegram_id = update.from_user.id
+def _get_cached_user(telegram_id: int, session: Session):
+    """Get recently resolved user from cache, loading helpbot user into session."""
+    cached = UserResolutionCache.get(telegram_id)
+    if cached:
+        helpbot_user_id, mainbot_user = cached
+        helpbot_user = session.get(User, helpbot_user_id)
+        if helpbot_user:
+            return helpbot_user, helpbot_user.user_type, mainbot_user
+        UserResolutionCache.invalidate(telegram_id)
+    return None
 
-    # СНАЧАЛА проверяем mainbot - это обязательно для ВСЕХ
-    mainbot_user = None
-    with get_mainbot_session() as mainbot_session:
-        mainbot_user = mainbot_session.query(MainbotUser).filter_by(telegramID=telegram_id).first()
 
+def _find_mainbot_user(telegram_id: int, mainbot_session: Session):
+    return mainbot_session.query(MainbotUser).filter_by(telegramID=telegram_id).first()
+
+
+def _get_or_create_helpbot_user(telegram_id: int, mainbot_user, session: Session):
     # НЕТ в mainbot = НЕТ доступа, точка!
     if not mainbot_user:
         logger.warning(f"REJECTED: User {telegram_id} not found in mainbot")
@@ -123,9 +223,45 @@ def get_or_create_user(update: Union[Message, CallbackQuery], session: Session):
         session.commit()
         logger.info(f"Created helpbot user {telegram_id} from mainbot user {mainbot_user.userID}")
 
+    UserResolutionCache.put(telegram_id, helpbot_user.userID, mainbot_user)
+
     return helpbot_user, helpbot_user.user_type, mainbot_user
 
 
+def get_or_create_user(update: Union[Message, CallbackQuery], session: Session):
+    telegram_id = update.from_user.id
+
+    # Быстрый путь - пользователь недавно уже проверялся
+    cached = _get_cached_user(telegram_id, session)
+    if cached:
+        return cached
+
+    # СНАЧАЛА проверяем mainbot - это обязательно для ВСЕХ
+    with get_mainbot_session() as mainbot_session:
+        mainbot_user = _find_mainbot_user(telegram_id, mainbot_session)
+
+    return _get_or_create_helpbot_user(telegram_id, mainbot_user, session)
+
+
+async def get_or_create_user_async(update: Union[Message, CallbackQuery], session: Session):
+    """
+    Same as get_or_create_user, but the mainbot lookup goes through run_db_session,
+    so in DB_ASYNC_MODE a slow mainbot query doesn't block the event loop.
+    """
+    telegram_id = update.from_user.id
+
+    cached = _get_cached_user(telegram_id, session)
+    if cached:
+        return cached
+
+    mainbot_user = await run_db_session(
+        functools.partial(_find_mainbot_user, telegram_id),
+        DatabaseType.MAINBOT
+    )
+
+    return _get_or_create_helpbot_user(telegram_id, mainbot_user, session)
+
+
 def with_user(require_mainbot: bool = False, staff_only: bool = False):
     """
     Decorator for handlers to automatically get user, session, and message_manager.
@@ -153,10 +289,22 @@ def with_user(require_mainbot: bool = False, staff_only: bool = False):
     def decorator(handler):
         @functools.wraps(handler)
         async def wrapper(event: TelegramObject, *args, **kwargs):
-            with get_helpbot_session() as session:
+            # Reuse user already resolved by UserMiddleware for this update
+            resolution = _current_resolution.get()
+            if resolution and not (
+                    isinstance(event, (Message, CallbackQuery)) and resolution[0] == event.from_user.id
+            ):
+                resolution = None
+
+            session_ctx = nullcontext(resolution[4]) if resolution else get_helpbot_session()
+
+            with session_ctx as session:
                 try:
                     if isinstance(event, (Message, CallbackQuery)):
-                        user, user_type, mainbot_user = get_or_create_user(event, session)
+                        if resolution:
+                            _, user, user_type, mainbot_user, _ = resolution
+                        else:
+                            user, user_type, mainbot_user = await get_or_create_user_async(event, session)
 
                         if not user:
                             return
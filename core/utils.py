@@ -1,9 +1,12 @@
 """
 Utility functions and classes shared across the application.
 """
+import asyncio
+import heapq
 import logging
+import time
 from datetime import datetime
-from typing import Optional, Union, Any
+from typing import Optional, Union, Any, Awaitable, Callable, Dict, Hashable, List, Set, Tuple
 from aiogram.types import Message, CallbackQuery
 from aiogram.exceptions import TelegramAPIError
 
@@ -198,3 +201,220 @@ def clean_str(value: Any) -> str:
     if value is None:
         return ""
     return str(value).strip()
+
+
+class TokenBucket:
+    """
+    Asynchronous token bucket rate limiter.
+
+    Tokens are refilled continuously at `rate` per second up to `capacity`,
+    so short bursts are allowed while the long-term rate stays bounded.
+    Waiters are served in FIFO order.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens (burst size)
+        """
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("TokenBucket rate and capacity must be positive")
+
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    @property
+    def available(self) -> float:
+        """Tokens that can be taken right now."""
+        self._refill()
+        return self._tokens
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """Seconds until `tokens` can be taken (0 if available now)."""
+        self._refill()
+        return max(0.0, (tokens - self._tokens) / self.rate)
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """
+        Take tokens without waiting.
+
+        Returns:
+            True if tokens were taken, False if bucket doesn't have enough
+        """
+        if self._lock.locked():
+            # Someone is already waiting - don't jump the queue
+            return False
+
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    def consume(self, tokens: float) -> None:
+        """
+        Take tokens without waiting, letting the balance go negative.
+
+        Used to account for cost known only afterwards or to back off after
+        the remote side reported a rate limit; negative tokens are a debt that
+        following acquire() calls wait out. Negative value returns tokens.
+        """
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens - tokens)
+
+    def pause(self, seconds: float) -> None:
+        """Make the next token available no sooner than in `seconds` (e.g. after Telegram RetryAfter)."""
+        self._refill()
+        self._tokens = min(self._tokens, 1.0 - seconds * self.rate)
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Wait until tokens are available and take them.
+
+        Args:
+            tokens: Number of tokens to take (can't exceed capacity)
+
+        Returns:
+            Seconds spent waiting
+        """
+        tokens = min(float(tokens), self.capacity)
+        started_at = time.monotonic()
+
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return time.monotonic() - started_at
+
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class DeadlineScheduler:
+    """
+    In-process scheduler firing a callback when a key's deadline passes.
+
+    Deadlines live in a heap; re-arming a key pushes a new entry and the
+    superseded one is skipped when it reaches the top, so arm() and cancel()
+    are O(log n) / O(1) and nothing is scanned periodically. The worker sleeps
+    exactly until the nearest deadline.
+    """
+
+    def __init__(self, callback: Callable[[Hashable], Awaitable[Any]], name: str = "deadline"):
+        """
+        Args:
+            callback: Coroutine function called with the key when its deadline passes
+            name: Name used in log messages
+        """
+        self.callback = callback
+        self.name = name
+        self._deadlines: Dict[Hashable, float] = {}  # key -> current deadline (epoch seconds)
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._seq = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._deadlines
+
+    def arm(self, key: Hashable, deadline: Union[datetime, float]) -> None:
+        """Set (or move) the deadline of a key."""
+        if isinstance(deadline, datetime):
+            deadline = deadline.timestamp()
+
+        self._deadlines[key] = deadline
+        self._seq += 1
+        heapq.heappush(self._heap, (deadline, self._seq, key))
+
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._compact()
+
+        # Worker only needs to wake up if the nearest deadline moved closer
+        if self._heap[0][2] == key:
+            self._wakeup.set()
+
+    def cancel(self, key: Hashable) -> bool:
+        """Forget a key; returns False if it wasn't armed."""
+        return self._deadlines.pop(key, None) is not None
+
+    def get_deadline(self, key: Hashable) -> Optional[float]:
+        """Current deadline of a key (epoch seconds) or None."""
+        return self._deadlines.get(key)
+
+    def start(self) -> None:
+        """Start the worker (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the worker; armed deadlines are kept."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _compact(self) -> None:
+        self._heap = [
+            entry for entry in self._heap
+            if self._deadlines.get(entry[2]) == entry[0]
+        ]
+        heapq.heapify(self._heap)
+
+    def _pop_due(self, now: float) -> List[Hashable]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, _, key = heapq.heappop(self._heap)
+            if self._deadlines.get(key) == deadline:
+                del self._deadlines[key]
+                due.append(key)
+        return due
+
+    def _next_delay(self, now: float) -> Optional[float]:
+        # Drop superseded entries from the top first
+        while self._heap and self._deadlines.get(self._heap[0][2]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return max(0.0, self._heap[0][0] - now) if self._heap else None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                now = time.time()
+                for key in self._pop_due(now):
+                    task = asyncio.create_task(self._fire(key))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+
+                self._wakeup.clear()
+                delay = self._next_delay(time.time())
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[{self.name.upper()}] Scheduler error: {e}", exc_info=True)
+                await asyncio.sleep(1)
+
+    async def _fire(self, key: Hashable) -> None:
+        try:
+            await self.callback(key)
+        except Exception as e:
+            logger.error(f"[{self.name.upper()}] Deadline callback failed for {key}: {e}", exc_info=True)
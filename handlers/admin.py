@@ -15,7 +15,7 @@ from sqlalchemy import func
 
 from core.templates import MessageTemplates
 from core.message_manager import MessageManager
-from core.user_decorator import with_user
+from core.user_decorator import with_user, UserResolutionCache
 from config import Config
 from models.dialogue import Dialogue
 from models.user import User, UserType
@@ -262,6 +262,8 @@ async def handle_add_operator(message: Message, user, user_type, mainbot_user, s
             session.commit()
             template_key = "/admin/operator_added"
 
+        UserResolutionCache.invalidate(telegram_id)
+
         await message_manager.send_template(
             user=user,
             template_key=template_key,
@@ -319,6 +321,7 @@ async def handle_remove_operator(message: Message, user, user_type, mainbot_user
                 target_user.user_type = UserType.CLIENT  # Downgrade to client
                 session.commit()
                 template_key = "/admin/operator_removed"
+                UserResolutionCache.invalidate(telegram_id)
 
         await message_manager.send_template(
             user=user,
@@ -680,6 +683,103 @@ async def handle_cleanup_zombies(message: Message, user, user_type, mainbot_user
 
 # === Statistics Commands ===
 
+@admin_router.message(F.text == '&dbstats')
+@with_user(staff_only=True)
+async def handle_db_stats(message: Message, user, user_type, mainbot_user, session,
+                          message_manager: MessageManager):
+    """Show DB executor pool saturation metrics."""
+    try:
+        from core.db import get_db_executor_stats
+
+        executor_stats = get_db_executor_stats()
+
+        message_text = "🗄 <b>DB Executor Statistics</b>\n"
+        if not executor_stats:
+            message_text += "\nNo DB work has been offloaded yet\n"
+
+        for db_name, stats in executor_stats.items():
+            message_text += f"\n<b>{db_name}</b>\n"
+            message_text += f"Workers: {stats['active']}/{stats['max_workers']} busy ({stats['saturation']:.0%})\n"
+            message_text += f"Queued: {stats['queued']}\n"
+            message_text += f"Completed: {stats['completed']} (failed: {stats['failed']})\n"
+            message_text += f"Wait: avg {stats['avg_wait_ms']:.1f} ms, max {stats['max_wait_ms']:.1f} ms\n"
+            message_text += f"Run: avg {stats['avg_run_ms']:.1f} ms\n"
+
+        await message.answer(message_text, parse_mode="HTML")
+
+    except Exception as e:
+        logger.error(f"Error in db_stats command: {e}", exc_info=True)
+        await message_manager.send_template(
+            user=user,
+            template_key="/admin/error",
+            update=message,
+            variables={
+                "session": session,
+                "error": str(e),
+                "command": "dbstats"
+            }
+        )
+
+
+@admin_router.message(F.text == '&aistats')
+@with_user(staff_only=True)
+async def handle_ai_stats(message: Message, user, user_type, mainbot_user, session,
+                          message_manager: MessageManager):
+    """Show translation cache, circuit breaker and Claude rate limiter statistics."""
+    try:
+        from core.di import get_service
+        from services.ai_middleware import TranslationCache
+        from services.dialogue_router import DialogueRouter
+
+        cache_stats = TranslationCache.get_stats()
+
+        message_text = "🤖 <b>AI Translation Statistics</b>\n"
+        message_text += "\n<b>Cache</b>\n"
+        message_text += f"Entries: {cache_stats['size']} (in flight: {cache_stats['in_flight']})\n"
+        message_text += f"Hits: {cache_stats['hits']} memory, {cache_stats['db_hits']} DB, " \
+                        f"{cache_stats['coalesced']} coalesced\n"
+        message_text += f"Misses: {cache_stats['misses']}\n"
+        message_text += f"Hit ratio: {cache_stats['hit_ratio']:.0%}\n"
+
+        dialogue_router = get_service(DialogueRouter)
+        if dialogue_router:
+            breaker_stats = dialogue_router.ai_middleware.circuit_breaker.get_stats()
+            message_text += "\n<b>Circuit breaker</b>\n"
+            message_text += f"State: {breaker_stats['state']}"
+            if breaker_stats['retry_in']:
+                message_text += f" (retry in {breaker_stats['retry_in']:.0f}s)"
+            message_text += f"\nConsecutive failures: {breaker_stats['failures']}\n"
+            message_text += f"Opened: {breaker_stats['times_opened']} times, " \
+                            f"skipped calls: {breaker_stats['short_circuited']}\n"
+
+        rate_limiter = dialogue_router.ai_middleware.rate_limiter if dialogue_router else None
+        if rate_limiter:
+            limiter_stats = rate_limiter.get_stats()
+            message_text += "\n<b>Claude rate limiter</b>\n"
+            message_text += f"In flight: {limiter_stats['in_flight']}/{limiter_stats['max_concurrent']}, " \
+                            f"waiting: {limiter_stats['waiting']}\n"
+            message_text += f"Calls: {limiter_stats['acquired']}, rejected: {limiter_stats['rejected']}, " \
+                            f"429s: {limiter_stats['rate_limited']}\n"
+            message_text += f"Wait: avg {limiter_stats['avg_wait']:.2f}s, max {limiter_stats['max_wait']:.2f}s\n"
+            message_text += f"Available: {limiter_stats['requests_available']:.0f} requests, " \
+                            f"{limiter_stats['tokens_available']:.0f} tokens\n"
+
+        await message.answer(message_text, parse_mode="HTML")
+
+    except Exception as e:
+        logger.error(f"Error in ai_stats command: {e}", exc_info=True)
+        await message_manager.send_template(
+            user=user,
+            template_key="/admin/error",
+            update=message,
+            variables={
+                "session": session,
+                "error": str(e),
+                "command": "aistats"
+            }
+        )
+
+
 @admin_router.message(F.text == '&stats')
 @with_user(staff_only=True)
 async def handle_stats(message: Message, user, user_type, mainbot_user, session, message_manager: MessageManager):
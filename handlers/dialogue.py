@@ -308,13 +308,14 @@ async def notify_operators_about_ticket(ticket: Ticket, client_user: User, sessi
             logger.warning("No active operators available")
             return
 
-        # Send notification to each operator
+        # Queue notification to each operator, then collect sent messages
+        deliveries = []
         for operator, operator_user in operators:
             try:
                 # Send notification to operator's private chat
                 endpoint = DialogueEndpoint('user', operator_user.telegramID)
 
-                sent_message = await message_service.send_template_to_endpoint(
+                delivery = await message_service.send_template_to_endpoint(
                     endpoint=endpoint,
                     template_key="/support/new_ticket_notification",
                     variables={
@@ -325,20 +326,31 @@ async def notify_operators_about_ticket(ticket: Ticket, client_user: User, sessi
                         "error_code": ticket.error_code or "None",
                         "created_at": ticket.createdAt.strftime('%H:%M') if ticket.createdAt else 'Now',
                         "take_callback": f"/ticket/take/{ticket.ticketID}/{operator.operatorID}"
-                    }
+                    },
+                    wait=False
                 )
+                if delivery:
+                    deliveries.append((operator_user.telegramID, delivery))
+
+            except Exception as e:
+                logger.error(f"Failed to notify operator {operator_user.telegramID}: {e}")
+
+        ticket_id = ticket.ticketID
+        for operator_telegram_id, delivery in deliveries:
+            try:
+                sent_message = await delivery
 
                 # Store message ID for later deletion
                 if sent_message:
                     notification_manager.store_notification(
-                        ticket.ticketID,
-                        operator_user.telegramID,
+                        ticket_id,
+                        operator_telegram_id,
                         sent_message.message_id
                     )
-                    logger.info(f"Notified operator {operator_user.telegramID} about ticket #{ticket.ticketID}")
+                    logger.info(f"Notified operator {operator_telegram_id} about ticket #{ticket_id}")
 
             except Exception as e:
-                logger.error(f"Failed to notify operator {operator_user.telegramID}: {e}")
+                logger.error(f"Failed to notify operator {operator_telegram_id}: {e}")
 
     except Exception as e:
         logger.error(f"Error notifying operators: {e}", exc_info=True)
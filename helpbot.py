@@ -109,6 +109,8 @@ async def initialize_bot():
         await dialogue_service.start_stale_check_task()
         # Restore active dialogues after restart
         await dialogue_service.restore_active_dialogues()
+        # Pre-create forum topics so taking a ticket doesn't wait for one
+        await dialogue_service.topic_pool.start()
 
         logger.info("Dialogue system initialized successfully")
 
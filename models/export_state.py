@@ -0,0 +1,37 @@
+"""
+Export state model - incremental Google Sheets sync bookkeeping.
+"""
+from sqlalchemy import Column, Integer, String, Text, DateTime
+import datetime
+import json
+
+from models.base import Base
+
+
+class ExportState(Base):
+    """Per-worksheet watermark and row positions of exported records."""
+    __tablename__ = 'export_state'
+
+    sheetName = Column(String, primary_key=True)
+
+    # Highest exported updatedAt and IDs exported with exactly that value
+    watermark = Column(DateTime, nullable=True)
+    watermarkIDs = Column(Text, nullable=True)  # JSON array of record IDs
+
+    # Sheet row of every exported record
+    rowIndex = Column(Text, nullable=True)  # JSON object {record ID: row number}
+    nextRow = Column(Integer, nullable=True)  # First free row after the data
+
+    lastFullSync = Column(DateTime, nullable=True)
+    updatedAt = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+    def get_watermark_ids(self) -> list:
+        """Get IDs exported at the watermark timestamp."""
+        return json.loads(self.watermarkIDs) if self.watermarkIDs else []
+
+    def get_row_index(self) -> dict:
+        """Get mapping of record IDs to sheet rows."""
+        return json.loads(self.rowIndex) if self.rowIndex else {}
+
+    def __repr__(self):
+        return f"<ExportState(sheet='{self.sheetName}', watermark={self.watermark}, rows={self.nextRow})>"
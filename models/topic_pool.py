@@ -0,0 +1,20 @@
+"""
+Topic pool model - free forum topics waiting to be given to a dialogue.
+"""
+from sqlalchemy import Column, Integer, DateTime
+import datetime
+
+from models.base import Base
+
+
+class PooledTopic(Base):
+    """Forum topic created ahead of time (or recycled after close), not used by any dialogue."""
+    __tablename__ = 'topic_pool'
+
+    groupID = Column(Integer, primary_key=True)
+    threadID = Column(Integer, primary_key=True)
+
+    createdAt = Column(DateTime, default=datetime.datetime.utcnow)
+
+    def __repr__(self):
+        return f"<PooledTopic(group={self.groupID}, thread={self.threadID})>"
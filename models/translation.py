@@ -0,0 +1,26 @@
+"""
+Translation cache model - stores Claude translations of repeated texts.
+"""
+from sqlalchemy import Column, Integer, String, Text, DateTime
+import datetime
+
+from models.base import Base
+
+
+class TranslationCacheEntry(Base):
+    """Cached translation keyed by hash of normalized text, languages and prompt version."""
+    __tablename__ = 'translation_cache'
+
+    cacheKey = Column(String(64), primary_key=True)  # sha256 hex
+    sourceLang = Column(String, nullable=True)
+    targetLang = Column(String, nullable=False)
+    promptVersion = Column(String, nullable=False)
+
+    translated = Column(Text, nullable=False)
+    hitCount = Column(Integer, default=0)
+
+    createdAt = Column(DateTime, default=datetime.datetime.utcnow)
+    lastUsedAt = Column(DateTime, default=datetime.datetime.utcnow)
+
+    def __repr__(self):
+        return f"<TranslationCacheEntry(key={self.cacheKey[:12]}, {self.sourceLang}->{self.targetLang})>"
@@ -2,16 +2,463 @@
 AI Middleware for dialogue translation using Claude API.
 Handles automatic translation between users and operators with different languages.
 """
+import asyncio
+import hashlib
 import logging
 import json
-from typing import Optional, Dict
-from anthropic import AsyncAnthropic
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Dict, Callable, Awaitable, Any, Set
+from anthropic import AsyncAnthropic, RateLimitError
 from anthropic.types import MessageParam
 
 from config import Config
+from core.db import run_in_db_executor, DatabaseType
+from core.utils import TokenBucket
+from models.translation import TranslationCacheEntry
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_TRANSLATION_PROMPT = """You are a translation service. Your task is to ensure the message is in {target_name}.
+
+    Instructions:
+    1. If the message is already in {target_name}, output it unchanged
+    2. If the message is in any other language, translate it to {target_name}
+    3. Output ONLY the final text in {target_name}, no explanations
+
+    Message: {text}
+
+    Output in {target_name}:"""
+
+
+class TranslationCache:
+    """
+    Cache of translations keyed by (normalized text hash, source_lang, target_lang, prompt version).
+
+    In-memory LRU in front of optional translation_cache table (TRANSLATION_CACHE_PERSIST).
+    Concurrent requests for the same key share one in-flight Claude call.
+    Failed translations are never cached.
+    """
+
+    _entries: "OrderedDict[str, str]" = OrderedDict()
+    _in_flight: Dict[str, asyncio.Future] = {}
+    _hits = 0
+    _db_hits = 0
+    _coalesced = 0
+    _misses = 0
+
+    @classmethod
+    def _max_size(cls) -> int:
+        return int(Config.get(Config.TRANSLATION_CACHE_SIZE, "2000"))
+
+    @classmethod
+    def _persist_enabled(cls) -> bool:
+        value = Config.get(Config.TRANSLATION_CACHE_PERSIST, False)
+        return value is True or str(value).lower() == "true"
+
+    @staticmethod
+    def make_key(text: str, source_lang: str, target_lang: str, prompt_version: str) -> str:
+        """Build cache key; whitespace differences don't produce separate entries."""
+        normalized = " ".join(text.split())
+        text_hash = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        raw = f"{prompt_version}|{source_lang or ''}|{target_lang}|{text_hash}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @classmethod
+    async def get_or_translate(cls,
+                               key: str,
+                               source_lang: str,
+                               target_lang: str,
+                               prompt_version: str,
+                               translate: Callable[[], Awaitable[Optional[str]]]) -> Optional[str]:
+        """
+        Get cached translation or produce it with translate().
+
+        Args:
+            key: Key from make_key
+            source_lang: Source language code
+            target_lang: Target language code
+            prompt_version: Prompt version the key was built with
+            translate: Coroutine factory calling Claude, returns None on failure
+
+        Returns:
+            Translated text or None if translation failed
+        """
+        cached = cls._entries.get(key)
+        if cached is not None:
+            cls._entries.move_to_end(key)
+            cls._hits += 1
+            return cached
+
+        in_flight = cls._in_flight.get(key)
+        if in_flight is not None:
+            cls._coalesced += 1
+            # Shield: a cancelled follower must not cancel the shared call
+            return await asyncio.shield(in_flight)
+
+        future = asyncio.get_running_loop().create_future()
+        cls._in_flight[key] = future
+        result = None
+
+        try:
+            if cls._persist_enabled():
+                result = await cls._load(key)
+
+            if result is not None:
+                cls._db_hits += 1
+            else:
+                cls._misses += 1
+                result = await translate()
+                if result and cls._persist_enabled():
+                    await cls._store(key, source_lang, target_lang, prompt_version, result)
+
+            if result:
+                cls._put(key, result)
+            return result
+        finally:
+            # Followers get the result, or None if the call failed or was cancelled
+            if not future.done():
+                future.set_result(result)
+            cls._in_flight.pop(key, None)
+
+    @classmethod
+    def _put(cls, key: str, translated: str) -> None:
+        cls._entries[key] = translated
+        cls._entries.move_to_end(key)
+
+        max_size = cls._max_size()
+        while len(cls._entries) > max_size:
+            cls._entries.popitem(last=False)
+
+    @classmethod
+    async def _load(cls, key: str) -> Optional[str]:
+        def load(session):
+            entry = session.get(TranslationCacheEntry, key)
+            if not entry:
+                return None
+            entry.hitCount = (entry.hitCount or 0) + 1
+            entry.lastUsedAt = datetime.utcnow()
+            return entry.translated
+
+        try:
+            return await run_in_db_executor(load, DatabaseType.HELPBOT)
+        except Exception as e:
+            logger.warning(f"[TRANSLATION_CACHE] Failed to read cached translation: {e}")
+            return None
+
+    @classmethod
+    async def _store(cls, key: str, source_lang: str, target_lang: str, prompt_version: str, translated: str):
+        def store(session):
+            session.merge(TranslationCacheEntry(
+                cacheKey=key,
+                sourceLang=source_lang,
+                targetLang=target_lang,
+                promptVersion=prompt_version,
+                translated=translated
+            ))
+
+        try:
+            await run_in_db_executor(store, DatabaseType.HELPBOT)
+        except Exception as e:
+            logger.warning(f"[TRANSLATION_CACHE] Failed to store translation: {e}")
+
+    @classmethod
+    def clear(cls) -> None:
+        """Drop in-memory entries (persistent table is kept)."""
+        cls._entries.clear()
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        """Get cache statistics; coalesced requests count as hits - they didn't call Claude."""
+        total = cls._hits + cls._db_hits + cls._coalesced + cls._misses
+        saved = cls._hits + cls._db_hits + cls._coalesced
+        return {
+            'size': len(cls._entries),
+            'in_flight': len(cls._in_flight),
+            'hits': cls._hits,
+            'db_hits': cls._db_hits,
+            'coalesced': cls._coalesced,
+            'misses': cls._misses,
+            'hit_ratio': saved / total if total else 0.0
+        }
+
+
+class RateLimitTimeout(Exception):
+    """Claude call didn't get a rate limiter slot before its deadline."""
+
+
+class ClaudeRateLimiter:
+    """
+    Client-side limits for Claude API calls.
+
+    - requests per minute and tokens per minute (token buckets refilled continuously,
+      same model the API uses for its own limits)
+    - concurrent calls capped by CLAUDE_RATE_LIMIT
+    - waiting for a slot is bounded by a deadline, after which the call is rejected
+
+    Usage:
+        async with limiter.slot(estimated_tokens) as slot:
+            response = await claude.messages.create(...)
+            slot.used_tokens = response.usage.input_tokens + response.usage.output_tokens
+    """
+
+    def __init__(self, max_concurrent: int, requests_per_minute: int, tokens_per_minute: int,
+                 queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._requests = TokenBucket(rate=requests_per_minute / 60, capacity=requests_per_minute)
+        self._tokens = TokenBucket(rate=tokens_per_minute / 60, capacity=tokens_per_minute)
+
+        # Metrics
+        self._waiting = 0
+        self._in_flight = 0
+        self._acquired = 0
+        self._rejected = 0
+        self._rate_limited = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @classmethod
+    def from_config(cls) -> 'ClaudeRateLimiter':
+        """Create limiter from CLAUDE_* settings."""
+        return cls(
+            max_concurrent=max(1, int(Config.get(Config.CLAUDE_RATE_LIMIT, "10"))),
+            requests_per_minute=max(1, int(Config.get(Config.CLAUDE_REQUESTS_PER_MINUTE, "50"))),
+            tokens_per_minute=max(1, int(Config.get(Config.CLAUDE_TOKENS_PER_MINUTE, "40000"))),
+            queue_timeout=float(Config.get(Config.CLAUDE_QUEUE_TIMEOUT, "10"))
+        )
+
+    def slot(self, estimated_tokens: int, timeout: Optional[float] = None) -> '_ClaudeSlot':
+        """
+        Get context manager waiting for a call slot.
+
+        Args:
+            estimated_tokens: Expected input + output tokens of the call
+            timeout: Max seconds to wait (defaults to CLAUDE_QUEUE_TIMEOUT)
+
+        Raises:
+            RateLimitTimeout: On entering, if slot isn't available before the deadline
+        """
+        return _ClaudeSlot(self, estimated_tokens, self.queue_timeout if timeout is None else timeout)
+
+    async def _acquire(self, estimated_tokens: int, timeout: float) -> None:
+        started_at = time.monotonic()
+        self._waiting += 1
+        semaphore_acquired = False
+        request_taken = False
+
+        async def acquire_all():
+            nonlocal semaphore_acquired, request_taken
+            await self._semaphore.acquire()
+            semaphore_acquired = True
+            await self._requests.acquire()
+            request_taken = True
+            await self._tokens.acquire(estimated_tokens)
+
+        try:
+            await asyncio.wait_for(acquire_all(), timeout)
+        except asyncio.TimeoutError:
+            if request_taken:
+                self._requests.consume(-1)
+            if semaphore_acquired:
+                self._semaphore.release()
+            self._rejected += 1
+            raise RateLimitTimeout(f"No Claude call slot within {timeout:.1f}s")
+        except BaseException:
+            if request_taken:
+                self._requests.consume(-1)
+            if semaphore_acquired:
+                self._semaphore.release()
+            raise
+        finally:
+            self._waiting -= 1
+
+        waited = time.monotonic() - started_at
+        self._acquired += 1
+        self._in_flight += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+        if waited > 1:
+            logger.debug(f"[CLAUDE_LIMIT] Waited {waited:.1f}s for a call slot")
+
+    def _release(self, estimated_tokens: int, used_tokens: Optional[int]) -> None:
+        self._in_flight -= 1
+        self._semaphore.release()
+
+        # Settle estimate against real usage
+        if used_tokens is not None:
+            self._tokens.consume(used_tokens - estimated_tokens)
+
+    def report_rate_limited(self, retry_after: Optional[float]) -> None:
+        """
+        Back off after API answered 429.
+
+        Args:
+            retry_after: Seconds from retry-after header, if present
+        """
+        self._rate_limited += 1
+        delay = retry_after if retry_after is not None else 60 / self._requests.capacity
+        # Leave the request bucket in debt, so the next call waits `delay` for its token
+        self._requests.consume(self._requests.available + delay * self._requests.rate - 1)
+        logger.warning(f"[CLAUDE_LIMIT] Rate limited by API, backing off {delay:.1f}s")
+
+    def get_stats(self) -> dict:
+        """Get limiter metrics."""
+        return {
+            'max_concurrent': self.max_concurrent,
+            'in_flight': self._in_flight,
+            'waiting': self._waiting,
+            'acquired': self._acquired,
+            'rejected': self._rejected,
+            'rate_limited': self._rate_limited,
+            'avg_wait': self._total_wait / self._acquired if self._acquired else 0.0,
+            'max_wait': self._max_wait,
+            'requests_available': self._requests.available,
+            'tokens_available': self._tokens.available
+        }
+
+
+class _ClaudeSlot:
+    """Context manager returned by ClaudeRateLimiter.slot()."""
+
+    def __init__(self, limiter: ClaudeRateLimiter, estimated_tokens: int, timeout: float):
+        self.limiter = limiter
+        self.estimated_tokens = estimated_tokens
+        self.timeout = timeout
+        self.used_tokens: Optional[int] = None
+
+    async def __aenter__(self) -> '_ClaudeSlot':
+        await self.limiter._acquire(self.estimated_tokens, self.timeout)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.limiter._release(self.estimated_tokens, self.used_tokens)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for Claude calls.
+
+    Opens after `failure_threshold` consecutive failed or slow calls. While open, callers
+    skip Claude entirely; after `cooldown` seconds a single probe call is let through
+    (half-open) and its result either closes the breaker or opens it for another cooldown.
+    Other callers keep skipping until the probe reports; a probe that never does (cache
+    hit, rate limiter timeout) is given up after another cooldown.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int, cooldown: float, slow_call: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.slow_call = slow_call
+
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_started_at: Optional[float] = None  # Half-open probe in flight since
+        self._probe_done = asyncio.Event()
+        self._times_opened = 0
+        self._short_circuited = 0
+
+    @classmethod
+    def from_config(cls) -> 'CircuitBreaker':
+        """Create breaker from CLAUDE_BREAKER_* settings."""
+        return cls(
+            failure_threshold=max(1, int(Config.get(Config.CLAUDE_BREAKER_FAILURES, "3"))),
+            cooldown=float(Config.get(Config.CLAUDE_BREAKER_COOLDOWN, "30")),
+            slow_call=float(Config.get(Config.CLAUDE_SLOW_CALL, "10"))
+        )
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if self.retry_in() > 0:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def retry_in(self) -> float:
+        """Seconds until calls are allowed again (0 if allowed now or a probe decides it)."""
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self.cooldown - time.monotonic())
+
+    def _probe_in_flight(self) -> bool:
+        return (self._probe_started_at is not None
+                and time.monotonic() - self._probe_started_at < self.cooldown)
+
+    def is_open(self) -> bool:
+        """
+        Check if calls should be skipped right now.
+
+        In half-open state the first caller gets False and becomes the probe,
+        everyone else gets True until the probe's result is recorded.
+        """
+        state = self.state
+        if state == self.CLOSED:
+            return False
+        if state == self.HALF_OPEN and not self._probe_in_flight():
+            self._probe_started_at = time.monotonic()
+            self._probe_done.clear()
+            logger.info("[CLAUDE_BREAKER] Half-open, letting one probe call through")
+            return False
+        self._short_circuited += 1
+        return True
+
+    async def wait_for_probe(self, timeout: float) -> None:
+        """Wait until the half-open probe reports its result (at most timeout seconds)."""
+        if not self._probe_in_flight():
+            return
+        try:
+            await asyncio.wait_for(self._probe_done.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _finish_probe(self) -> None:
+        self._probe_started_at = None
+        self._probe_done.set()
+
+    def record_success(self, duration: float) -> None:
+        """Record finished call; a slow call counts as failure."""
+        if duration > self.slow_call:
+            logger.warning(f"[CLAUDE_BREAKER] Slow call: {duration:.1f}s")
+            self.record_failure()
+            return
+
+        if self._opened_at is not None:
+            logger.info("[CLAUDE_BREAKER] Closed - Claude responds normally again")
+        self._failures = 0
+        self._opened_at = None
+        self._finish_probe()
+
+    def record_failure(self) -> None:
+        """Record failed call, opening the breaker when threshold is reached."""
+        self._failures += 1
+
+        if self.state == self.HALF_OPEN or (self._opened_at is None and self._failures >= self.failure_threshold):
+            self._opened_at = time.monotonic()
+            self._times_opened += 1
+            logger.warning(
+                f"[CLAUDE_BREAKER] Opened after {self._failures} failures, "
+                f"skipping translation for {self.cooldown:.0f}s"
+            )
+        self._finish_probe()
+
+    def get_stats(self) -> dict:
+        """Get breaker state and counters."""
+        return {
+            'state': self.state,
+            'failures': self._failures,
+            'retry_in': self.retry_in(),
+            'probe_in_flight': self._probe_in_flight(),
+            'times_opened': self._times_opened,
+            'short_circuited': self._short_circuited
+        }
+
 
 class AIMiddleware:
     """
@@ -23,7 +470,10 @@ class AIMiddleware:
         """Initialize AI middleware with lazy loading of Claude client."""
         self.claude_client = None
         self.message_store = None  # Placeholder for future Redis integration
-        self.rate_limiter = None  # TODO: implement rate limiting
+        self.rate_limiter: Optional[ClaudeRateLimiter] = None  # Created from config on first call
+        self.circuit_breaker = CircuitBreaker.from_config()
+        self._background_tasks: Set[asyncio.Task] = set()  # Late translations being retried
+        self._dialogue_tasks: Dict[str, Set[asyncio.Task]] = {}  # Same tasks by dialogue ID
 
         # Language name mapping for better prompts
         self.lang_names = {
@@ -61,30 +511,62 @@ class AIMiddleware:
             if not api_key:
                 raise ValueError("CLAUDE_API_KEY not configured")
 
+            # CLAUDE_BASE_URL points client at a proxy or local stub server
             self.claude_client = AsyncAnthropic(
-                api_key=api_key
+                api_key=api_key,
+                base_url=Config.get(Config.CLAUDE_BASE_URL) or None
             )
             logger.info("Claude client initialized successfully")
 
         return self.claude_client  # И ЭТУ ТОЖЕ! ⬇️
 
-    async def _translate(self, text: str, source_lang: str, target_lang: str) -> Optional[str]:
+    @staticmethod
+    def _get_prompt_template() -> str:
+        return Config.get(Config.TRANSLATION_PROMPT) or DEFAULT_TRANSLATION_PROMPT
+
+    @staticmethod
+    def _get_model() -> str:
+        return Config.get(Config.CLAUDE_MODEL, "claude-3-5-sonnet-20241022")
+
+    def _get_prompt_version(self) -> str:
+        """Short hash of prompt and model - changing either invalidates cached translations."""
+        raw = f"{self._get_model()}|{self._get_prompt_template()}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+    async def _translate(self, text: str, source_lang: str, target_lang: str,
+                         on_progress: Optional[Callable[[str], Awaitable[Any]]] = None) -> Optional[str]:
+        prompt_version = self._get_prompt_version()
+        key = TranslationCache.make_key(text, source_lang, target_lang, prompt_version)
+
+        return await TranslationCache.get_or_translate(
+            key, source_lang, target_lang, prompt_version,
+            lambda: self._request_translation(text, target_lang, on_progress)
+        )
+
+    @staticmethod
+    def should_stream(text: str) -> bool:
+        """Check if text is long enough to stream its translation (CLAUDE_STREAMING)."""
+        enabled = Config.get(Config.CLAUDE_STREAMING, False)
+        if not (enabled is True or str(enabled).lower() == "true"):
+            return False
+        return len(text) >= int(Config.get(Config.CLAUDE_STREAM_MIN_CHARS, "300"))
+
+    def _get_rate_limiter(self) -> ClaudeRateLimiter:
+        if not self.rate_limiter:
+            self.rate_limiter = ClaudeRateLimiter.from_config()
+        return self.rate_limiter
+
+    @staticmethod
+    def _estimate_tokens(prompt: str, text: str) -> int:
+        """Rough token estimate (~3 chars per token) of prompt plus translated output."""
+        return (len(prompt) + len(text)) // 3 + 1
+
+    async def _request_translation(self, text: str, target_lang: str,
+                                   on_progress: Optional[Callable[[str], Awaitable[Any]]] = None) -> Optional[str]:
         try:
             claude = await self._get_claude()
             target_name = self.lang_names.get(target_lang, target_lang)
-            prompt_template = Config.get(Config.TRANSLATION_PROMPT)
-
-            if not prompt_template:
-                prompt_template = """You are a translation service. Your task is to ensure the message is in {target_name}.
-
-    Instructions:
-    1. If the message is already in {target_name}, output it unchanged
-    2. If the message is in any other language, translate it to {target_name}
-    3. Output ONLY the final text in {target_name}, no explanations
-
-    Message: {text}
-
-    Output in {target_name}:"""
+            prompt_template = self._get_prompt_template()
 
             # Форматируем промпт с переменными
             prompt = prompt_template.format(
@@ -94,30 +576,94 @@ class AIMiddleware:
 
             logger.debug(f"Translating to {target_lang}: {text[:50]}...")
 
-            response = await claude.messages.create(
-                model=Config.get(Config.CLAUDE_MODEL, "claude-3-5-sonnet-20241022"),
-                max_tokens=int(Config.get(Config.CLAUDE_MAX_TOKENS, "1000")),
-                messages=[{"role": "user", "content": prompt}],
-                timeout=float(Config.get(Config.CLAUDE_TIMEOUT, "30"))
-            )
+            rate_limiter = self._get_rate_limiter()
+            async with rate_limiter.slot(self._estimate_tokens(prompt, text)) as slot:
+                started_at = time.monotonic()
+                request = dict(
+                    model=self._get_model(),
+                    max_tokens=int(Config.get(Config.CLAUDE_MAX_TOKENS, "1000")),
+                    messages=[{"role": "user", "content": prompt}],
+                    timeout=float(Config.get(Config.CLAUDE_TIMEOUT, "30"))
+                )
+                try:
+                    if on_progress:
+                        translated, response = await self._stream_completion(claude, request, on_progress, started_at)
+                    else:
+                        response = await claude.messages.create(**request)
+                        translated = response.content[0].text
+                        self.circuit_breaker.record_success(time.monotonic() - started_at)
+                except RateLimitError:
+                    # We are over quota, Claude itself is healthy - rate limiter backs off instead
+                    raise
+                except Exception:
+                    self.circuit_breaker.record_failure()
+                    raise
+                slot.used_tokens = response.usage.input_tokens + response.usage.output_tokens
 
-            translated = response.content[0].text
             logger.debug(f"Translation successful: {translated[:50]}...")
 
             return translated
 
+        except RateLimitTimeout as e:
+            logger.warning(f"Translation skipped: {e}")
+            return None
+        except RateLimitError as e:
+            retry_after = e.response.headers.get("retry-after")
+            try:
+                retry_after = float(retry_after) if retry_after else None
+            except ValueError:
+                retry_after = None
+            self._get_rate_limiter().report_rate_limited(retry_after)
+            logger.error(f"Translation failed: {e}")
+            return None
         except Exception as e:
             logger.error(f"Translation failed: {e}", exc_info=True)
             return None
 
+    async def _stream_completion(self, claude: AsyncAnthropic, request: Dict[str, Any],
+                                 on_progress: Callable[[str], Awaitable[Any]], started_at: float):
+        """
+        Run completion through streaming API, reporting accumulated text after every chunk.
+
+        Circuit breaker judges the call by time to first chunk - a long translation
+        streaming steadily is not a slow call.
+
+        Returns:
+            Tuple of (full text, final message)
+        """
+        translated = ""
+        first_chunk = True
+
+        async with claude.messages.stream(**request) as stream:
+            async for chunk in stream.text_stream:
+                if first_chunk:
+                    self.circuit_breaker.record_success(time.monotonic() - started_at)
+                    first_chunk = False
+
+                translated += chunk
+                try:
+                    await on_progress(translated)
+                except Exception as e:
+                    # Display problems must not break translation itself
+                    logger.warning(f"Translation progress callback failed: {e}")
+
+            response = await stream.get_final_message()
+
+        if first_chunk:
+            self.circuit_breaker.record_success(time.monotonic() - started_at)
+
+        return translated, response
+
     async def process_dialogue_message(
             self,
             text: str,
             source_lang: str,
             target_lang: str,
             direction: str,  # 'client_to_operator' or 'operator_to_client'
-            dialogue_id: str
-    ) -> Dict[str, str]:
+            dialogue_id: str,
+            on_late_translation: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None,
+            on_progress: Optional[Callable[[str], Awaitable[Any]]] = None
+    ) -> Dict[str, Any]:
         """
         Main method for processing dialogue messages with translation.
 
@@ -127,6 +673,13 @@ class AIMiddleware:
             target_lang: Target language code
             direction: Message direction ('client_to_operator' or 'operator_to_client')
             dialogue_id: Dialogue ID for logging
+            on_late_translation: Optional callback for translation that isn't ready in time.
+                If given, the message is not held back: when Claude is unavailable (circuit
+                breaker open) or slower than CLAUDE_DELIVERY_TIMEOUT, result says
+                'translation_pending' and the callback later gets the translated result
+                (same dict shape) to post as a follow-up or edit.
+            on_progress: Optional callback getting partial translation while it streams
+                (translation is requested via streaming API when given; cache hits skip it)
 
         Returns:
             Dict with keys:
@@ -134,6 +687,7 @@ class AIMiddleware:
                 - 'original': Original text (if display='both')
                 - 'translated': Translated text (if translation successful)
                 - 'translation_failed': True if translation failed
+                - 'translation_pending': True if on_late_translation will be called
         """
         logger.info(f"Processing message for dialogue {dialogue_id}, direction: {direction}, "
                     f"langs: {source_lang}->{target_lang}")
@@ -149,13 +703,43 @@ class AIMiddleware:
             logger.debug(f"Languages match ({source_lang}), no translation needed")
             return {'display': text}
 
-        # Translate
-        translated = await self._translate(text, source_lang, target_lang)
+        # Claude is down - don't hold the message, translate in background if possible
+        if self.circuit_breaker.is_open():
+            logger.info(f"Translation circuit open, delivering dialogue {dialogue_id} message untranslated")
+            if on_late_translation:
+                self._spawn(self._retry_translation(
+                    text, source_lang, target_lang, direction, dialogue_id, on_late_translation
+                ), dialogue_id)
+                return {'display': text, 'translation_failed': True, 'translation_pending': True}
+            return {'display': text, 'translation_failed': True}
+
+        if on_late_translation:
+            # Wait for translation only up to delivery timeout, the rest arrives via callback
+            translate_task = asyncio.ensure_future(self._translate(text, source_lang, target_lang, on_progress))
+            delivery_timeout = float(Config.get(Config.CLAUDE_DELIVERY_TIMEOUT, "5"))
+            done, _ = await asyncio.wait({translate_task}, timeout=delivery_timeout)
+
+            if not done:
+                logger.info(
+                    f"Translation for dialogue {dialogue_id} slower than {delivery_timeout:.0f}s, "
+                    f"delivering untranslated"
+                )
+                self._spawn(self._finish_late_translation(
+                    translate_task, text, direction, dialogue_id, on_late_translation
+                ), dialogue_id)
+                return {'display': text, 'translation_failed': True, 'translation_pending': True}
+
+            translated = translate_task.result()
+        else:
+            translated = await self._translate(text, source_lang, target_lang, on_progress)
 
         if not translated:
             logger.warning(f"Translation failed for dialogue {dialogue_id}")
             return {'display': text, 'translation_failed': True}
 
+        return await self._build_result(text, translated, direction, dialogue_id)
+
+    async def _build_result(self, text: str, translated: str, direction: str, dialogue_id: str) -> Dict[str, Any]:
         # Log translated message (placeholder for Redis)
         if self.message_store:
             await self.message_store.save_message(
@@ -175,4 +759,74 @@ class AIMiddleware:
             return {
                 'display': 'translation_only',
                 'translated': translated
-            }
\ No newline at end of file
+            }
+
+    def _spawn(self, coro, dialogue_id: str) -> None:
+        """Run background coroutine of a dialogue, keeping a reference until it finishes."""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+        dialogue_tasks = self._dialogue_tasks.setdefault(dialogue_id, set())
+        dialogue_tasks.add(task)
+
+        def forget(done: asyncio.Task):
+            dialogue_tasks.discard(done)
+            if not dialogue_tasks and self._dialogue_tasks.get(dialogue_id) is dialogue_tasks:
+                del self._dialogue_tasks[dialogue_id]
+
+        task.add_done_callback(forget)
+
+    def cancel_dialogue_tasks(self, dialogue_id: str) -> int:
+        """
+        Cancel late translations still pending for a dialogue.
+
+        Returns:
+            Number of cancelled tasks
+        """
+        tasks = self._dialogue_tasks.pop(dialogue_id, set())
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    async def _finish_late_translation(self, translate_task: asyncio.Future, text: str, direction: str,
+                                       dialogue_id: str, callback: Callable[[Dict[str, Any]], Awaitable[Any]]):
+        """Deliver translation that missed the delivery timeout."""
+        try:
+            translated = await translate_task
+            if not translated:
+                logger.warning(f"Late translation failed for dialogue {dialogue_id}")
+                return
+            await callback(await self._build_result(text, translated, direction, dialogue_id))
+        except Exception as e:
+            logger.error(f"Error delivering late translation for dialogue {dialogue_id}: {e}", exc_info=True)
+
+    async def _retry_translation(self, text: str, source_lang: str, target_lang: str, direction: str,
+                                 dialogue_id: str, callback: Callable[[Dict[str, Any]], Awaitable[Any]]):
+        """Retry translation while circuit is open, giving up after CLAUDE_RETRY_WINDOW seconds."""
+        deadline = time.monotonic() + float(Config.get(Config.CLAUDE_RETRY_WINDOW, "300"))
+
+        try:
+            while time.monotonic() < deadline:
+                wait = self.circuit_breaker.retry_in()
+                if wait > 0:
+                    await asyncio.sleep(min(wait, max(0.0, deadline - time.monotonic())))
+                    continue
+
+                if self.circuit_breaker.is_open():
+                    # Another call is probing Claude - wait for its result
+                    await self.circuit_breaker.wait_for_probe(max(0.0, deadline - time.monotonic()))
+                    continue
+
+                translated = await self._translate(text, source_lang, target_lang)
+                if translated:
+                    await callback(await self._build_result(text, translated, direction, dialogue_id))
+                    return
+
+                # Failure without opening the circuit (e.g. rate limiter) - don't spin
+                if self.circuit_breaker.retry_in() == 0:
+                    await asyncio.sleep(self.circuit_breaker.cooldown)
+
+            logger.warning(f"Gave up translating message of dialogue {dialogue_id}")
+        except Exception as e:
+            logger.error(f"Error retrying translation for dialogue {dialogue_id}: {e}", exc_info=True)
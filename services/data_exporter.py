@@ -3,15 +3,18 @@ Data export system for synchronizing database with external sources.
 Provides a background service for exporting data to Google Sheets.
 """
 import asyncio
+import json
 import logging
+import re
 from datetime import datetime
-from typing import Dict, List, Iterable, Any, Optional, Type, Callable, TypeVar
+from typing import Dict, List, Iterable, Any, Optional, Type, Callable, TypeVar, Set, Tuple
 
 from sqlalchemy import inspect
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 from core.google_services import get_google_services
 from core.db import get_db_session_ctx
+from models.export_state import ExportState
 from config import Config
 
 logger = logging.getLogger(__name__)
@@ -82,6 +85,7 @@ class SheetsExporter(DataExporter):
         self.drive_service = None
         self.worksheets = {}
         self.exporters = exporters or {}
+        self.full_sync_interval = int(Config.get(Config.EXPORT_FULL_SYNC_INTERVAL, "3600"))
 
         # Last sync metadata
         self.last_sync = {name: None for name in self.exporters.keys()}
@@ -149,62 +153,185 @@ class SheetsExporter(DataExporter):
                 logger.error(f"No exporter registered for {sheet_name}")
                 return False
 
-            # Get all records from sheet
-            records = await sheet.get_all_records()
-
-            # Create dictionary for efficient lookup
-            sheet_data = exporter.create_sheet_index(records)
+            if exporter.needs_full_sync(self.full_sync_interval):
+                synced = await self._full_sync(sheet_name, sheet, exporter)
+            else:
+                synced = await self._incremental_sync(sheet_name, sheet, exporter)
 
-            # Get database records
-            with self.session_factory() as session:
-                # Use exporter to get and format database records
-                db_records = exporter.get_records(session)
-                updates, new_records = exporter.compare_records(db_records, sheet_data)
-
-            # Apply changes in batches
-            updates_count = 0
-            if updates:
-                update_tasks = []
-                for batch in batch_items(updates, 10):
-                    for row_idx, data in batch:
-                        update_tasks.append(sheet.update(f"A{row_idx}:Z{row_idx}", [data]))
-
-                # Execute updates in parallel with error handling
-                if update_tasks:
-                    results = await asyncio.gather(*update_tasks, return_exceptions=True)
-                    updates_count = sum(1 for r in results if not isinstance(r, Exception))
-
-                    # Log errors
-                    for i, result in enumerate(results):
-                        if isinstance(result, Exception):
-                            logger.warning(f"Error updating row in {sheet_name}: {result}")
-
-            # Add new records in batches
-            new_records_count = 0
-            if new_records:
-                for batch in batch_items(new_records, 10):
-                    try:
-                        await sheet.append_rows(batch)
-                        new_records_count += len(batch)
-                        # Add a small delay to avoid rate limits
-                        await asyncio.sleep(1)
-                    except Exception as e:
-                        logger.error(f"Error adding rows to {sheet_name}: {e}")
-
-            # Update last sync time
-            self.last_sync[sheet_name] = datetime.now()
-            logger.info(f"{sheet_name} sync completed: {updates_count} updated, {new_records_count} added")
-            return True
+            if synced:
+                self.last_sync[sheet_name] = datetime.now()
+            return synced
 
         except Exception as e:
             logger.error(f"Error syncing {sheet_name}: {e}")
             return False
 
+    async def _full_sync(self, sheet_name: str, sheet, exporter: 'ModelExporter') -> bool:
+        """
+        Compare whole table with whole sheet and rebuild incremental sync state.
+
+        Args:
+            sheet_name: Name of the worksheet
+            sheet: AsyncWorksheet
+            exporter: Exporter of the sheet
+
+        Returns:
+            True if all changes were written
+        """
+        # Get all records from sheet
+        records = await sheet.get_all_records()
+
+        # Create dictionary for efficient lookup
+        sheet_data = exporter.create_sheet_index(records)
+
+        # Get database records
+        with self.session_factory() as session:
+            # Use exporter to get and format database records
+            db_records = exporter.get_records(session)
+            updates, new_records = exporter.compare_records(db_records, sheet_data)
+            new_ids = [
+                record_id for record_id in map(exporter.record_id, db_records)
+                if record_id not in sheet_data
+            ]
+            stamps = exporter.record_stamps(db_records)
+
+        # Header row + data rows; appended rows go after them
+        exporter.rebuild_row_index(sheet_data, next_row=len(records) + 2)
+
+        written = await self._write_changes(sheet_name, sheet, exporter, updates, new_records, new_ids)
+        if not written:
+            # Sheet is partially written - reconcile again on next cycle
+            exporter.last_full_sync = None
+            return False
+
+        exporter.reset_watermark()
+        exporter.advance_watermark(stamps)
+        exporter.last_full_sync = datetime.now()
+        await self._save_state(sheet_name, exporter)
+
+        logger.info(f"{sheet_name} full sync completed: {len(updates)} updated, {len(new_records)} added")
+        return True
+
+    async def _incremental_sync(self, sheet_name: str, sheet, exporter: 'ModelExporter') -> bool:
+        """
+        Write only records changed since the watermark, using stored row positions.
+
+        Args:
+            sheet_name: Name of the worksheet
+            sheet: AsyncWorksheet
+            exporter: Exporter of the sheet
+
+        Returns:
+            True if all changes were written
+        """
+        with self.session_factory() as session:
+            changed = exporter.get_changed_records(session)
+            updates, new_records, new_ids = exporter.split_changes(changed)
+            stamps = exporter.record_stamps(changed)
+
+        if not changed:
+            logger.debug(f"{sheet_name}: no changes since {exporter.watermark}")
+            return True
+
+        written = await self._write_changes(sheet_name, sheet, exporter, updates, new_records, new_ids)
+        if not written:
+            return False
+
+        exporter.advance_watermark(stamps)
+        await self._save_state(sheet_name, exporter)
+
+        logger.info(f"{sheet_name} incremental sync completed: {len(updates)} updated, {len(new_records)} added")
+        return True
+
+    async def _write_changes(self,
+                             sheet_name: str,
+                             sheet,
+                             exporter: 'ModelExporter',
+                             updates: List[Tuple[int, List[Any]]],
+                             new_records: List[List[Any]],
+                             new_ids: List[str]) -> bool:
+        """
+        Write updated rows in one batch request and append new rows in one request.
+
+        Returns:
+            True if both requests succeeded
+        """
+        # All changed rows go in one batch request
+        if updates:
+            try:
+                await sheet.batch_update([
+                    {'range': f"A{row_idx}:Z{row_idx}", 'values': [data]}
+                    for row_idx, data in updates
+                ])
+            except Exception as e:
+                logger.warning(f"Error updating {len(updates)} rows in {sheet_name}: {e}")
+                return False
+
+        # New records are appended with a single request
+        if new_records:
+            try:
+                response = await sheet.append_rows(new_records)
+            except Exception as e:
+                logger.error(f"Error adding rows to {sheet_name}: {e}")
+                return False
+
+            first_row = self._get_appended_first_row(response) or exporter.next_row
+            exporter.register_appended(new_ids, first_row)
+
+        return True
+
+    @staticmethod
+    def _get_appended_first_row(response: Any) -> Optional[int]:
+        """Get first row number from append response ('Sheet'!A12:W14 -> 12)."""
+        try:
+            updated_range = response['updates']['updatedRange']
+        except (TypeError, KeyError):
+            return None
+
+        match = re.search(r"![A-Z]+(\d+)", updated_range)
+        return int(match.group(1)) if match else None
+
+    async def load_state(self):
+        """Load stored watermarks and row positions of registered exporters."""
+        try:
+            with self.session_factory() as session:
+                states = {
+                    state.sheetName: state
+                    for state in session.query(ExportState).filter(
+                        ExportState.sheetName.in_(list(self.exporters.keys()))
+                    )
+                }
+                for sheet_name, exporter in self.exporters.items():
+                    if sheet_name in states:
+                        exporter.load_state(states[sheet_name])
+                        logger.info(
+                            f"Loaded export state for {sheet_name}: watermark {exporter.watermark}, "
+                            f"{len(exporter.row_index)} rows"
+                        )
+        except Exception as e:
+            # Without state every sheet simply starts with a full sync
+            logger.warning(f"Could not load export state: {e}")
+
+    async def _save_state(self, sheet_name: str, exporter: 'ModelExporter'):
+        """Persist exporter sync state so a restart doesn't need a full sync."""
+        if not exporter.supports_incremental:
+            return
+
+        try:
+            with self.session_factory() as session:
+                state = session.get(ExportState, sheet_name) or ExportState(sheetName=sheet_name)
+                exporter.dump_state(state)
+                session.merge(state)
+        except Exception as e:
+            logger.warning(f"Could not save export state for {sheet_name}: {e}")
+
     async def run(self):
         # Initial delay to allow system to stabilize
         logger.info(f"Starting export service with interval {self.update_interval} seconds")
         await asyncio.sleep(30)  # 30 секунд
 
+        await self.load_state()
+
         while self._running:
             try:
                 logger.debug("Starting export cycle")
@@ -253,7 +380,8 @@ class ModelExporter:
                  id_column: str,
                  field_mapping: Dict[str, str] = None,
                  query_filter: Optional[Callable] = None,
-                 format_funcs: Dict[str, Callable] = None):
+                 format_funcs: Dict[str, Callable] = None,
+                 watermark_column: Optional[str] = None):
         """
         Initialize model exporter.
 
@@ -263,12 +391,22 @@ class ModelExporter:
             field_mapping: Optional mapping of sheet columns to model attributes
             query_filter: Optional function to filter query results
             format_funcs: Optional dictionary of formatting functions for fields
+            watermark_column: Optional last-modified column (e.g. updatedAt) enabling incremental sync
         """
         self.model_class = model_class
         self.id_column = id_column
         self.field_mapping = field_mapping or {}
         self.query_filter = query_filter
         self.format_funcs = format_funcs or {}
+        self.watermark_column = watermark_column
+        self._loader_options: Optional[list] = None  # Built on first query, see _get_loader_options
+
+        # Incremental sync state, rebuilt by every full sync and persisted in ExportState
+        self.watermark: Optional[datetime] = None
+        self.watermark_ids: Set[str] = set()
+        self.row_index: Dict[str, int] = {}
+        self.next_row: Optional[int] = None
+        self.last_full_sync: Optional[datetime] = None
 
         # Auto-detect model columns if field_mapping not provided
         if not self.field_mapping:
@@ -290,13 +428,219 @@ class ModelExporter:
         Returns:
             List of model instances
         """
+        return self.build_query(session).all()
+
+    def build_query(self, session: Session):
+        """
+        Build base query for exported records.
+
+        Args:
+            session: SQLAlchemy session
+
+        Returns:
+            SQLAlchemy query
+        """
         query = session.query(self.model_class)
 
+        # Load related objects of dotted fields with the records, not one query per row
+        loader_options = self._get_loader_options()
+        if loader_options:
+            query = query.options(*loader_options)
+
         # Apply filter if provided
         if self.query_filter:
             query = self.query_filter(query)
 
-        return query.all()
+        return query
+
+    def _get_loader_options(self) -> list:
+        """
+        Build eager loading options from dotted paths in field_mapping.
+
+        "user.displayName" loads Ticket.user, "user.profile.name" loads Ticket.user and User.profile.
+        Many-to-one relationships are joined into the main query, collections are loaded
+        with one extra SELECT ... IN query each.
+
+        Returns:
+            List of loader options
+        """
+        if self._loader_options is not None:
+            return self._loader_options
+
+        options = {}
+        for field_name in self.field_mapping.values():
+            if '.' not in field_name:
+                continue
+
+            mapper = inspect(self.model_class)
+            option = None
+            path = ()
+
+            # Last part is an attribute of the related object, the rest are relationships
+            for part in field_name.split('.')[:-1]:
+                relationship_prop = mapper.relationships.get(part)
+                if relationship_prop is None:
+                    # Plain attribute or property - nothing to load
+                    break
+
+                attr = getattr(mapper.class_, part)
+                if option is None:
+                    option = selectinload(attr) if relationship_prop.uselist else joinedload(attr)
+                else:
+                    option = option.selectinload(attr) if relationship_prop.uselist else option.joinedload(attr)
+
+                path += (part,)
+                options[path] = option
+                mapper = relationship_prop.mapper
+
+        # Keep only the longest paths - a chained option also loads its prefix
+        self._loader_options = [
+            option for path, option in options.items()
+            if not any(other[:len(path)] == path and len(other) > len(path) for other in options)
+        ]
+        return self._loader_options
+
+    @property
+    def supports_incremental(self) -> bool:
+        """Whether model has a last-modified column to sync by."""
+        return self.watermark_column is not None
+
+    def needs_full_sync(self, interval: int) -> bool:
+        """
+        Check if next sync has to compare the whole sheet.
+
+        Args:
+            interval: Seconds between full reconciliations
+
+        Returns:
+            True if there is no usable state or it's time to reconcile
+        """
+        if not self.supports_incremental or self.last_full_sync is None or self.next_row is None:
+            return True
+        return (datetime.now() - self.last_full_sync).total_seconds() >= interval
+
+    def get_changed_records(self, session: Session) -> List[ModelType]:
+        """
+        Get records modified since the watermark.
+
+        Records with timestamp equal to the watermark are queried too (several rows can share
+        a timestamp), those already exported with that timestamp are skipped.
+
+        Args:
+            session: SQLAlchemy session
+
+        Returns:
+            List of model instances
+        """
+        query = self.build_query(session)
+        if self.watermark is not None:
+            query = query.filter(getattr(self.model_class, self.watermark_column) >= self.watermark)
+
+        return [
+            record for record in query.all()
+            if not (
+                getattr(record, self.watermark_column) == self.watermark
+                and self.record_id(record) in self.watermark_ids
+            )
+        ]
+
+    def split_changes(self,
+                      records: List[ModelType]) -> Tuple[List[Tuple[int, List[Any]]], List[List[Any]], List[str]]:
+        """
+        Split changed records into row updates and new rows using stored row positions.
+
+        Args:
+            records: Changed model instances
+
+        Returns:
+            Tuple of (updates as (row, data), new rows, IDs of new rows)
+        """
+        updates = []
+        new_records = []
+        new_ids = []
+
+        for record in records:
+            record_id = self.record_id(record)
+            record_data = self.format_record(record)
+            row_index = self.row_index.get(record_id)
+
+            if row_index:
+                updates.append((row_index, record_data))
+            else:
+                new_records.append(record_data)
+                new_ids.append(record_id)
+
+        return updates, new_records, new_ids
+
+    def record_id(self, record: ModelType) -> str:
+        """Get record ID as it appears in the sheet index."""
+        return str(getattr(record, self.id_column))
+
+    def record_stamps(self, records: List[ModelType]) -> List[Tuple[str, Optional[datetime]]]:
+        """Get (ID, last-modified) pairs, taken while records are still attached to session."""
+        if not self.supports_incremental:
+            return []
+        return [(self.record_id(record), getattr(record, self.watermark_column)) for record in records]
+
+    def reset_watermark(self):
+        """Forget watermark before rebuilding it from a full sync."""
+        self.watermark = None
+        self.watermark_ids = set()
+
+    def advance_watermark(self, stamps: List[Tuple[str, Optional[datetime]]]):
+        """
+        Move watermark to the newest exported timestamp.
+
+        Args:
+            stamps: (ID, last-modified) pairs of records that were written
+        """
+        for record_id, stamp in stamps:
+            if stamp is None:
+                continue
+            if self.watermark is None or stamp > self.watermark:
+                self.watermark = stamp
+                self.watermark_ids = {record_id}
+            elif stamp == self.watermark:
+                self.watermark_ids.add(record_id)
+
+    def rebuild_row_index(self, sheet_data: Dict[str, Dict[str, Any]], next_row: int):
+        """
+        Take row positions from a freshly read sheet.
+
+        Args:
+            sheet_data: Sheet index from create_sheet_index
+            next_row: First row after the data
+        """
+        self.row_index = {record_id: item["row_index"] for record_id, item in sheet_data.items()}
+        self.next_row = next_row
+
+    def register_appended(self, record_ids: List[str], first_row: int):
+        """
+        Remember rows of appended records.
+
+        Args:
+            record_ids: IDs in the order rows were appended
+            first_row: Row of the first appended record
+        """
+        for offset, record_id in enumerate(record_ids):
+            self.row_index[record_id] = first_row + offset
+        self.next_row = max(self.next_row or 0, first_row + len(record_ids))
+
+    def load_state(self, state: ExportState):
+        """Restore incremental sync state from database."""
+        self.watermark = state.watermark
+        self.watermark_ids = set(state.get_watermark_ids())
+        self.row_index = state.get_row_index()
+        self.next_row = state.nextRow
+        self.last_full_sync = state.lastFullSync
+
+    def dump_state(self, state: ExportState):
+        """Write incremental sync state into ExportState record."""
+        state.watermark = self.watermark
+        state.watermarkIDs = json.dumps(sorted(self.watermark_ids))
+        state.rowIndex = json.dumps(self.row_index)
+        state.nextRow = self.next_row
+        state.lastFullSync = self.last_full_sync
 
     def format_record(self, record: ModelType) -> List[Any]:
         """
@@ -0,0 +1,135 @@
+"""
+Write-behind accumulator of dialogue activity (last activity time, message count).
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import update, case, func
+
+from models.dialogue import Dialogue
+from core.db import run_in_db_executor
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class DialogueActivityTracker:
+    """
+    Collects activity touches per dialogue in memory and writes them in batches.
+
+    Every routed message used to commit its own lastActivityTime/messageCount update.
+    Touches are now merged per dialogue and flushed every DIALOGUE_ACTIVITY_FLUSH_MS
+    in a single UPDATE ... CASE statement; pending values are served to readers
+    before they reach the DB.
+    """
+
+    def __init__(self, flush_interval: float = None):
+        """
+        Args:
+            flush_interval: Seconds between flushes (default: DIALOGUE_ACTIVITY_FLUSH_MS)
+        """
+        if flush_interval is None:
+            flush_interval = float(Config.get(Config.DIALOGUE_ACTIVITY_FLUSH_MS, "2000")) / 1000
+        self.flush_interval = flush_interval
+
+        self._pending: Dict[str, Tuple[datetime, int]] = {}  # dialogue_id -> (last activity, new messages)
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {
+            'touches': 0,
+            'flushes': 0,
+            'rows_written': 0,
+            'failed_flushes': 0
+        }
+
+    def touch(self, dialogue_id: str, when: datetime = None, messages: int = 1) -> None:
+        """Record activity in dialogue; written to DB with the next flush."""
+        when = when or datetime.now()
+        last_activity, count = self._pending.get(dialogue_id, (when, 0))
+        self._pending[dialogue_id] = (max(last_activity, when), count + messages)
+        self.stats['touches'] += 1
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def get_last_activity(self, dialogue_id: str) -> Optional[datetime]:
+        """Last activity not yet written to DB, or None."""
+        pending = self._pending.get(dialogue_id)
+        return pending[0] if pending else None
+
+    def get_pending_messages(self, dialogue_id: str) -> int:
+        """Messages counted in memory but not yet written to DB."""
+        pending = self._pending.get(dialogue_id)
+        return pending[1] if pending else 0
+
+    async def _run(self) -> None:
+        try:
+            while self._pending:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+        except Exception as e:
+            logger.error(f"[UPDATE_ACTIVITY] Activity flusher stopped: {e}", exc_info=True)
+
+    async def flush(self) -> int:
+        """
+        Write pending activity in one transaction.
+
+        Returns:
+            Number of dialogues updated
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            batch, self._pending = self._pending, {}
+            ids = list(batch)
+
+            def write_activity(session):
+                statement = (
+                    update(Dialogue)
+                    .where(Dialogue.dialogueID.in_(ids))
+                    .values(
+                        lastActivityTime=case(
+                            {dialogue_id: last_activity for dialogue_id, (last_activity, _) in batch.items()},
+                            value=Dialogue.dialogueID
+                        ),
+                        messageCount=func.coalesce(Dialogue.messageCount, 0) + case(
+                            {dialogue_id: count for dialogue_id, (_, count) in batch.items()},
+                            value=Dialogue.dialogueID,
+                            else_=0
+                        )
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                result = session.execute(statement)
+                session.commit()
+                return result.rowcount
+
+            try:
+                rows = await run_in_db_executor(write_activity)
+            except Exception as e:
+                # Put the batch back so touches aren't lost, merging with newer ones
+                for dialogue_id, (last_activity, count) in batch.items():
+                    newer_activity, newer_count = self._pending.get(dialogue_id, (last_activity, 0))
+                    self._pending[dialogue_id] = (max(last_activity, newer_activity), count + newer_count)
+                self.stats['failed_flushes'] += 1
+                logger.error(f"[UPDATE_ACTIVITY] Failed to write activity of {len(batch)} dialogues: {e}")
+                return 0
+
+            self.stats['flushes'] += 1
+            self.stats['rows_written'] += rows
+            logger.debug(f"[UPDATE_ACTIVITY] Flushed activity of {len(batch)} dialogues ({rows} rows)")
+            return rows
+
+    async def stop(self) -> None:
+        """Stop periodic flushing and write what's pending."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
@@ -0,0 +1,274 @@
+"""
+In-memory registry of active dialogues - routing data without DB lookups.
+"""
+import json
+import logging
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, aliased
+
+from models.dialogue import Dialogue
+from models.ticket import Ticket
+from models.user import User
+from models.operator import Operator
+from services.dialogue_states import DialogueState
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ActiveDialogue:
+    """Everything routing needs to know about an active dialogue."""
+    dialogue_id: str
+    dialogue_type: str
+    ticket_id: Optional[int]
+    client_user_id: int
+    client_telegram_id: Optional[int]
+    operator_id: Optional[int]
+    operator_telegram_id: Optional[int]
+    group_id: Optional[int]
+    thread_id: Optional[int]
+    client_lang: str = 'en'
+    operator_lang: str = 'en'
+    state: Optional[DialogueState] = None
+    created_at: Optional[datetime] = None
+    last_activity: Optional[datetime] = None
+    context: Dict[str, Any] = field(default_factory=dict)
+
+    def to_info(self) -> Dict[str, Any]:
+        """Dialogue info in the format of DialogueService.get_dialogue_info."""
+        return {
+            'dialogue_id': self.dialogue_id,
+            'dialogue_type': self.dialogue_type,
+            'ticket_id': self.ticket_id,
+            'state': self.state,
+            'status': 'active',
+            'client_telegram_id': self.client_telegram_id,
+            'operator_telegram_id': self.operator_telegram_id,
+            'group_id': self.group_id,
+            'thread_id': self.thread_id,
+            'created_at': self.created_at,
+            'last_activity': self.last_activity,
+            'context': dict(self.context)
+        }
+
+
+def _parse_context(notes: Optional[str]) -> Dict[str, Any]:
+    try:
+        return json.loads(notes or "{}").get('context', {})
+    except (json.JSONDecodeError, AttributeError):
+        return {}
+
+
+def _operator_lang(operator: Optional[Operator], operator_user: Optional[User]) -> str:
+    """Operator language: first of Operator.languages, then operator's User.lang."""
+    if operator and operator.languages:
+        try:
+            languages = json.loads(operator.languages)
+            return languages[0] if languages else 'en'
+        except (json.JSONDecodeError, IndexError, TypeError):
+            return 'en'
+    if operator_user and operator_user.lang:
+        return operator_user.lang
+    return 'en'
+
+
+class ActiveDialogueRegistry:
+    """
+    Compact record of every active dialogue, keyed by dialogue ID and client.
+
+    Loaded from DB at startup and kept current by DialogueService when dialogues
+    are created, change state or close; DB remains the durable store. Records are
+    immutable - updates replace them, so readers never see half-applied changes.
+    """
+
+    def __init__(self):
+        self._dialogues: Dict[str, ActiveDialogue] = {}
+        self._by_client: Dict[int, str] = {}  # client telegram ID -> dialogue ID
+        self._by_thread: Dict[Tuple[int, int], str] = {}  # (group ID, thread ID) -> dialogue ID
+        self.stats = {
+            'hits': 0,
+            'misses': 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._dialogues)
+
+    def __contains__(self, dialogue_id: str) -> bool:
+        return dialogue_id in self._dialogues
+
+    def get(self, dialogue_id: str) -> Optional[ActiveDialogue]:
+        """Get active dialogue record or None."""
+        record = self._dialogues.get(dialogue_id)
+        self.stats['hits' if record else 'misses'] += 1
+        return record
+
+    def get_by_client(self, client_telegram_id: int) -> Optional[ActiveDialogue]:
+        """Get active dialogue of a client or None."""
+        dialogue_id = self._by_client.get(client_telegram_id)
+        return self.get(dialogue_id) if dialogue_id else None
+
+    def get_by_thread(self, group_id: int, thread_id: int) -> Optional[ActiveDialogue]:
+        """Get active dialogue of an operator forum topic or None."""
+        dialogue_id = self._by_thread.get((group_id, thread_id))
+        return self.get(dialogue_id) if dialogue_id else None
+
+    def all(self) -> List[ActiveDialogue]:
+        """All active dialogue records."""
+        return list(self._dialogues.values())
+
+    def put(self, record: ActiveDialogue) -> None:
+        """Add or replace dialogue record."""
+        old = self._dialogues.get(record.dialogue_id)
+        if old and old.client_telegram_id != record.client_telegram_id:
+            self._by_client.pop(old.client_telegram_id, None)
+        if old and (old.group_id, old.thread_id) != (record.group_id, record.thread_id):
+            self._forget_thread(old)
+
+        self._dialogues[record.dialogue_id] = record
+        if record.client_telegram_id:
+            self._by_client[record.client_telegram_id] = record.dialogue_id
+        if record.group_id and record.thread_id:
+            self._by_thread[(record.group_id, record.thread_id)] = record.dialogue_id
+
+    def update(self, dialogue_id: str, **changes) -> Optional[ActiveDialogue]:
+        """
+        Replace fields of dialogue record.
+
+        Returns:
+            Updated record or None if dialogue isn't registered
+        """
+        record = self._dialogues.get(dialogue_id)
+        if not record:
+            return None
+        record = replace(record, **changes)
+        self.put(record)
+        return record
+
+    def remove(self, dialogue_id: str) -> Optional[ActiveDialogue]:
+        """Forget dialogue (closed)."""
+        record = self._dialogues.pop(dialogue_id, None)
+        if record and self._by_client.get(record.client_telegram_id) == dialogue_id:
+            del self._by_client[record.client_telegram_id]
+        if record:
+            self._forget_thread(record)
+        return record
+
+    def _forget_thread(self, record: ActiveDialogue) -> None:
+        key = (record.group_id, record.thread_id)
+        if self._by_thread.get(key) == record.dialogue_id:
+            del self._by_thread[key]
+
+    def clear(self) -> None:
+        self._dialogues.clear()
+        self._by_client.clear()
+        self._by_thread.clear()
+
+    @staticmethod
+    def query_active(session: Session, dialogue_id: str = None):
+        """
+        One joined query over active dialogues.
+
+        Args:
+            session: DB session
+            dialogue_id: Only this dialogue (default: all active)
+
+        Returns:
+            Query yielding (Dialogue, client User, Operator or None, operator User or None)
+        """
+        client = aliased(User)
+        operator_user = aliased(User)
+
+        query = session.query(Dialogue, client, Operator, operator_user).join(
+            client, client.userID == Dialogue.userID
+        ).outerjoin(
+            Ticket, Ticket.ticketID == Dialogue.ticketID
+        ).outerjoin(
+            # Operator from dialogue, or assigned to ticket
+            Operator, Operator.operatorID == func.coalesce(Dialogue.operatorID, Ticket.assignedOperatorID)
+        ).outerjoin(
+            operator_user, operator_user.telegramID == Operator.telegramID
+        ).filter(
+            Dialogue.status == 'active'
+        )
+        if dialogue_id:
+            query = query.filter(Dialogue.dialogueID == dialogue_id)
+        return query
+
+    @staticmethod
+    def record_from_row(dialogue: Dialogue, client_user: User,
+                        operator: Optional[Operator], operator_user: Optional[User]) -> ActiveDialogue:
+        """Build record from a row of query_active."""
+        return ActiveDialogue(
+            dialogue_id=dialogue.dialogueID,
+            dialogue_type=dialogue.dialogueType,
+            ticket_id=dialogue.ticketID,
+            client_user_id=dialogue.userID,
+            client_telegram_id=client_user.telegramID,
+            operator_id=operator.operatorID if operator else dialogue.operatorID,
+            operator_telegram_id=operator.telegramID if operator else None,
+            group_id=dialogue.groupID,
+            thread_id=dialogue.threadID,
+            client_lang=client_user.lang or 'en',
+            operator_lang=_operator_lang(operator, operator_user),
+            state=DialogueState.from_string(dialogue.state),
+            created_at=dialogue.createdAt,
+            last_activity=dialogue.lastActivityTime,
+            context=_parse_context(dialogue.notes)
+        )
+
+    @classmethod
+    def load_records(cls, session: Session, dialogue_id: str = None) -> List[ActiveDialogue]:
+        """
+        Build records of active dialogues with one joined query.
+
+        Args:
+            session: DB session
+            dialogue_id: Load only this dialogue (default: all active)
+
+        Returns:
+            List of records
+        """
+        return [cls.record_from_row(*row) for row in cls.query_active(session, dialogue_id)]
+
+    def replace_all(self, records: List[ActiveDialogue]) -> None:
+        """Replace registry content."""
+        self.clear()
+        for record in records:
+            self.put(record)
+
+    def load(self, session: Session) -> int:
+        """
+        Replace registry content with active dialogues from DB.
+
+        Returns:
+            Number of registered dialogues
+        """
+        records = self.load_records(session)
+        self.replace_all(records)
+        logger.info(f"[REGISTRY] Loaded {len(records)} active dialogues")
+        return len(records)
+
+    def refresh(self, session: Session, dialogue_id: str) -> Optional[ActiveDialogue]:
+        """
+        Reload one dialogue from DB (registered if active, forgotten otherwise).
+
+        Returns:
+            Record or None if dialogue isn't active
+        """
+        records = self.load_records(session, dialogue_id)
+        if not records:
+            self.remove(dialogue_id)
+            return None
+        self.put(records[0])
+        return records[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get registry statistics."""
+        return {
+            'active_dialogues': len(self._dialogues),
+            **self.stats
+        }
@@ -2,20 +2,23 @@
 Dialogue message router for helpbot support system.
 Simplified version - only routing, no business logic.
 """
+import asyncio
 import logging
+import time
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set
 import json
 
 from aiogram.types import Message
-from aiogram.exceptions import TelegramAPIError
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
 
 from services.command_processor import CommandProcessor
 from services.ai_middleware import AIMiddleware
-from core.message_service import MessageService, DialogueEndpoint
-from core.db import get_db_session_ctx
+from core.message_service import MessageService, DialogueEndpoint, MessagePriority, is_message_gone
+from core.db import get_db_session_ctx, run_db_session
 from core.di import get_service
 from core.input_service import InputService
+from config import Config
 from models.dialogue import Dialogue
 from models.ticket import Ticket
 from models.user import User
@@ -47,6 +50,8 @@ class DialogueRouter:
         self.dialogue_service = None  # Will be set externally
         self.command_processor = None  # Will be created after dialogue_service is set
         self.ai_middleware = AIMiddleware()
+        self._background_tasks: Set[asyncio.Task] = set()  # Translations edited into sent messages
+        self._dialogue_tasks: Dict[str, Set[asyncio.Task]] = {}  # Same tasks by dialogue ID
 
     def set_dialogue_service(self, dialogue_service):
         """Set dialogue service reference and create command processor."""
@@ -65,7 +70,7 @@ class DialogueRouter:
         Returns:
             Tuple of (client_lang, operator_lang)
         """
-        with get_db_session_ctx() as session:
+        def resolve_languages(session):
             # Get client language
             client_user = session.query(User).filter_by(telegramID=client_telegram_id).first()
             client_lang = client_user.lang if client_user and client_user.lang else 'en'
@@ -94,6 +99,8 @@ class DialogueRouter:
             logger.debug(f"Languages resolved - client: {client_lang}, operator: {operator_lang}")
             return client_lang, operator_lang
 
+        return await run_db_session(resolve_languages)
+
     async def route_client_message(self, message: Message, dialogue_id: str) -> bool:
         """
         Route message from client to operator.
@@ -112,65 +119,89 @@ class DialogueRouter:
             )
 
             # ENHANCED CHECK: verify dialogue_id consistency with user's FSM and dialogue status
-            with get_db_session_ctx() as session:
+            def verify_dialogue(session):
                 user = session.query(User).filter_by(telegramID=message.from_user.id).first()
-                if user:
-                    fsm_state = user.get_fsm_state()
-                    fsm_context = user.get_fsm_context()
-                    fsm_dialogue_id = fsm_context.get('dialogue_id') if fsm_context else None
-
-                    logger.info(
-                        f"[ROUTE_CLIENT] FSM check for user {message.from_user.id}: "
-                        f"state='{fsm_state}', FSM dialogue='{fsm_dialogue_id}', "
-                        f"routing to dialogue='{dialogue_id}'"
+                if not user:
+                    return 'no_user', dialogue_id, None, None
+
+                fsm_state = user.get_fsm_state()
+                fsm_context = user.get_fsm_context()
+                fsm_dialogue_id = fsm_context.get('dialogue_id') if fsm_context else None
+                target_dialogue_id = dialogue_id
+
+                logger.info(
+                    f"[ROUTE_CLIENT] FSM check for user {message.from_user.id}: "
+                    f"state='{fsm_state}', FSM dialogue='{fsm_dialogue_id}', "
+                    f"routing to dialogue='{target_dialogue_id}'"
+                )
+
+                # DETECT DESYNC!
+                if fsm_dialogue_id and fsm_dialogue_id != target_dialogue_id:
+                    logger.error(
+                        f"[ROUTE_CLIENT] ⚠️ DESYNC DETECTED! User {message.from_user.id} "
+                        f"FSM has dialogue '{fsm_dialogue_id}' but routing to '{target_dialogue_id}'. "
+                        f"Using FSM dialogue instead!"
                     )
+                    # FIX: use dialogue_id from FSM as source of truth
+                    target_dialogue_id = fsm_dialogue_id
 
-                    # DETECT DESYNC!
-                    if fsm_dialogue_id and fsm_dialogue_id != dialogue_id:
-                        logger.error(
-                            f"[ROUTE_CLIENT] ⚠️ DESYNC DETECTED! User {message.from_user.id} "
-                            f"FSM has dialogue '{fsm_dialogue_id}' but routing to '{dialogue_id}'. "
-                            f"Using FSM dialogue instead!"
-                        )
-                        # FIX: use dialogue_id from FSM as source of truth
-                        dialogue_id = fsm_dialogue_id
-
-                    # NEW CHECK: verify dialogue exists and is active
-                    dialogue = session.query(Dialogue).filter_by(
-                        dialogueID=dialogue_id,
-                        status='active'
-                    ).first()
-
-                    if not dialogue:
-                        logger.error(
-                            f"[ROUTE_CLIENT] Dialogue {dialogue_id} not found or inactive. "
-                            f"Clearing FSM for user {message.from_user.id}"
-                        )
+                # NEW CHECK: verify dialogue exists and is active
+                dialogue = session.query(Dialogue).filter_by(
+                    dialogueID=target_dialogue_id,
+                    status='active'
+                ).first()
 
-                        # Clear FSM
-                        user.clear_fsm()
-                        session.commit()
+                if not dialogue:
+                    logger.error(
+                        f"[ROUTE_CLIENT] Dialogue {target_dialogue_id} not found or inactive. "
+                        f"Clearing FSM for user {message.from_user.id}"
+                    )
 
-                        # Send notification to user
-                        await self.message_service.send_template_to_telegram_id(
-                            telegram_id=message.from_user.id,
-                            template_key='/support/ticket_closed_while_typing',
-                            variables={'dialogue_id': dialogue_id}
-                        )
-                        return False
+                    # Clear FSM
+                    user.clear_fsm()
+                    session.commit()
+                    return 'inactive', target_dialogue_id, None, None
 
-                    # If dialogue is active, save its data for use outside session
-                    dialogue_group_id = dialogue.groupID
-                    dialogue_thread_id = dialogue.threadID
+                logger.debug(
+                    f"[ROUTE_CLIENT] Dialogue verified: "
+                    f"status={dialogue.status}, state={dialogue.state}, "
+                    f"group={dialogue.groupID}, thread={dialogue.threadID}"
+                )
+
+                # If dialogue is active, return its data for use outside session
+                return 'active', target_dialogue_id, dialogue.groupID, dialogue.threadID
 
-                    logger.debug(
-                        f"[ROUTE_CLIENT] Dialogue verified: "
-                        f"status={dialogue.status}, state={dialogue.state}, "
-                        f"group={dialogue_group_id}, thread={dialogue_thread_id}"
+            registry = self.dialogue_service.registry
+            record = registry.get_by_client(message.from_user.id)
+
+            if record:
+                # Registry knows client's active dialogue - no DB lookups
+                if record.dialogue_id != dialogue_id:
+                    logger.error(
+                        f"[ROUTE_CLIENT] ⚠️ DESYNC DETECTED! User {message.from_user.id} "
+                        f"has active dialogue '{record.dialogue_id}' but routing to '{dialogue_id}'. "
+                        f"Using active dialogue instead!"
                     )
-                else:
-                    logger.warning(f"[ROUTE_CLIENT] User {message.from_user.id} not found in DB")
-                    return False
+                status, dialogue_id = 'active', record.dialogue_id
+                dialogue_group_id, dialogue_thread_id = record.group_id, record.thread_id
+            else:
+                status, dialogue_id, dialogue_group_id, dialogue_thread_id = await run_db_session(verify_dialogue)
+                if status == 'active':
+                    # Active in DB but not registered - register it
+                    record = await run_db_session(lambda session: registry.refresh(session, dialogue_id))
+
+            if status == 'no_user':
+                logger.warning(f"[ROUTE_CLIENT] User {message.from_user.id} not found in DB")
+                return False
+
+            if status == 'inactive':
+                # Send notification to user
+                await self.message_service.send_template_to_telegram_id(
+                    telegram_id=message.from_user.id,
+                    template_key='/support/ticket_closed_while_typing',
+                    variables={'dialogue_id': dialogue_id}
+                )
+                return False
 
             # Update dialogue activity
             await self._update_dialogue_activity(dialogue_id)
@@ -180,7 +211,9 @@ class DialogueRouter:
             client_lang = 'en'
             operator_lang = 'en'
 
-            if dialogue_info and dialogue_info.get('operator_telegram_id'):
+            if record:
+                client_lang, operator_lang = record.client_lang, record.operator_lang
+            elif dialogue_info and dialogue_info.get('operator_telegram_id'):
                 operator_telegram_id = dialogue_info['operator_telegram_id']
                 client_lang, operator_lang = await self._get_user_languages(
                     message.from_user.id,
@@ -204,14 +237,23 @@ class DialogueRouter:
                 # Translate text message if needed
                 translation_result = {'display': message.text}  # Default - no translation
 
-                if dialogue_info and dialogue_info.get('operator_telegram_id'):
+                # Deliver-first: operator reads original now, translation is edited in when ready
+                # (always for long messages with streaming - translation fills in as it streams)
+                deliver_first = (
+                    (self._deliver_first_enabled() or self.ai_middleware.should_stream(message.text))
+                    and dialogue_info and dialogue_info.get('operator_telegram_id')
+                    and client_lang != operator_lang
+                )
+
+                if dialogue_info and dialogue_info.get('operator_telegram_id') and not deliver_first:
                     # Process message with translation
                     translation_result = await self.ai_middleware.process_dialogue_message(
                         text=message.text,
                         source_lang=client_lang,
                         target_lang=operator_lang,
                         direction='client_to_operator',
-                        dialogue_id=dialogue_id
+                        dialogue_id=dialogue_id,
+                        on_late_translation=self._late_translation_callback(operator_endpoint, dialogue_id)
                     )
 
                 # Send text with template
@@ -239,8 +281,14 @@ class DialogueRouter:
                 result = await self.message_service.send_template_to_endpoint(
                     endpoint=operator_endpoint,
                     template_key=template_key,
-                    variables=variables
+                    variables=variables,
+                    priority=MessagePriority.CLIENT_MESSAGE
                 )
+
+                if deliver_first and result:
+                    self._spawn(self._edit_in_translation(
+                        result, message.text, client_lang, operator_lang, dialogue_id, operator_endpoint
+                    ), dialogue_id)
             else:
                 # Handle media with potential caption translation
                 logger.debug(f"[ROUTE_CLIENT] Processing media message")
@@ -253,7 +301,10 @@ class DialogueRouter:
                         source_lang=client_lang,
                         target_lang=operator_lang,
                         direction='client_to_operator',
-                        dialogue_id=dialogue_id
+                        dialogue_id=dialogue_id,
+                        on_late_translation=self._late_translation_callback(
+                            operator_endpoint, dialogue_id, caption=True
+                        )
                     )
 
                     # Format caption based on translation result
@@ -265,54 +316,30 @@ class DialogueRouter:
                         caption_text = f"📥 Client: {message.caption}"
 
                     # Send media with translated caption
-                    if message.photo:
-                        result = await self.message_service.bot.send_photo(
-                            **operator_endpoint.get_send_params(),
-                            photo=message.photo[-1].file_id,
-                            caption=caption_text,
-                            parse_mode='HTML'
-                        )
-                    elif message.video:
-                        result = await self.message_service.bot.send_video(
-                            **operator_endpoint.get_send_params(),
-                            video=message.video.file_id,
-                            caption=caption_text,
-                            parse_mode='HTML'
-                        )
-                    elif message.document:
-                        result = await self.message_service.bot.send_document(
-                            **operator_endpoint.get_send_params(),
-                            document=message.document.file_id,
-                            caption=caption_text,
-                            parse_mode='HTML'
-                        )
-                    elif message.voice:
-                        result = await self.message_service.bot.send_voice(
-                            **operator_endpoint.get_send_params(),
-                            voice=message.voice.file_id,
+                    media_type, file_id = self._get_media(message)
+                    if media_type:
+                        result = await self.message_service.send_media_to_endpoint(
+                            endpoint=operator_endpoint,
+                            media_type=media_type,
+                            file_id=file_id,
                             caption=caption_text,
-                            parse_mode='HTML'
-                        )
-                    elif message.audio:
-                        result = await self.message_service.bot.send_audio(
-                            **operator_endpoint.get_send_params(),
-                            audio=message.audio.file_id,
-                            caption=caption_text,
-                            parse_mode='HTML'
+                            priority=MessagePriority.CLIENT_MESSAGE
                         )
                     else:
                         # Other media types - just forward
                         result = await self.message_service.forward_message(
                             message=message,
                             to_endpoint=operator_endpoint,
-                            with_comment="📥 Client: "
+                            with_comment="📥 Client: ",
+                            priority=MessagePriority.CLIENT_MESSAGE
                         )
                 else:
                     # No caption - forward as before
                     result = await self.message_service.forward_message(
                         message=message,
                         to_endpoint=operator_endpoint,
-                        with_comment="📥 Client: "
+                        with_comment="📥 Client: ",
+                        priority=MessagePriority.CLIENT_MESSAGE
                     )
 
             # If sending failed, check if we need to recreate thread
@@ -324,11 +351,16 @@ class DialogueRouter:
 
                 # Try to send a test message to check if thread exists
                 try:
-                    await self.message_service.bot.send_message(
-                        chat_id=dialogue_group_id,
-                        message_thread_id=dialogue_thread_id,
-                        text="."  # Minimal test message
+                    probe = await self.message_service.send_text_to_endpoint(
+                        endpoint=DialogueEndpoint('group', dialogue_group_id, dialogue_thread_id),
+                        text=".",  # Minimal test message
+                        priority=MessagePriority.CLIENT_MESSAGE,
+                        wait=False
                     )
+                    if probe is None:
+                        logger.error("[ROUTE_CLIENT] Couldn't queue thread check message")
+                        return False
+                    await probe
                     # If we're here, thread exists but something else is wrong
                     logger.error("[ROUTE_CLIENT] Thread exists but message sending failed for other reason")
                     return False
@@ -355,13 +387,15 @@ class DialogueRouter:
                                 result = await self.message_service.send_template_to_endpoint(
                                     endpoint=operator_endpoint,
                                     template_key=template_key,
-                                    variables=variables
+                                    variables=variables,
+                                    priority=MessagePriority.CLIENT_MESSAGE
                                 )
                             else:
                                 result = await self.message_service.forward_message(
                                     message=message,
                                     to_endpoint=operator_endpoint,
-                                    with_comment="📥 Client: "
+                                    with_comment="📥 Client: ",
+                                    priority=MessagePriority.CLIENT_MESSAGE
                                 )
 
                             success = result is not None
@@ -438,42 +472,50 @@ class DialogueRouter:
                 )
                 return False
 
-            # Get languages
-            client_lang, operator_lang = await self._get_user_languages(
-                dialogue_info.get('client_telegram_id'),
-                message.from_user.id
-            )
-
-            # Check client FSM state for consistency
-            with get_db_session_ctx() as session:
-                client_user = session.query(User).filter_by(telegramID=dialogue_info['client_telegram_id']).first()
-                if client_user:
-                    fsm_state = client_user.get_fsm_state()
-                    fsm_context = client_user.get_fsm_context()
-                    fsm_dialogue_id = fsm_context.get('dialogue_id') if fsm_context else None
-
-                    logger.debug(
-                        f"[ROUTE_OPERATOR] Client {dialogue_info['client_telegram_id']} FSM check: "
-                        f"state='{fsm_state}', FSM dialogue='{fsm_dialogue_id}', "
-                        f"current dialogue='{dialogue_id}'"
-                    )
+            record = self.dialogue_service.registry.get(dialogue_id)
+            if record and record.operator_telegram_id == message.from_user.id:
+                # Assigned operator writes - languages are known from registry,
+                # client's active dialogue too (no FSM sync needed)
+                client_lang, operator_lang = record.client_lang, record.operator_lang
+            else:
+                # Get languages
+                client_lang, operator_lang = await self._get_user_languages(
+                    dialogue_info.get('client_telegram_id'),
+                    message.from_user.id
+                )
 
-                    if fsm_dialogue_id and fsm_dialogue_id != dialogue_id:
-                        logger.warning(
-                            f"[ROUTE_OPERATOR] ⚠️ Client FSM desync! "
-                            f"FSM has '{fsm_dialogue_id}' but operator in '{dialogue_id}'. "
-                            f"Updating client FSM to match current dialogue."
+                # Check client FSM state for consistency
+                def sync_client_fsm(session):
+                    client_user = session.query(User).filter_by(telegramID=dialogue_info['client_telegram_id']).first()
+                    if client_user:
+                        fsm_state = client_user.get_fsm_state()
+                        fsm_context = client_user.get_fsm_context()
+                        fsm_dialogue_id = fsm_context.get('dialogue_id') if fsm_context else None
+
+                        logger.debug(
+                            f"[ROUTE_OPERATOR] Client {dialogue_info['client_telegram_id']} FSM check: "
+                            f"state='{fsm_state}', FSM dialogue='{fsm_dialogue_id}', "
+                            f"current dialogue='{dialogue_id}'"
                         )
-                        # Fix client FSM to match current dialogue
-                        fsm_context = {
-                            "dialogue_id": dialogue_id,
-                            "ticket_id": dialogue_info.get('ticket_id'),
-                            "thread_id": dialogue_info.get('thread_id'),
-                            "operator_id": message.from_user.id,
-                            "updated_at": datetime.now().isoformat()
-                        }
-                        client_user.set_fsm_state("has_ticket", fsm_context)
-                        session.commit()
+
+                        if fsm_dialogue_id and fsm_dialogue_id != dialogue_id:
+                            logger.warning(
+                                f"[ROUTE_OPERATOR] ⚠️ Client FSM desync! "
+                                f"FSM has '{fsm_dialogue_id}' but operator in '{dialogue_id}'. "
+                                f"Updating client FSM to match current dialogue."
+                            )
+                            # Fix client FSM to match current dialogue
+                            fsm_context = {
+                                "dialogue_id": dialogue_id,
+                                "ticket_id": dialogue_info.get('ticket_id'),
+                                "thread_id": dialogue_info.get('thread_id'),
+                                "operator_id": message.from_user.id,
+                                "updated_at": datetime.now().isoformat()
+                            }
+                            client_user.set_fsm_state("has_ticket", fsm_context)
+                            session.commit()
+
+                await run_db_session(sync_client_fsm)
 
             client_endpoint = DialogueEndpoint('user', dialogue_info['client_telegram_id'])
 
@@ -489,7 +531,8 @@ class DialogueRouter:
                     source_lang=operator_lang,
                     target_lang=client_lang,
                     direction='operator_to_client',
-                    dialogue_id=dialogue_id
+                    dialogue_id=dialogue_id,
+                    on_late_translation=self._late_translation_callback(client_endpoint, dialogue_id)
                 )
 
                 # Client sees ONLY translation (or original if same language)
@@ -508,7 +551,8 @@ class DialogueRouter:
                         'operator_name': 'Support',
                         'message': actual_message_text,
                         'dialogue_id': dialogue_id
-                    }
+                    },
+                    priority=MessagePriority.OPERATOR_REPLY
                 )
             else:
                 # Handle media with potential caption translation
@@ -522,7 +566,10 @@ class DialogueRouter:
                         source_lang=operator_lang,
                         target_lang=client_lang,
                         direction='operator_to_client',
-                        dialogue_id=dialogue_id
+                        dialogue_id=dialogue_id,
+                        on_late_translation=self._late_translation_callback(
+                            client_endpoint, dialogue_id, caption=True
+                        )
                     )
 
                     # Client sees only translated caption
@@ -532,54 +579,30 @@ class DialogueRouter:
                         caption_text = f"💬 Support: {message.caption}"
 
                     # Send media with translated caption
-                    if message.photo:
-                        await self.message_service.bot.send_photo(
-                            **client_endpoint.get_send_params(),
-                            photo=message.photo[-1].file_id,
-                            caption=caption_text,
-                            parse_mode='HTML'
-                        )
-                    elif message.video:
-                        await self.message_service.bot.send_video(
-                            **client_endpoint.get_send_params(),
-                            video=message.video.file_id,
-                            caption=caption_text,
-                            parse_mode='HTML'
-                        )
-                    elif message.document:
-                        await self.message_service.bot.send_document(
-                            **client_endpoint.get_send_params(),
-                            document=message.document.file_id,
-                            caption=caption_text,
-                            parse_mode='HTML'
-                        )
-                    elif message.voice:
-                        await self.message_service.bot.send_voice(
-                            **client_endpoint.get_send_params(),
-                            voice=message.voice.file_id,
+                    media_type, file_id = self._get_media(message)
+                    if media_type:
+                        await self.message_service.send_media_to_endpoint(
+                            endpoint=client_endpoint,
+                            media_type=media_type,
+                            file_id=file_id,
                             caption=caption_text,
-                            parse_mode='HTML'
-                        )
-                    elif message.audio:
-                        await self.message_service.bot.send_audio(
-                            **client_endpoint.get_send_params(),
-                            audio=message.audio.file_id,
-                            caption=caption_text,
-                            parse_mode='HTML'
+                            priority=MessagePriority.OPERATOR_REPLY
                         )
                     else:
                         # Other media types - just forward
                         await self.message_service.forward_message(
                             message=message,
                             to_endpoint=client_endpoint,
-                            with_comment="💬 Support: "
+                            with_comment="💬 Support: ",
+                            priority=MessagePriority.OPERATOR_REPLY
                         )
                 else:
                     # No caption - forward as before
                     await self.message_service.forward_message(
                         message=message,
                         to_endpoint=client_endpoint,
-                        with_comment="💬 Support: "
+                        with_comment="💬 Support: ",
+                        priority=MessagePriority.OPERATOR_REPLY
                     )
 
             logger.info(f"[ROUTE_OPERATOR] Message routing successful for dialogue {dialogue_id}")
@@ -589,25 +612,237 @@ class DialogueRouter:
             logger.error(f"[ROUTE_OPERATOR] Error routing operator message: {e}", exc_info=True)
             return False
 
-    async def _update_dialogue_activity(self, dialogue_id: str):
-        """Update dialogue last activity time and message count."""
+    @staticmethod
+    def _get_media(message: Message) -> tuple[Optional[str], Optional[str]]:
+        """Media type and file ID of a message that can be re-sent with a new caption, or (None, None)."""
+        if message.photo:
+            return 'photo', message.photo[-1].file_id
+        for media_type in ('video', 'document', 'voice', 'audio'):
+            media = getattr(message, media_type)
+            if media:
+                return media_type, media.file_id
+        return None, None
+
+    @staticmethod
+    def _deliver_first_enabled() -> bool:
+        value = Config.get(Config.DIALOGUE_DELIVER_FIRST, False)
+        return value is True or str(value).lower() == "true"
+
+    def _spawn(self, coro, dialogue_id: str) -> None:
+        """Run background coroutine of a dialogue, keeping a reference until it finishes."""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+        dialogue_tasks = self._dialogue_tasks.setdefault(dialogue_id, set())
+        dialogue_tasks.add(task)
+
+        def forget(done: asyncio.Task):
+            dialogue_tasks.discard(done)
+            if not dialogue_tasks and self._dialogue_tasks.get(dialogue_id) is dialogue_tasks:
+                del self._dialogue_tasks[dialogue_id]
+
+        task.add_done_callback(forget)
+
+    def cancel_dialogue_tasks(self, dialogue_id: str) -> None:
+        """
+        Cancel translation work still pending for a closed dialogue.
+
+        Must run before the dialogue's topic goes back to the pool: late translations
+        post to the thread they captured, which may belong to another ticket next.
+        """
+        cancelled = self.ai_middleware.cancel_dialogue_tasks(dialogue_id)
+        tasks = self._dialogue_tasks.pop(dialogue_id, set())
+        for task in tasks:
+            task.cancel()
+        cancelled += len(tasks)
+
+        if cancelled:
+            logger.info(f"[CLOSE] Cancelled {cancelled} pending translation tasks of dialogue {dialogue_id}")
+
+    async def _edit_in_translation(self, sent_message: Message, text: str, client_lang: str,
+                                   operator_lang: str, dialogue_id: str, endpoint: DialogueEndpoint):
+        """
+        Translate client message already delivered to operator and edit translation into it.
+
+        Args:
+            sent_message: Message with original text in operator thread
+            text: Original client text
+            client_lang: Client language
+            operator_lang: Operator language
+            dialogue_id: Dialogue ID
+            endpoint: Operator thread endpoint (for follow-up if edit fails)
+        """
         try:
-            with get_db_session_ctx() as session:
-                dialogue = session.query(Dialogue).filter_by(dialogueID=dialogue_id).first()
-                if dialogue:
-                    old_activity = dialogue.lastActivityTime
-                    dialogue.lastActivityTime = datetime.now()
-                    dialogue.messageCount = (dialogue.messageCount or 0) + 1
-                    session.commit()
-                    logger.debug(
-                        f"[UPDATE_ACTIVITY] Dialogue {dialogue_id}: "
-                        f"message_count={dialogue.messageCount}, "
-                        f"last_activity updated from {old_activity} to {dialogue.lastActivityTime}"
+            edit_translation = self._translation_edit_callback(sent_message, endpoint, dialogue_id)
+            show_progress = None
+            if self.ai_middleware.should_stream(text):
+                show_progress = self._translation_progress_callback(sent_message, text, dialogue_id)
+
+            translation_result = await self.ai_middleware.process_dialogue_message(
+                text=text,
+                source_lang=client_lang,
+                target_lang=operator_lang,
+                direction='client_to_operator',
+                dialogue_id=dialogue_id,
+                on_late_translation=edit_translation,
+                on_progress=show_progress
+            )
+
+            if translation_result.get('display') == 'both':
+                await edit_translation(translation_result)
+        except Exception as e:
+            logger.error(f"[DELIVER_FIRST] Error translating message for dialogue {dialogue_id}: {e}", exc_info=True)
+
+    def _translation_progress_callback(self, sent_message: Message, original: str, dialogue_id: str):
+        """
+        Build callback showing partial streamed translation in operator message.
+
+        Edits go through the message queue (group rate limit, EDIT priority) and are
+        throttled to one per CLAUDE_STREAM_EDIT_INTERVAL seconds, with at most one
+        waiting in the queue per message. An edit hit by flood control is dropped -
+        the next one supersedes it. Complete translation is written by the edit
+        callback once streaming ends.
+        """
+        interval = float(Config.get(Config.CLAUDE_STREAM_EDIT_INTERVAL, "3"))
+        last_edit_at = time.monotonic()  # Original has just been sent
+        pending_edit: Optional[asyncio.Future] = None
+
+        async def show_progress(partial: str):
+            nonlocal last_edit_at, pending_edit
+            if pending_edit is not None and not pending_edit.done():
+                return
+            now = time.monotonic()
+            if now - last_edit_at < interval:
+                return
+            last_edit_at = now
+
+            pending_edit = await self.message_service.edit_template_message(
+                sent_message,
+                template_key='/support/translated_client_message',
+                variables={
+                    'client_name': 'Client',
+                    'original': original,
+                    'translated': f"{partial} …",
+                    'dialogue_id': dialogue_id
+                },
+                drop_on_flood=True,
+                wait=False
+            )
+
+        return show_progress
+
+    def _translation_edit_callback(self, sent_message: Message, endpoint: DialogueEndpoint, dialogue_id: str):
+        """
+        Build callback replacing original message with original + translation.
+
+        The edit is queued like any message to the group. Translation is posted
+        separately only if the original is gone or can't be edited - not when
+        the edit was lost to flood control.
+        """
+        async def edit_translation(translation_result: Dict[str, Any]):
+            delivery = await self.message_service.edit_template_message(
+                sent_message,
+                template_key='/support/translated_client_message',
+                variables={
+                    'client_name': 'Client',
+                    'original': translation_result['original'],
+                    'translated': translation_result['translated'],
+                    'dialogue_id': dialogue_id
+                },
+                wait=False
+            )
+            if delivery is None:
+                return
+
+            try:
+                await delivery
+            except TelegramRetryAfter as e:
+                logger.warning(
+                    f"[DELIVER_FIRST] Translation edit of message {sent_message.message_id} "
+                    f"given up under flood control (retry after {e.retry_after}s)"
+                )
+                return
+            except TelegramAPIError as e:
+                if not is_message_gone(e):
+                    logger.error(f"[DELIVER_FIRST] Failed to edit translation into message "
+                                 f"{sent_message.message_id}: {e}")
+                    return
+                # Message gone or not editable - post translation separately
+                logger.info(f"[DELIVER_FIRST] Message {sent_message.message_id} can't be edited, "
+                            f"posting translation separately")
+                await self._late_translation_callback(endpoint, dialogue_id)(translation_result)
+                return
+
+            logger.debug(f"[DELIVER_FIRST] Translation edited into message {sent_message.message_id}")
+
+        return edit_translation
+
+    def _late_translation_callback(self, endpoint: DialogueEndpoint, dialogue_id: str, caption: bool = False):
+        """
+        Build callback posting a translation that arrived after the original was delivered.
+
+        Args:
+            endpoint: Where the original message went
+            dialogue_id: Dialogue ID
+            caption: True if translated text is a media caption
+        """
+        async def send_translation(translation_result: Dict[str, Any]):
+            if self.dialogue_service and dialogue_id not in self.dialogue_service.registry:
+                # Dialogue closed meanwhile - its topic may already serve another ticket
+                logger.info(f"[LATE_TRANSLATION] Dialogue {dialogue_id} is closed, dropping late translation")
+                return
+
+            translated = translation_result['translated']
+
+            if translation_result.get('display') == 'both':
+                # Operator gets original and translation, as with in-time translation
+                if caption:
+                    await self.message_service.send_text_to_endpoint(
+                        endpoint=endpoint,
+                        text=f"📝 Translation:\n{translated}"
                     )
                 else:
-                    logger.warning(f"[UPDATE_ACTIVITY] Dialogue {dialogue_id} not found for activity update")
-        except Exception as e:
-            logger.error(f"[UPDATE_ACTIVITY] Error updating dialogue activity: {e}")
+                    await self.message_service.send_template_to_endpoint(
+                        endpoint=endpoint,
+                        template_key='/support/translated_client_message',
+                        variables={
+                            'client_name': 'Client',
+                            'original': translation_result['original'],
+                            'translated': translated,
+                            'dialogue_id': dialogue_id
+                        }
+                    )
+            else:
+                # Client got operator's original text, follow up with translation
+                if caption:
+                    await self.message_service.send_text_to_endpoint(
+                        endpoint=endpoint,
+                        text=f"💬 Support: {translated}"
+                    )
+                else:
+                    await self.message_service.send_template_to_endpoint(
+                        endpoint=endpoint,
+                        template_key='/support/client_operator_message',
+                        variables={
+                            'operator_name': 'Support',
+                            'message': translated,
+                            'dialogue_id': dialogue_id
+                        }
+                    )
+
+            logger.info(f"[LATE_TRANSLATION] Posted late translation for dialogue {dialogue_id}")
+
+        return send_translation
+
+    async def _update_dialogue_activity(self, dialogue_id: str):
+        """Update dialogue last activity time and message count, re-arm its auto-close deadline."""
+        if not self.dialogue_service:
+            logger.warning(f"[UPDATE_ACTIVITY] Dialogue service not set, activity of {dialogue_id} not recorded")
+            return
+
+        # Written to DB in batches by DialogueActivityTracker
+        self.dialogue_service.record_activity(dialogue_id)
 
     async def _recreate_dialogue_thread(self, dialogue_id: str, dialogue_info: Dict[str, Any]) -> Optional[int]:
         """
@@ -661,6 +896,7 @@ class DialogueRouter:
                 old_thread_id = dialogue.threadID
                 dialogue.threadID = new_thread_id
                 session.commit()
+                self.dialogue_service.registry.update(dialogue_id, thread_id=new_thread_id)
 
                 logger.info(
                     f"[RECREATE_THREAD] Updated dialogue {dialogue_id}: "
@@ -668,12 +904,12 @@ class DialogueRouter:
                 )
 
                 # Send notification about restoration
-                await bot.send_message(
-                    chat_id=dialogue_info['group_id'],
-                    message_thread_id=new_thread_id,
+                await self.message_service.send_text_to_endpoint(
+                    endpoint=DialogueEndpoint('group', dialogue_info['group_id'], new_thread_id),
                     text=f"⚠️ Thread was deleted and restored\n"
                          f"Dialogue: {dialogue_id}\n"
-                         f"Client messages will continue here."
+                         f"Client messages will continue here.",
+                    wait=False
                 )
 
                 # Re-register handlers
@@ -9,14 +9,19 @@ import asyncio
 
 from aiogram import Bot
 from aiogram.types import ForumTopic
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
 
 from models.dialogue import Dialogue
 from models.ticket import Ticket, TicketStatus, TicketPriority
 from models.user import User
-from core.db import get_db_session_ctx
+from core.db import get_db_session_ctx, run_db_session, run_in_db_executor
+from core.utils import DeadlineScheduler
 from core.message_service import MessageService, DialogueEndpoint
 from core.input_service import InputService
 from services.dialogue_states import DialogueState
+from services.dialogue_activity import DialogueActivityTracker
+from services.dialogue_registry import ActiveDialogueRegistry
+from services.topic_pool import ForumTopicPool
 from models.operator import Operator
 from config import Config
 
@@ -32,6 +37,7 @@ class DialogueService:
     - Register/unregister message handlers
     - Update dialogue states
     - Create Telegram topics for operators
+    - Keep registry of active dialogues used for routing
     """
 
     def __init__(self, bot: Bot, message_service: MessageService, input_service: InputService):
@@ -49,8 +55,18 @@ class DialogueService:
 
         # Will be set by external router
         self.message_router = None
-        self.check_stale_task = None
-        self.check_fsm_task = None  # For FSM cleanup task
+
+        # Routing data of active dialogues; DB remains the durable store
+        self.registry = ActiveDialogueRegistry()
+        self.input_service.set_dialogue_registry(self.registry)
+
+        # Auto-close deadline of every active dialogue, re-armed on activity
+        self.stale_scheduler = DeadlineScheduler(self._close_stale_dialogue, name="stale_check")
+        # Activity is written to DB in batches
+        self.activity_tracker = DialogueActivityTracker()
+        # Forum topics created ahead of time, recycled after close
+        self.topic_pool = ForumTopicPool(bot)
+        self._background_tasks = set()
 
     def set_message_router(self, router):
         """Set message router for handling dialogue messages."""
@@ -164,8 +180,11 @@ class DialogueService:
 
                 session.commit()
 
+            await run_db_session(lambda session: self.registry.refresh(session, dialogue_id))
+
             # Register message handlers with saved data
             await self._register_dialogue_handlers(dialogue_id, client_telegram_id, group_id, thread_id)
+            self.touch_dialogue(dialogue_id)
 
             # Send welcome messages with saved data
             await self._send_welcome_messages(dialogue_id, ticket, client_telegram_id, client_display_name)
@@ -264,6 +283,8 @@ class DialogueService:
                             ticket.resolutionTime = int((ticket.resolvedAt - ticket.createdAt).total_seconds() / 60)
 
                 session.commit()
+                self.registry.remove(dialogue_id)
+                self.stale_scheduler.cancel(dialogue_id)
 
                 # Send closing messages
                 await self._send_closing_messages(dialogue_id, closed_by, reason)
@@ -271,6 +292,9 @@ class DialogueService:
                 # Unregister handlers AND cleanup ALL user handlers
                 await self._unregister_dialogue_handlers(dialogue_id, client_telegram_id,
                                                          dialogue.groupID, dialogue.threadID)
+                if self.message_router:
+                    self.message_router.cancel_dialogue_tasks(dialogue_id)
+                await self.topic_pool.release(dialogue.groupID, dialogue.threadID)
 
                 # CRITICAL: Cleanup ALL user handlers to prevent zombies
                 if client_telegram_id:
@@ -306,7 +330,6 @@ class DialogueService:
 
                 old_state = dialogue.state
                 dialogue.state = str(new_state)
-                dialogue.updatedAt = datetime.now()
 
                 # Update context if provided
                 if context:
@@ -321,6 +344,14 @@ class DialogueService:
 
                 session.commit()
 
+                record = self.registry.get(dialogue_id)
+                if record:
+                    self.registry.update(
+                        dialogue_id,
+                        state=new_state,
+                        context={**record.context, **(context or {})}
+                    )
+
                 logger.info(f"Updated dialogue {dialogue_id} state: {old_state} -> {new_state}")
                 return True
 
@@ -339,7 +370,14 @@ class DialogueService:
             Dict with dialogue info or None if not found
         """
         try:
-            with get_db_session_ctx() as session:
+            record = self.registry.get(dialogue_id)
+            if record:
+                info = record.to_info()
+                info['last_activity'] = self.activity_tracker.get_last_activity(dialogue_id) or record.last_activity
+                return info
+
+            # Not active (or registered yet) - load from DB
+            def load_dialogue_info(session):
                 dialogue = session.query(Dialogue).filter_by(dialogueID=dialogue_id).first()
                 if not dialogue:
                     return None
@@ -387,6 +425,15 @@ class DialogueService:
                     'context': context
                 }
 
+            info = await run_db_session(load_dialogue_info)
+
+            # Activity not yet flushed to DB is newer than the stored value
+            pending_activity = self.activity_tracker.get_last_activity(dialogue_id)
+            if info and pending_activity:
+                info['last_activity'] = max(filter(None, (info['last_activity'], pending_activity)))
+
+            return info
+
         except Exception as e:
             logger.error(f"Error getting dialogue info: {e}", exc_info=True)
             return None
@@ -395,27 +442,33 @@ class DialogueService:
 
     async def _create_forum_topic(self, group_id: int, topic_name: str,
                                   ticket_id: int, operator_id: int) -> Optional[int]:
-        """Create forum topic in operators group."""
+        """
+        Get forum topic in operators group: free one from the pool, or a new one.
+
+        Returns:
+            Thread ID or None if failed
+        """
         try:
             logger.info(f"Creating topic: group_id={group_id}, name='{topic_name}'")
 
-            # All data operations inside session context
-            with get_db_session_ctx() as session:
-                operator = session.query(Operator).filter_by(operatorID=operator_id).first()
-                if not operator:
-                    logger.error(f"Operator {operator_id} not found for topic creation")
-                    return None
+            def load_topic_data(session):
+                ticket, client, operator = session.query(Ticket, User, Operator).outerjoin(
+                    User, User.userID == Ticket.userID
+                ).outerjoin(
+                    Operator, Operator.operatorID == operator_id
+                ).filter(
+                    Ticket.ticketID == ticket_id
+                ).first() or (None, None, None)
 
-                ticket = session.query(Ticket).filter_by(ticketID=ticket_id).first()
                 if not ticket:
                     logger.error(f"Ticket {ticket_id} not found for topic creation")
                     return None
-
-                client = session.query(User).filter_by(userID=ticket.userID).first()
+                if not operator:
+                    logger.error(f"Operator {operator_id} not found for topic creation")
+                    return None
 
                 # Build informative topic name
                 client_name = client.displayName if client else f"User{ticket.userID}"
-                operator_tg = operator.telegramID
 
                 # Priority indicator for topic name
                 priority_emoji = {
@@ -431,11 +484,16 @@ class DialogueService:
                     issue = issue[:27] + "..."
 
                 # Format: "🟢 ClientName | Op:123456 | Issue"
-                topic_name = f"{priority_emoji} {client_name} | Op:{operator_tg} | {issue}"
+                return f"{priority_emoji} {client_name} | Op:{operator.telegramID} | {issue}"
+
+            topic_name = await run_in_db_executor(load_topic_data)
+            if not topic_name:
+                return None
 
-                # Save data we need outside session
-                client_telegram_id = client.telegramID if client else None
-                mainbot_user_id = ticket.mainbot_user_id
+            # Free topic is only renamed (pool topics keep their color)
+            thread_id = await self.topic_pool.acquire(group_id, topic_name)
+            if thread_id:
+                return thread_id
 
             # Color based on OPERATOR ID (each operator has their color)
             colors = [0x6FB9F0, 0xFFD67E, 0xCB86DB, 0x8EEE98, 0xFF93B2, 0xFB6F5F]
@@ -454,18 +512,7 @@ class DialogueService:
                 logger.error("Failed to create forum topic")
                 return None
 
-            thread_id = topic.message_thread_id
-
-            # Send initial info using TEMPLATE
-            operator_endpoint = DialogueEndpoint('group', group_id, thread_id)
-
-            # Get mainbot user info if available
-            user_info = None
-            if mainbot_user_id and client_telegram_id:
-                from services.mainbot_service import MainbotService
-                user_info = await MainbotService.get_user_summary(client_telegram_id)
-
-            return thread_id
+            return topic.message_thread_id
 
         except Exception as e:
             logger.error(f"Error creating forum topic: {e}")
@@ -482,84 +529,107 @@ class DialogueService:
             logger.info(f"[REGISTER_HANDLERS] Cleaning up old handlers for user {client_telegram_id} before registration")
             await self.input_service.cleanup_user_handlers(client_telegram_id)
 
-            # Handler for client messages - NO CLOSURE on dialogue_id!
-            async def handle_client_message(message):
-                logger.debug(f"Client handler triggered for user {client_telegram_id}")
-
-                # ALWAYS get current dialogue_id from FSM
-                with get_db_session_ctx() as session:
-                    user = session.query(User).filter_by(telegramID=client_telegram_id).first()
-                    if not user:
-                        logger.error(f"User {client_telegram_id} not found in handler")
-                        return
-
-                    if user.get_fsm_state() != "has_ticket":
-                        logger.warning(f"User {client_telegram_id} not in has_ticket state in handler")
-                        return
-
-                    fsm_context = user.get_fsm_context()
-                    current_dialogue_id = fsm_context.get("dialogue_id")
-
-                    if not current_dialogue_id:
-                        logger.error(f"No dialogue_id in FSM for user {client_telegram_id}")
-                        return
-
-                    # CRITICAL: Check that dialogue exists and is active
-                    dialogue = session.query(Dialogue).filter_by(
-                        dialogueID=current_dialogue_id,
-                        status='active'
-                    ).first()
-
-                    if not dialogue:
-                        logger.warning(
-                            f"User {client_telegram_id} trying to send message to inactive/missing "
-                            f"dialogue {current_dialogue_id}. Clearing FSM and notifying user."
-                        )
-                        user.clear_fsm()
-                        session.commit()
-
-                        # CRITICAL: Notify user that ticket is closed
-                        await self.message_service.send_template_to_telegram_id(
-                            telegram_id=client_telegram_id,
-                            template_key='/support/ticket_closed_notification',
-                            variables={'dialogue_id': current_dialogue_id}
-                        )
-
-                        # CRITICAL: Clean up this handler since dialogue is no longer active
-                        logger.info(f"[CLIENT_HANDLER] Cleaning up handler for user {client_telegram_id} after inactive dialogue detected")
-                        await self.input_service.cleanup_user_handlers(client_telegram_id)
-                        return
-
-                    logger.debug(f"Routing to active dialogue {current_dialogue_id}")
-                    if self.message_router:
-                        await self.message_router.route_client_message(message, current_dialogue_id)
-
             # REGISTER HANDLER FOR CLIENT
             await self.input_service.register_user_handler(
                 user_id=client_telegram_id,
-                handler=handle_client_message,
+                handler=self._make_client_handler(client_telegram_id),
                 state="has_ticket"
             )
             logger.info(f"Registered client handler for user {client_telegram_id} with state 'has_ticket'")
 
-            # Handler for operator messages - closure on dialogue_id is OK here,
-            # because thread is tied to specific dialogue
-            async def handle_operator_message(message):
-                logger.debug(f"Operator handler triggered in thread {thread_id}, "
-                             f"forwarding to dialogue {dialogue_id}")
-                if self.message_router:
-                    await self.message_router.route_operator_message(message, dialogue_id)
-
             await self.input_service.register_thread_handler(
                 group_id=group_id,
                 thread_id=thread_id,
-                handler=handle_operator_message
+                handler=self._make_operator_handler(dialogue_id, thread_id)
             )
             logger.info(f"Registered operator handler for thread {group_id}/{thread_id}")
 
         except Exception as e:
             logger.error(f"Error registering handlers for dialogue {dialogue_id}: {e}", exc_info=True)
 
+    def _make_client_handler(self, client_telegram_id: int):
+        """Build handler for client messages - NO CLOSURE on dialogue_id!"""
+        async def handle_client_message(message):
+            logger.debug(f"Client handler triggered for user {client_telegram_id}")
+
+            # Active dialogue of the client is known from registry
+            record = self.registry.get_by_client(client_telegram_id)
+            if record:
+                if self.message_router:
+                    await self.message_router.route_client_message(message, record.dialogue_id)
+                return
+
+            # Not registered - get current dialogue_id from FSM (off the event loop)
+            def resolve_fsm_dialogue(session):
+                user = session.query(User).filter_by(telegramID=client_telegram_id).first()
+                if not user:
+                    logger.error(f"User {client_telegram_id} not found in handler")
+                    return 'error', None
+
+                if user.get_fsm_state() != "has_ticket":
+                    logger.warning(f"User {client_telegram_id} not in has_ticket state in handler")
+                    return 'error', None
+
+                fsm_context = user.get_fsm_context()
+                current_dialogue_id = fsm_context.get("dialogue_id")
+
+                if not current_dialogue_id:
+                    logger.error(f"No dialogue_id in FSM for user {client_telegram_id}")
+                    return 'error', None
+
+                # CRITICAL: Check that dialogue exists and is active
+                dialogue = session.query(Dialogue).filter_by(
+                    dialogueID=current_dialogue_id,
+                    status='active'
+                ).first()
+
+                if not dialogue:
+                    logger.warning(
+                        f"User {client_telegram_id} trying to send message to inactive/missing "
+                        f"dialogue {current_dialogue_id}. Clearing FSM and notifying user."
+                    )
+                    user.clear_fsm()
+                    session.commit()
+                    return 'inactive', current_dialogue_id
+
+                return 'active', current_dialogue_id
+
+            status, current_dialogue_id = await run_in_db_executor(resolve_fsm_dialogue)
+
+            if status == 'inactive':
+                # CRITICAL: Notify user that ticket is closed
+                await self.message_service.send_template_to_telegram_id(
+                    telegram_id=client_telegram_id,
+                    template_key='/support/ticket_closed_notification',
+                    variables={'dialogue_id': current_dialogue_id},
+                    wait=False
+                )
+
+                # CRITICAL: Clean up this handler since dialogue is no longer active
+                logger.info(f"[CLIENT_HANDLER] Cleaning up handler for user {client_telegram_id} after inactive dialogue detected")
+                await self.input_service.cleanup_user_handlers(client_telegram_id)
+                return
+
+            if status == 'active':
+                logger.debug(f"Routing to active dialogue {current_dialogue_id}")
+                if self.message_router:
+                    await self.message_router.route_client_message(message, current_dialogue_id)
+
+        return handle_client_message
+
+    def _make_operator_handler(self, dialogue_id: str, thread_id: int):
+        """
+        Build handler for operator messages - closure on dialogue_id is OK here,
+        because thread is tied to specific dialogue.
+        """
+        async def handle_operator_message(message):
+            logger.debug(f"Operator handler triggered in thread {thread_id}, "
+                         f"forwarding to dialogue {dialogue_id}")
+            if self.message_router:
+                await self.message_router.route_operator_message(message, dialogue_id)
+
+        return handle_operator_message
+
     async def _unregister_dialogue_handlers(self, dialogue_id: str, client_telegram_id: int,
                                             group_id: int, thread_id: int):
         """Unregister message handlers."""
@@ -678,128 +748,168 @@ class DialogueService:
         except Exception as e:
             logger.error(f"Error sending closing messages: {e}")
 
-    async def start_stale_check_task(self):
-        """Start background tasks for checking stale dialogues and FSM."""
-        if self.check_stale_task is None:
-            self.check_stale_task = asyncio.create_task(self._check_stale_dialogues())
-            logger.info("Started stale dialogue check task")
-
-        # Start FSM check task
-        if self.check_fsm_task is None:
-            self.check_fsm_task = asyncio.create_task(self.check_stale_fsm_states())
-            logger.info("Started stale FSM check task")
-
-    async def _check_stale_dialogues(self):
-        """Background task to check and close stale dialogues."""
-        while True:
-            try:
-                await asyncio.sleep(300)  # Check every 5 minutes
-
-                with get_db_session_ctx() as session:
-                    # Find dialogues inactive for more than configured hours
-                    auto_close_hours = Config.get(Config.AUTO_CLOSE_HOURS, 24)
-                    cutoff_time = datetime.now() - timedelta(hours=auto_close_hours)
-
-                    stale_dialogues = session.query(Dialogue).filter(
-                        Dialogue.status == 'active',
-                        Dialogue.lastActivityTime < cutoff_time
-                    ).all()
-
-                    for dialogue in stale_dialogues:
-                        logger.info(f"Auto-closing stale dialogue {dialogue.dialogueID}")
-
-                        # Get client info for cleanup
-                        client_user = session.query(User).filter_by(userID=dialogue.userID).first()
-                        client_telegram_id = client_user.telegramID if client_user else None
-
-                        # Update state to CLOSED
-                        dialogue.state = str(DialogueState.CLOSED)
-                        dialogue.status = 'closed'
-                        dialogue.closedAt = datetime.now()
-                        dialogue.closedBy = 'system'
-                        dialogue.closeReason = f'auto-closed after {auto_close_hours} hours of inactivity'
-
-                        # Clear client FSM
-                        if client_user and client_user.get_fsm_state() == "has_ticket":
-                            client_user.clear_fsm()
-
-                        # Update ticket status
-                        if dialogue.ticketID:
-                            ticket = session.query(Ticket).filter_by(ticketID=dialogue.ticketID).first()
-                            if ticket:
-                                ticket.status = TicketStatus.CLOSED
-                                ticket.resolution = f'Auto-closed due to inactivity'
+    @staticmethod
+    def _get_auto_close_hours() -> float:
+        return float(Config.get(Config.AUTO_CLOSE_HOURS, 24) or 24)
+
+    def touch_dialogue(self, dialogue_id: str, last_activity: datetime = None):
+        """
+        Re-arm auto-close deadline of a dialogue.
+
+        Args:
+            dialogue_id: Dialogue ID
+            last_activity: Time of last activity (default: now)
+        """
+        last_activity = last_activity or datetime.now()
+        deadline = last_activity + timedelta(hours=self._get_auto_close_hours())
+        self.stale_scheduler.arm(dialogue_id, deadline)
 
-                        session.commit()
+    def record_activity(self, dialogue_id: str):
+        """Count message in dialogue: update activity (written behind) and re-arm auto-close."""
+        now = datetime.now()
+        self.activity_tracker.touch(dialogue_id, now)
+        self.touch_dialogue(dialogue_id, now)
 
-                        # CRITICAL: Clean up handlers
-                        if client_telegram_id:
-                            logger.info(f"[STALE_CHECK] Cleaning up handlers for user {client_telegram_id} after auto-close")
-                            await self.input_service.cleanup_user_handlers(client_telegram_id)
+    async def start_stale_check_task(self):
+        """Start scheduler that auto-closes dialogues when their inactivity deadline passes."""
+        self.stale_scheduler.start()
+        logger.info("Started stale dialogue scheduler")
+
+    async def _close_stale_dialogue(self, dialogue_id: str):
+        """Auto-close dialogue whose inactivity deadline has passed."""
+        auto_close_hours = self._get_auto_close_hours()
+
+        # Activity not yet flushed to DB counts too
+        pending_activity = self.activity_tracker.get_last_activity(dialogue_id)
+        if pending_activity and pending_activity >= datetime.now() - timedelta(hours=auto_close_hours):
+            if dialogue_id not in self.stale_scheduler:
+                self.touch_dialogue(dialogue_id, pending_activity)
+            return
+
+        def close_stale_dialogue(session):
+            dialogue = session.query(Dialogue).filter_by(
+                dialogueID=dialogue_id,
+                status='active'
+            ).first()
+            if not dialogue:
+                return 'gone', None
+
+            # Activity may have been written after the deadline was armed
+            cutoff_time = datetime.now() - timedelta(hours=auto_close_hours)
+            if dialogue.lastActivityTime and dialogue.lastActivityTime >= cutoff_time:
+                return 'active', dialogue.lastActivityTime
+
+            logger.info(f"Auto-closing stale dialogue {dialogue_id}")
+
+            # Get client info for cleanup
+            client_user = session.query(User).filter_by(userID=dialogue.userID).first()
+            client_telegram_id = client_user.telegramID if client_user else None
+
+            # Update state to CLOSED
+            dialogue.state = str(DialogueState.CLOSED)
+            dialogue.status = 'closed'
+            dialogue.closedAt = datetime.now()
+            dialogue.closedBy = 'system'
+            dialogue.closeReason = f'auto-closed after {auto_close_hours:g} hours of inactivity'
+
+            # Clear client FSM
+            if client_user and client_user.get_fsm_state() == "has_ticket":
+                client_user.clear_fsm()
+
+            # Update ticket status
+            if dialogue.ticketID:
+                ticket = session.query(Ticket).filter_by(ticketID=dialogue.ticketID).first()
+                if ticket:
+                    ticket.status = TicketStatus.CLOSED
+                    ticket.resolution = f'Auto-closed due to inactivity'
+
+            session.commit()
+            return 'closed', (client_telegram_id, dialogue.groupID, dialogue.threadID)
+
+        status, value = await run_in_db_executor(close_stale_dialogue)
+
+        if status == 'active':
+            if dialogue_id not in self.stale_scheduler:
+                self.touch_dialogue(dialogue_id, value)
+            return
+        if status != 'closed':
+            return
+
+        # Registry is only touched from the event loop
+        self.registry.remove(dialogue_id)
+
+        client_telegram_id, group_id, thread_id = value
+        if self.message_router:
+            self.message_router.cancel_dialogue_tasks(dialogue_id)
+
+        if client_telegram_id:
+            # CRITICAL: Clean up handlers
+            logger.info(f"[STALE_CHECK] Cleaning up handlers for user {client_telegram_id} after auto-close")
+            await self.input_service.cleanup_user_handlers(client_telegram_id)
 
-                        # Send notifications
-                        await self._send_timeout_notifications(dialogue.dialogueID)
+        # Send notifications
+        await self._send_timeout_notifications(dialogue_id)
 
-            except Exception as e:
-                logger.error(f"Error in stale dialogue check: {e}", exc_info=True)
+        # Topic can go back to the pool once nothing routes it to this dialogue
+        if group_id and thread_id and self.topic_pool.enabled and self.topic_pool.recycle:
+            await self.input_service.unregister_thread_handler(group_id, thread_id)
+            await self.topic_pool.release(group_id, thread_id)
 
     async def check_stale_fsm_states(self):
-        """Background task to check and clean stale FSM states."""
-        while True:
-            try:
-                await asyncio.sleep(600)  # Check every 10 minutes
-
-                with get_db_session_ctx() as session:
-                    # Find users with has_ticket FSM state
-                    users_with_fsm = session.query(User).filter(
-                        User.stateFSM.isnot(None)
-                    ).all()
-
-                    cleaned_count = 0
-                    handlers_cleaned = 0
-
-                    for user in users_with_fsm:
-                        if user.get_fsm_state() == "has_ticket":
-                            fsm_context = user.get_fsm_context()
-                            dialogue_id = fsm_context.get('dialogue_id')
-
-                            if dialogue_id:
-                                # Check if dialogue is still active
-                                dialogue = session.query(Dialogue).filter_by(
-                                    dialogueID=dialogue_id,
-                                    status='active'
-                                ).first()
-
-                                if not dialogue:
-                                    logger.info(
-                                        f"[FSM_CHECK] Cleaning stale FSM for user {user.telegramID}: "
-                                        f"dialogue {dialogue_id} is not active"
-                                    )
-                                    user.clear_fsm()
-                                    cleaned_count += 1
-
-                                    # CRITICAL: Also clean up handlers
-                                    await self.input_service.cleanup_user_handlers(user.telegramID)
-                                    handlers_cleaned += 1
-                            else:
-                                # FSM without dialogue_id is invalid
-                                logger.warning(
-                                    f"[FSM_CHECK] Cleaning invalid FSM for user {user.telegramID}: "
-                                    f"no dialogue_id in context"
-                                )
-                                user.clear_fsm()
-                                cleaned_count += 1
+        """
+        Clean FSM states pointing to dialogues that are no longer active.
+
+        Runs once at startup: while the bot is running dialogues clear client FSM
+        when they close, and the client handler repairs any leftover on next message.
+        """
+        try:
+            def clean_fsm(session):
+                active_ids = {
+                    dialogue_id for (dialogue_id,) in
+                    session.query(Dialogue.dialogueID).filter(Dialogue.status == 'active')
+                }
+                users_with_fsm = session.query(User).filter(
+                    User.stateFSM.isnot(None)
+                ).all()
+
+                cleaned = []
+                for user in users_with_fsm:
+                    if user.get_fsm_state() != "has_ticket":
+                        continue
+
+                    dialogue_id = user.get_fsm_context().get('dialogue_id')
+                    if dialogue_id and dialogue_id in active_ids:
+                        continue
+
+                    if dialogue_id:
+                        logger.info(
+                            f"[FSM_CHECK] Cleaning stale FSM for user {user.telegramID}: "
+                            f"dialogue {dialogue_id} is not active"
+                        )
+                    else:
+                        # FSM without dialogue_id is invalid
+                        logger.warning(
+                            f"[FSM_CHECK] Cleaning invalid FSM for user {user.telegramID}: "
+                            f"no dialogue_id in context"
+                        )
+                    user.clear_fsm()
+                    cleaned.append(user.telegramID)
 
-                                # CRITICAL: Also clean up handlers
-                                await self.input_service.cleanup_user_handlers(user.telegramID)
-                                handlers_cleaned += 1
+                if cleaned:
+                    session.commit()
+                return cleaned
 
-                    if cleaned_count > 0:
-                        session.commit()
-                        logger.info(f"[FSM_CHECK] Cleaned {cleaned_count} stale FSM states and {handlers_cleaned} handler sets")
+            cleaned = await run_in_db_executor(clean_fsm)
 
-            except Exception as e:
-                logger.error(f"Error in stale FSM check: {e}", exc_info=True)
+            for telegram_id in cleaned:
+                # CRITICAL: Also clean up handlers
+                await self.input_service.cleanup_user_handlers(telegram_id)
+
+            if cleaned:
+                logger.info(f"[FSM_CHECK] Cleaned {len(cleaned)} stale FSM states and handler sets")
+
+        except Exception as e:
+            logger.error(f"Error in stale FSM check: {e}", exc_info=True)
 
     async def _send_timeout_notifications(self, dialogue_id: str):
         """Send notifications about auto-closed dialogue."""
@@ -836,64 +946,130 @@ class DialogueService:
             logger.error(f"Error sending timeout notifications: {e}")
 
     async def restore_active_dialogues(self):
-        """Restore handlers for all active dialogues after bot restart."""
+        """
+        Restore handlers for all active dialogues after bot restart.
+
+        Dialogues, clients and operators are loaded with one joined query and
+        handlers are registered in memory, so polling can start right away.
+        Topic verification and FSM cleanup continue in background.
+        """
         try:
             logger.info("Restoring active dialogues...")
+            started_at = datetime.now()
 
-            with get_db_session_ctx() as session:
-                # Find all active dialogues
-                active_dialogues = session.query(Dialogue).filter_by(
-                    status='active'
-                ).all()
+            def load_active(session):
+                records = []
+                fixed_fsm = 0
+                for dialogue, client_user, operator, operator_user in self.registry.query_active(session):
+                    records.append(self.registry.record_from_row(dialogue, client_user, operator, operator_user))
 
-                restored_count = 0
+                    # Check FSM state consistency
+                    fsm_state = client_user.get_fsm_state()
+                    fsm_context = client_user.get_fsm_context()
+                    fsm_dialogue_id = fsm_context.get('dialogue_id') if fsm_context else None
 
-                for dialogue in active_dialogues:
-                    try:
-                        # Get client user
-                        client_user = session.query(User).filter_by(userID=dialogue.userID).first()
-                        if not client_user:
-                            logger.warning(
-                                f"Client user {dialogue.userID} not found for dialogue {dialogue.dialogueID}")
-                            continue
-
-                        # Check FSM state consistency
-                        fsm_state = client_user.get_fsm_state()
-                        fsm_context = client_user.get_fsm_context()
-                        fsm_dialogue_id = fsm_context.get('dialogue_id') if fsm_context else None
-
-                        if fsm_state != "has_ticket" or fsm_dialogue_id != dialogue.dialogueID:
-                            logger.warning(
-                                f"[RESTORE] FSM inconsistency for user {client_user.telegramID}: "
-                                f"FSM state='{fsm_state}', FSM dialogue='{fsm_dialogue_id}', "
-                                f"actual dialogue='{dialogue.dialogueID}'. Fixing FSM."
-                            )
-                            # Fix FSM
-                            fsm_context = {
-                                "dialogue_id": dialogue.dialogueID,
-                                "ticket_id": dialogue.ticketID,
-                                "thread_id": dialogue.threadID,
-                                "operator_id": dialogue.operatorID,
-                                "restored_at": datetime.now().isoformat()
-                            }
-                            client_user.set_fsm_state("has_ticket", fsm_context)
-                            session.commit()
-
-                        # Re-register handlers
-                        await self._register_dialogue_handlers(
-                            dialogue.dialogueID,
-                            client_user.telegramID,
-                            dialogue.groupID,
-                            dialogue.threadID
+                    if fsm_state != "has_ticket" or fsm_dialogue_id != dialogue.dialogueID:
+                        logger.warning(
+                            f"[RESTORE] FSM inconsistency for user {client_user.telegramID}: "
+                            f"FSM state='{fsm_state}', FSM dialogue='{fsm_dialogue_id}', "
+                            f"actual dialogue='{dialogue.dialogueID}'. Fixing FSM."
                         )
+                        client_user.set_fsm_state("has_ticket", {
+                            "dialogue_id": dialogue.dialogueID,
+                            "ticket_id": dialogue.ticketID,
+                            "thread_id": dialogue.threadID,
+                            "operator_id": dialogue.operatorID,
+                            "restored_at": datetime.now().isoformat()
+                        })
+                        fixed_fsm += 1
+
+                if fixed_fsm:
+                    session.commit()
+                return records, fixed_fsm
+
+            records, fixed_fsm = await run_in_db_executor(load_active)
+            self.registry.replace_all(records)
+
+            routes = []
+            for record in records:
+                # Auto-close deadline counts from last activity before restart
+                self.touch_dialogue(record.dialogue_id, record.last_activity or record.created_at)
+                routes.append((
+                    record.client_telegram_id,
+                    self._make_client_handler(record.client_telegram_id),
+                    record.group_id,
+                    record.thread_id,
+                    self._make_operator_handler(record.dialogue_id, record.thread_id)
+                ))
+
+            # Re-register handlers in one pass (in memory, no I/O)
+            restored_count = self.input_service.register_dialogue_routes(routes, client_state="has_ticket")
+
+            elapsed = (datetime.now() - started_at).total_seconds()
+            logger.info(
+                f"Restored {restored_count} active dialogues in {elapsed:.2f}s "
+                f"(fixed FSM of {fixed_fsm} clients)"
+            )
+
+            # Telegram-side checks don't hold up polling
+            self._spawn(self._finish_restore(records))
+
+        except Exception as e:
+            logger.error(f"Error restoring active dialogues: {e}", exc_info=True)
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def _finish_restore(self, records):
+        """Background part of restore: verify topics, clean stale FSM states."""
+        if Config.get(Config.DIALOGUE_RESTORE_VERIFY):
+            await self._verify_restored_topics(records)
+        await self.check_stale_fsm_states()
+
+    async def _verify_restored_topics(self, records):
+        """
+        Check that forum topics of restored dialogues still exist, recreate missing ones.
 
-                        restored_count += 1
-                        logger.info(f"Restored dialogue {dialogue.dialogueID} for user {client_user.telegramID}")
+        Checks run concurrently, at most DIALOGUE_RESTORE_CONCURRENCY at a time.
+        """
+        concurrency = int(Config.get(Config.DIALOGUE_RESTORE_CONCURRENCY, "10"))
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        missing = []
 
+        async def verify(record):
+            if not record.group_id or not record.thread_id:
+                return
+            async with semaphore:
+                for attempt in range(2):
+                    try:
+                        # Cheapest call that fails if the thread was deleted; shows
+                        # "bot is typing…" in the topic for a few seconds
+                        await self.bot.send_chat_action(
+                            chat_id=record.group_id,
+                            action='typing',
+                            message_thread_id=record.thread_id
+                        )
+                        return
+                    except TelegramRetryAfter as e:
+                        await asyncio.sleep(e.retry_after)
+                    except TelegramBadRequest as e:
+                        if 'thread not found' not in str(e).lower():
+                            logger.warning(f"[RESTORE] Can't verify topic of dialogue {record.dialogue_id}: {e}")
+                            return
+                        missing.append(record.dialogue_id)
+                        break
                     except Exception as e:
-                        logger.error(f"Error restoring dialogue {dialogue.dialogueID}: {e}")
+                        logger.warning(f"[RESTORE] Can't verify topic of dialogue {record.dialogue_id}: {e}")
+                        return
+                else:
+                    return
 
-            logger.info(f"Restored {restored_count} active dialogues")
+            if self.message_router and record.dialogue_id in self.registry:
+                logger.warning(f"[RESTORE] Topic of dialogue {record.dialogue_id} is missing, recreating")
+                await self.message_router._recreate_dialogue_thread(record.dialogue_id, record.to_info())
 
-        except Exception as e:
-            logger.error(f"Error restoring active dialogues: {e}", exc_info=True)
\ No newline at end of file
+        await asyncio.gather(*(verify(record) for record in records), return_exceptions=True)
+        logger.info(f"[RESTORE] Verified {len(records)} topics, {len(missing)} missing")
@@ -98,7 +98,8 @@ def setup_sheets_exporter(sheet_id: str = None) -> SheetsExporter:
                 'status': lambda x: x.value if x else '',
                 'priority': lambda x: x.value if x else '',
                 'context': lambda x: x[:255] if x else ''  # Truncate long JSON
-            }
+            },
+            watermark_column='updatedAt'
         ))
 
         # Register Dialogue exporter
@@ -133,7 +134,8 @@ def setup_sheets_exporter(sheet_id: str = None) -> SheetsExporter:
                 'lastActivityTime': date_formatters['date'],
                 'closedAt': date_formatters['date'],
                 'notes': lambda x: x[:100] + '...' if x and len(x) > 100 else x
-            }
+            },
+            watermark_column='updatedAt'
         ))
 
         # Register Operator exporter
@@ -7,7 +7,7 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta, timezone
 from sqlalchemy import desc, and_, or_, func
 
-from core.db import get_mainbot_session
+from core.db import run_in_db_executor, DatabaseType
 from models.mainbot import (
     User as MainbotUser,
     Purchase, Payment, Bonus,
@@ -32,7 +32,7 @@ class MainbotService:
             MainbotUser object or None
         """
         try:
-            with get_mainbot_session() as session:
+            def fetch(session):
                 user = session.query(MainbotUser).filter_by(
                     telegramID=telegram_id
                 ).first()
@@ -43,6 +43,8 @@ class MainbotService:
 
                 return user
 
+            return await run_in_db_executor(fetch, DatabaseType.MAINBOT)
+
         except Exception as e:
             logger.error(f"Error getting mainbot user {telegram_id}: {e}")
             return None
@@ -59,7 +61,7 @@ class MainbotService:
             Dictionary with user summary data
         """
         try:
-            with get_mainbot_session() as session:
+            def fetch(session):
                 user = session.query(MainbotUser).filter_by(
                     telegramID=telegram_id
                 ).first()
@@ -146,6 +148,8 @@ class MainbotService:
 
                 return summary
 
+            return await run_in_db_executor(fetch, DatabaseType.MAINBOT)
+
         except Exception as e:
             logger.error(f"Error getting user summary for {telegram_id}: {e}")
             return None
@@ -163,7 +167,7 @@ class MainbotService:
             List of purchase dictionaries
         """
         try:
-            with get_mainbot_session() as session:
+            def fetch(session):
                 purchases = session.query(Purchase).filter_by(
                     userID=user_id
                 ).order_by(
@@ -184,6 +188,8 @@ class MainbotService:
                     for p in purchases
                 ]
 
+            return await run_in_db_executor(fetch, DatabaseType.MAINBOT)
+
         except Exception as e:
             logger.error(f"Error getting purchases for user {user_id}: {e}")
             return []
@@ -201,7 +207,7 @@ class MainbotService:
             List of payment dictionaries
         """
         try:
-            with get_mainbot_session() as session:
+            def fetch(session):
                 payments = session.query(Payment).filter_by(
                     userID=user_id
                 ).order_by(
@@ -225,6 +231,8 @@ class MainbotService:
                     for p in payments
                 ]
 
+            return await run_in_db_executor(fetch, DatabaseType.MAINBOT)
+
         except Exception as e:
             logger.error(f"Error getting payments for user {user_id}: {e}")
             return []
@@ -242,7 +250,7 @@ class MainbotService:
             List of bonus dictionaries
         """
         try:
-            with get_mainbot_session() as session:
+            def fetch(session):
                 bonuses = session.query(Bonus).filter_by(
                     userID=user_id
                 ).order_by(
@@ -277,6 +285,8 @@ class MainbotService:
 
                 return result
 
+            return await run_in_db_executor(fetch, DatabaseType.MAINBOT)
+
         except Exception as e:
             logger.error(f"Error getting bonuses for user {user_id}: {e}")
             return []
@@ -294,7 +304,7 @@ class MainbotService:
             List of balance operation dictionaries sorted by date
         """
         try:
-            with get_mainbot_session() as session:
+            def fetch(session):
                 # Get active balance records
                 active_records = session.query(ActiveBalance).filter_by(
                     userID=user_id
@@ -335,6 +345,8 @@ class MainbotService:
 
                 return history[:limit]
 
+            return await run_in_db_executor(fetch, DatabaseType.MAINBOT)
+
         except Exception as e:
             logger.error(f"Error getting balance history for user {user_id}: {e}")
             return []
@@ -352,7 +364,7 @@ class MainbotService:
             List of transfer dictionaries
         """
         try:
-            with get_mainbot_session() as session:
+            def fetch(session):
                 # Get transfers where user is sender or receiver
                 transfers = session.query(Transfer).filter(
                     or_(
@@ -382,6 +394,8 @@ class MainbotService:
 
                 return result
 
+            return await run_in_db_executor(fetch, DatabaseType.MAINBOT)
+
         except Exception as e:
             logger.error(f"Error getting transfers for user {user_id}: {e}")
             return []
@@ -399,7 +413,7 @@ class MainbotService:
             Dictionary with activity summary
         """
         try:
-            with get_mainbot_session() as session:
+            def fetch(session):
                 since_date = datetime.now(timezone.utc) - timedelta(days=days)
 
                 # Count recent activities
@@ -456,6 +470,8 @@ class MainbotService:
 
                 return activity
 
+            return await run_in_db_executor(fetch, DatabaseType.MAINBOT)
+
         except Exception as e:
             logger.error(f"Error getting recent activity for user {user_id}: {e}")
             return {}
@@ -472,7 +488,7 @@ class MainbotService:
             Payment info or None
         """
         try:
-            with get_mainbot_session() as session:
+            def fetch(session):
                 payment = session.query(Payment).filter_by(txid=txid).first()
 
                 if payment:
@@ -494,6 +510,8 @@ class MainbotService:
 
                 return None
 
+            return await run_in_db_executor(fetch, DatabaseType.MAINBOT)
+
         except Exception as e:
             logger.error(f"Error searching payment by txid {txid}: {e}")
             return None
\ No newline at end of file
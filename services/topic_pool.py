@@ -0,0 +1,294 @@
+"""
+Pool of pre-created forum topics for support dialogues.
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Deque, Optional, Set, Any
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from sqlalchemy import and_, exists
+
+from models.dialogue import Dialogue
+from models.topic_pool import PooledTopic
+from core.db import run_in_db_executor
+from core.utils import TokenBucket
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+FREE_TOPIC_NAME = "⏳ Free topic"
+FREE_TOPIC_COLOR = 0x6FB9F0
+
+
+def _is_missing_topic(error: TelegramBadRequest) -> bool:
+    message = str(error).lower()
+    return 'thread not found' in message or 'topic_id_invalid' in message or 'topic_deleted' in message
+
+
+def _is_not_modified(error: TelegramBadRequest) -> bool:
+    return 'topic_not_modified' in str(error).lower()
+
+
+class ForumTopicPool:
+    """
+    Free forum topics created ahead of time, so taking a ticket doesn't wait on create_forum_topic.
+
+    Topics are created in the background at DIALOGUE_TOPIC_POOL_RATE per minute until
+    DIALOGUE_TOPIC_POOL_SIZE are free, and renamed with edit_forum_topic when given to a
+    dialogue (in background with DIALOGUE_TOPIC_LAZY_RENAME). With DIALOGUE_TOPIC_RECYCLE,
+    topics of closed dialogues go back to the pool - the next ticket then sees the previous
+    conversation above its own. Free topics are kept in DB to survive restarts.
+
+    The pool is off unless DIALOGUE_TOPIC_POOL_SIZE is set.
+    """
+
+    def __init__(self, bot: Bot, size: int = None, rate: float = None, lazy_rename: bool = None,
+                 recycle: bool = None):
+        """
+        Args:
+            bot: Bot instance
+            size: Free topics to keep (default: DIALOGUE_TOPIC_POOL_SIZE, 0 disables pool)
+            rate: Topics created per minute (default: DIALOGUE_TOPIC_POOL_RATE)
+            lazy_rename: Rename acquired topics in background (default: DIALOGUE_TOPIC_LAZY_RENAME)
+            recycle: Return topics of closed dialogues to the pool (default: DIALOGUE_TOPIC_RECYCLE)
+        """
+        self.bot = bot
+        if size is None:
+            size = int(Config.get(Config.DIALOGUE_TOPIC_POOL_SIZE, "0") or 0)
+        if rate is None:
+            rate = float(Config.get(Config.DIALOGUE_TOPIC_POOL_RATE, "10") or 10)
+        if lazy_rename is None:
+            lazy_rename = bool(Config.get(Config.DIALOGUE_TOPIC_LAZY_RENAME))
+        if recycle is None:
+            recycle = bool(Config.get(Config.DIALOGUE_TOPIC_RECYCLE))
+        self.size = max(0, size)
+        self.lazy_rename = lazy_rename
+        self.recycle = recycle
+
+        self._free: Dict[int, Deque[int]] = {}  # group ID -> free thread IDs
+        self._creation_bucket = TokenBucket(rate / 60, 1)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._background_tasks: Set[asyncio.Task] = set()
+        self.stats = {
+            'created': 0,
+            'acquired': 0,
+            'misses': 0,
+            'recycled': 0,
+            'dropped': 0,
+            'rename_failures': 0
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def free_count(self, group_id: int) -> int:
+        """Free topics in group."""
+        return len(self._free.get(group_id, ()))
+
+    async def start(self) -> None:
+        """Load free topics from DB and start background creation for GROUP_ID."""
+        if not self.enabled:
+            logger.info("[TOPIC_POOL] Disabled")
+            return
+
+        def load_free_topics(session):
+            # Topics a dialogue took just before a crash aren't free anymore
+            in_use = exists().where(and_(
+                Dialogue.groupID == PooledTopic.groupID,
+                Dialogue.threadID == PooledTopic.threadID,
+                Dialogue.status == 'active'
+            ))
+            session.query(PooledTopic).filter(in_use).delete(synchronize_session=False)
+            session.commit()
+            return [(topic.groupID, topic.threadID) for topic in
+                    session.query(PooledTopic).order_by(PooledTopic.createdAt)]
+
+        for group_id, thread_id in await run_in_db_executor(load_free_topics):
+            self._free.setdefault(group_id, deque()).append(thread_id)
+
+        group_id = int(Config.get(Config.GROUP_ID, 0) or 0)
+        if group_id:
+            self._free.setdefault(group_id, deque())
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        logger.info(f"[TOPIC_POOL] Started: {sum(len(free) for free in self._free.values())} free topics, "
+                    f"target {self.size} per group, recycling {'on' if self.recycle else 'off'}")
+
+    async def stop(self) -> None:
+        """Stop background creation and pending renames."""
+        tasks = list(self._background_tasks)
+        if self._task:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            group_id = next((group_id for group_id, free in self._free.items() if len(free) < self.size), None)
+            if group_id is None:
+                await self._wakeup.wait()
+                continue
+
+            await self._creation_bucket.acquire()
+            try:
+                await self._create_free_topic(group_id)
+            except asyncio.CancelledError:
+                raise
+            except TelegramRetryAfter as e:
+                logger.warning(f"[TOPIC_POOL] Flood control on topic creation, pausing for {e.retry_after}s")
+                self._creation_bucket.pause(e.retry_after)
+            except Exception as e:
+                logger.error(f"[TOPIC_POOL] Failed to create topic in group {group_id}: {e}")
+                # Don't hammer API with a failing request (e.g. bot lost topic rights)
+                self._creation_bucket.pause(60)
+
+    async def _create_free_topic(self, group_id: int) -> int:
+        topic = await self.bot.create_forum_topic(
+            chat_id=group_id,
+            name=FREE_TOPIC_NAME,
+            icon_color=FREE_TOPIC_COLOR
+        )
+        thread_id = topic.message_thread_id
+
+        def save_topic(session):
+            session.add(PooledTopic(groupID=group_id, threadID=thread_id))
+            session.commit()
+
+        await run_in_db_executor(save_topic)
+        self._free.setdefault(group_id, deque()).append(thread_id)
+        self.stats['created'] += 1
+        logger.debug(f"[TOPIC_POOL] Created free topic {group_id}/{thread_id}")
+        return thread_id
+
+    async def _forget(self, group_id: int, thread_id: int) -> None:
+        def delete_topic(session):
+            session.query(PooledTopic).filter_by(groupID=group_id, threadID=thread_id).delete()
+            session.commit()
+
+        await run_in_db_executor(delete_topic)
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def _rename(self, group_id: int, thread_id: int, name: str, wait_flood: bool = True) -> bool:
+        """
+        Rename topic.
+
+        Args:
+            wait_flood: Wait out flood control; otherwise rename later in background
+
+        Returns:
+            False if topic doesn't exist anymore, True otherwise
+        """
+        for attempt in range(2):
+            try:
+                await self.bot.edit_forum_topic(chat_id=group_id, message_thread_id=thread_id, name=name)
+                return True
+            except TelegramRetryAfter as e:
+                if not wait_flood:
+                    # Don't hold the ticket take for flood control
+                    self._spawn(self._rename_in_background(group_id, thread_id, name))
+                    return True
+                await asyncio.sleep(e.retry_after)
+            except TelegramBadRequest as e:
+                if _is_not_modified(e):
+                    return True
+                if _is_missing_topic(e):
+                    return False
+                logger.warning(f"[TOPIC_POOL] Failed to rename topic {group_id}/{thread_id}: {e}")
+                break
+            except Exception as e:
+                logger.warning(f"[TOPIC_POOL] Failed to rename topic {group_id}/{thread_id}: {e}")
+                break
+        # Topic is usable under the old name
+        self.stats['rename_failures'] += 1
+        return True
+
+    async def _rename_in_background(self, group_id: int, thread_id: int, name: str) -> None:
+        if not await self._rename(group_id, thread_id, name):
+            # Router recreates the thread when the first message to it fails
+            logger.warning(f"[TOPIC_POOL] Topic {group_id}/{thread_id} was deleted before lazy rename")
+
+    async def acquire(self, group_id: int, name: str) -> Optional[int]:
+        """
+        Take free topic for a dialogue and give it the dialogue's name.
+
+        Args:
+            group_id: Operators group ID
+            name: Topic name
+
+        Returns:
+            Thread ID or None if no free topic (caller creates one itself)
+        """
+        free = self._free.get(group_id)
+        while free:
+            thread_id = free.popleft()
+            self._wakeup.set()
+            await self._forget(group_id, thread_id)
+
+            if self.lazy_rename:
+                self._spawn(self._rename_in_background(group_id, thread_id, name))
+            elif not await self._rename(group_id, thread_id, name, wait_flood=False):
+                self.stats['dropped'] += 1
+                logger.warning(f"[TOPIC_POOL] Free topic {group_id}/{thread_id} was deleted, dropping")
+                continue
+
+            self.stats['acquired'] += 1
+            logger.info(f"[TOPIC_POOL] Gave topic {group_id}/{thread_id} to '{name}', "
+                        f"{len(free)} free left")
+            return thread_id
+
+        if self.enabled:
+            self.stats['misses'] += 1
+            self._wakeup.set()
+        return None
+
+    async def release(self, group_id: int, thread_id: int) -> bool:
+        """
+        Return topic of a closed dialogue to the pool.
+
+        The topic keeps its closed name until the next acquire renames it.
+        Handlers of the topic must be unregistered before.
+
+        Returns:
+            True if topic was recycled, False if pool or recycling is disabled or pool is full
+        """
+        if not self.enabled or not self.recycle or not group_id or not thread_id:
+            return False
+        free = self._free.setdefault(group_id, deque())
+        if len(free) >= self.size or thread_id in free:
+            return False
+
+        def save_topic(session):
+            session.merge(PooledTopic(groupID=group_id, threadID=thread_id))
+            session.commit()
+
+        try:
+            await run_in_db_executor(save_topic)
+        except Exception as e:
+            logger.error(f"[TOPIC_POOL] Failed to recycle topic {group_id}/{thread_id}: {e}")
+            return False
+
+        free.append(thread_id)
+        self.stats['recycled'] += 1
+        logger.info(f"[TOPIC_POOL] Recycled topic {group_id}/{thread_id}, {len(free)} free")
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics."""
+        return {
+            'size': self.size,
+            'recycle': self.recycle,
+            'free': {group_id: len(free) for group_id, free in self._free.items()},
+            **self.stats
+        }
@@ -0,0 +1,7 @@
+"""
+Shared test setup: make the repository root importable when running plain `pytest`.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
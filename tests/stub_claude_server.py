@@ -0,0 +1,110 @@
+"""
+Local stub of the Anthropic Messages API for exercising the translation streaming path.
+
+Answers POST /v1/messages: with "stream": true it sends the configured chunks as
+server-sent events (message_start, content_block_delta per chunk, message_stop),
+pausing `delay` seconds between chunks; otherwise it returns the joined text at once.
+
+Point the bot at it with CLAUDE_BASE_URL=http://127.0.0.1:<port>, or run standalone:
+    python -m tests.stub_claude_server --port 8765 --delay 0.5 "Hello, " "world" "!"
+"""
+import argparse
+import asyncio
+import json
+from typing import List
+
+from aiohttp import web
+
+
+class StubClaudeServer:
+    """Messages API stub streaming fixed chunks."""
+
+    def __init__(self, chunks: List[str], delay: float = 0.0, model: str = "stub-model"):
+        self.chunks = list(chunks)
+        self.delay = delay
+        self.model = model
+        self.requests: List[dict] = []
+        self._runner = None
+        self.port = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def _message(self, text: str) -> dict:
+        return {
+            "id": "msg_stub",
+            "type": "message",
+            "role": "assistant",
+            "model": self.model,
+            "content": [{"type": "text", "text": text}] if text else [],
+            "stop_reason": "end_turn" if text else None,
+            "stop_sequence": None,
+            "usage": {"input_tokens": 10, "output_tokens": len(self.chunks)}
+        }
+
+    async def _handle_messages(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        self.requests.append(body)
+
+        if not body.get("stream"):
+            return web.json_response(self._message("".join(self.chunks)))
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+
+        async def send(event: str, data: dict):
+            await response.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+
+        await send("message_start", {"type": "message_start", "message": self._message("")})
+        await send("content_block_start", {
+            "type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}
+        })
+        for chunk in self.chunks:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            await send("content_block_delta", {
+                "type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": chunk}
+            })
+        await send("content_block_stop", {"type": "content_block_stop", "index": 0})
+        await send("message_delta", {
+            "type": "message_delta",
+            "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+            "usage": {"output_tokens": len(self.chunks)}
+        })
+        await send("message_stop", {"type": "message_stop"})
+        await response.write_eof()
+        return response
+
+    async def start(self, port: int = 0) -> str:
+        """Start listening on 127.0.0.1 (random free port by default), return base URL."""
+        app = web.Application()
+        app.router.add_post("/v1/messages", self._handle_messages)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def _serve(args):
+    server = StubClaudeServer(args.chunks, delay=args.delay)
+    print(f"Stub Claude API at {await server.start(args.port)}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.2, help="Seconds between streamed chunks")
+    parser.add_argument("chunks", nargs="*", default=["Stub ", "streamed ", "translation."])
+    asyncio.run(_serve(parser.parse_args()))
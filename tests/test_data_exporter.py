@@ -0,0 +1,86 @@
+"""
+ModelExporter must load related objects of dotted fields with a constant number of queries.
+"""
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from models.base import Base
+from models.user import User, UserType
+from models.operator import Operator
+from models.ticket import Ticket
+from models.dialogue import Dialogue  # noqa: F401 - registers Ticket.dialogues backref
+from services.data_exporter import ModelExporter
+
+TICKET_FIELDS = {
+    'ticketID': 'ticketID',
+    'subject': 'subject',
+    'user_telegramID': 'user.telegramID',
+    'user_name': 'user.displayName',
+    'operator_name': 'operator.displayName',
+    'operator_telegramID': 'operator.telegramID',
+    'operator_nickname': 'operator.user.nickname'
+}
+
+
+def _make_session(tickets: int):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    operators = []
+    for i in range(3):
+        operator_user = User(telegramID=1000 + i, user_type=UserType.OPERATOR, nickname=f"op{i}")
+        session.add(operator_user)
+        session.flush()
+        operator = Operator(userID=operator_user.userID, telegramID=operator_user.telegramID,
+                            displayName=f"Operator {i}")
+        session.add(operator)
+        operators.append(operator)
+    session.flush()
+
+    for i in range(tickets):
+        client = User(telegramID=10000 + i, nickname=f"client{i}", firstname="Client")
+        session.add(client)
+        session.flush()
+        session.add(Ticket(userID=client.userID, subject=f"Ticket {i}",
+                           assignedOperatorID=operators[i % len(operators)].operatorID))
+    session.commit()
+    session.expunge_all()
+    return engine, session
+
+
+def _count_export_queries(exporter: ModelExporter, tickets: int) -> int:
+    engine, session = _make_session(tickets)
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        rows = [exporter.format_record(record) for record in exporter.get_records(session)]
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+        session.close()
+
+    assert len(rows) == tickets
+    assert all(row[3] for row in rows), "user.displayName not exported"
+    assert all(row[4].startswith("Operator") for row in rows), "operator.displayName not exported"
+    assert all(row[6].startswith("op") for row in rows), "operator.user.nickname not exported"
+    return len(statements)
+
+
+def test_export_query_count_does_not_grow_with_rows():
+    sizes = (5, 50, 200)
+    counts = [
+        _count_export_queries(ModelExporter(model_class=Ticket, id_column='ticketID',
+                                            field_mapping=dict(TICKET_FIELDS)), size)
+        for size in sizes
+    ]
+    assert len(set(counts)) == 1, f"queries per export grew with rows: {dict(zip(sizes, counts))}"
+
+
+def test_loader_options_keep_longest_paths():
+    exporter = ModelExporter(model_class=Ticket, id_column='ticketID', field_mapping=dict(TICKET_FIELDS))
+    # user, operator.user (covers operator) - not three separate options
+    assert len(exporter._get_loader_options()) == 2
@@ -0,0 +1,19 @@
+"""
+Compiled template rendering must match the pre-compilation implementation.
+"""
+import asyncio
+
+from benchmarks.templates_render import build_requests, build_rows, check_equivalence
+from core.templates import MessageTemplates
+
+
+def test_compiled_rendering_matches_baseline():
+    rows = build_rows(120)
+    requests = build_requests(rows, 600)
+    try:
+        checked = asyncio.run(check_equivalence(rows, requests))
+    finally:
+        MessageTemplates._cache = {}
+        MessageTemplates._compiled = {}
+        MessageTemplates._static_keyboards = {}
+    assert checked > len(requests)
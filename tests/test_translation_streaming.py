@@ -0,0 +1,121 @@
+"""
+Streaming translation against a local stub of the Messages API (CLAUDE_BASE_URL).
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from config import Config
+from services.ai_middleware import AIMiddleware, TranslationCache
+from services.dialogue_router import DialogueRouter
+from tests.stub_claude_server import StubClaudeServer
+
+CHUNKS = ["Hola, ", "necesito ", "ayuda ", "con ", "mi ", "pago, ", "por ", "favor ", "revisen ", "esto."]
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    """Start stub (inside the test's event loop) and point Claude client at it; test stops it."""
+    async def start(chunks=CHUNKS, delay=0.0):
+        server = StubClaudeServer(chunks, delay=delay)
+        base_url = await server.start()
+        monkeypatch.setitem(Config._dynamic_values, Config.CLAUDE_API_KEY, "test-key")
+        monkeypatch.setitem(Config._dynamic_values, Config.CLAUDE_BASE_URL, base_url)
+        return server
+
+    yield start
+
+    TranslationCache.clear()
+
+
+def test_stream_reports_chunks_in_order(stub_server):
+    async def run():
+        server = await stub_server()
+        try:
+            progress = []
+
+            async def on_progress(partial):
+                progress.append(partial)
+
+            middleware = AIMiddleware()
+            translated = await middleware._request_translation("texto", "en", on_progress)
+            assert server.requests[0]["stream"] is True
+            return translated, progress
+        finally:
+            await server.stop()
+
+    translated, progress = asyncio.run(run())
+
+    assert translated == "".join(CHUNKS)
+    # Every chunk reported once, each report extends the previous one
+    assert len(progress) == len(CHUNKS)
+    assert progress == ["".join(CHUNKS[:i + 1]) for i in range(len(CHUNKS))]
+
+
+class _FakeMessageService:
+    """Records queued edits; each edit stays pending until released."""
+
+    def __init__(self, settle: bool = True):
+        self.edits = []
+        self.settle = settle
+
+    async def edit_template_message(self, message, template_key, variables=None, **kwargs):
+        future = asyncio.get_running_loop().create_future()
+        if self.settle:
+            future.set_result(True)
+        self.edits.append((time.monotonic(), variables['translated'], kwargs, future))
+        return future
+
+
+def _progress_callback(message_service, interval, monkeypatch):
+    monkeypatch.setitem(Config._dynamic_values, Config.CLAUDE_STREAM_EDIT_INTERVAL, str(interval))
+    router = DialogueRouter(message_service)
+    sent_message = SimpleNamespace(message_id=1, chat=SimpleNamespace(id=-100))
+    return router._translation_progress_callback(sent_message, "original", "dlg")
+
+
+def test_progress_edits_are_throttled(stub_server, monkeypatch):
+    interval = 0.15
+    delay = 0.05
+
+    async def run():
+        server = await stub_server(delay=delay)
+        try:
+            message_service = _FakeMessageService()
+            show_progress = _progress_callback(message_service, interval, monkeypatch)
+            started = time.monotonic()
+            await AIMiddleware()._request_translation("texto", "en", show_progress)
+            return message_service.edits, time.monotonic() - started
+        finally:
+            await server.stop()
+
+    edits, elapsed = asyncio.run(run())
+
+    # Fewer edits than chunks, never closer together than the interval
+    assert 0 < len(edits) < len(CHUNKS)
+    assert len(edits) <= elapsed / interval + 1
+    times = [edit[0] for edit in edits]
+    assert all(later - earlier >= interval for earlier, later in zip(times, times[1:]))
+    # Edits show growing partial translation and go through the queue as droppable
+    texts = [edit[1] for edit in edits]
+    assert all(text.endswith(" …") for text in texts)
+    assert texts == sorted(texts, key=len)
+    assert all(edit[2] == {'drop_on_flood': True, 'wait': False} for edit in edits)
+
+
+def test_progress_edit_waits_for_queued_one(monkeypatch):
+    async def run():
+        message_service = _FakeMessageService(settle=False)
+        show_progress = _progress_callback(message_service, 0, monkeypatch)
+        for partial in ("a", "ab", "abc"):
+            await show_progress(partial)
+        # First edit still queued - later ones are skipped
+        assert len(message_service.edits) == 1
+
+        message_service.edits[0][3].set_result(True)
+        await show_progress("abcd")
+        return [edit[1] for edit in message_service.edits]
+
+    assert asyncio.run(run()) == ["a …", "abcd …"]